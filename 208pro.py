@@ -1,7 +1,54 @@
-
+import os
+import sys
+import time
 import tkinter as tk
-import heapq
-from tkinter import ttk
+from tkinter import filedialog, ttk
+
+import algorithms
+import all_pairs
+import graph_io
+import landmarks
+import layout
+import message_log
+import perf
+import sharded
+import tween
+from graph_core import ADD_EDGE, ADD_NODE, REMOVE_EDGE, REMOVE_NODE, SET_WEIGHT, Graph
+from heatmap import HeatmapPanel
+from journal import Journal
+from live import LiveComponents, LiveTree
+from playback import Playback, SPEEDS
+from lod import GraphView
+from renderer import CanvasRenderer
+from spatial import HitIndex
+from path_cache import ShortestPathCache
+from perf_overlay import PerfOverlay
+from worker import AlgorithmRunner, CANCELLED, DONE, FAILED
+
+GRAPH_FILE_TYPES = [
+    ("JSON", "*.json"),
+    ("Edge list", "*.txt *.csv"),
+    ("Binary graph", "*.gvb"),
+    ("All files", "*.*")
+]
+
+LAYOUT_SLICE = 0.03  # seconds of layout work per after() callback
+
+BULK_EDIT_NODES = 500  # selection deletes from this size are journaled as checkpoints
+
+LEVEL_BFS_MIN_EDGES = 100000  # from here BFS expands whole frontiers with NumPy
+
+SHARD_COUNTS = ["2", "4", "8", "16"]
+
+# Live results that can be kept current while editing
+LIVE_MODES = ["Off", "BFS levels", "Shortest paths", "Components"]
+
+# Fills cycled through for BFS levels, components and partitions
+NODE_SHADES = ["#94E2D5", "#F9E2AF", "#CBA6F7", "#FAB387", "#A6E3A1", "#F5C2E7", "#74C7EC", "#EBA0AC"]
+
+# Landmark overlay: node fill by lower bound to the end node, nearest first
+LANDMARK_SHADES = ["#F9E2AF", "#FAB387", "#EBA0AC", "#CBA6F7", "#7F849C", "#585B70"]
+
 
 class GraphVisualizer:
     def __init__(self, root):
@@ -28,6 +75,14 @@ class GraphVisualizer:
         self.bfs_color = "#94E2D5"  # Teal
         self.dfs_color = "#FAB387"  # Peach
         self.dijkstra_color = "#A6E3A1"  # Mint green
+        self.astar_color = "#89DCEB"  # Sky
+        self.bidirectional_color = "#F5C2E7"  # Light pink
+        self.alt_color = "#B4BEFE"  # Periwinkle
+        self.facility_color = "#F2CDCD"  # Flamingo
+        self.components_color = "#F5E0DC"  # Rosewater
+        self.mst_color = "#A6E3A1"  # Mint green
+        self.topo_color = "#74C7EC"  # Sapphire
+        self.flow_color = "#EBA0AC"  # Maroon
         
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -70,10 +125,20 @@ class GraphVisualizer:
         self.message_frame = tk.Frame(self.control_panel, bg=self.panel_color)
         self.message_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
-        self.message_label = tk.Label(self.message_frame, text="Messages:", 
+        self.message_header = tk.Frame(self.message_frame, bg=self.panel_color)
+        self.message_header.pack(fill=tk.X)
+
+        self.message_label = tk.Label(self.message_header, text="Messages:", 
                                     bg=self.panel_color, fg=self.highlight_color,
                                     font=('Helvetica', 12, 'bold'))
-        self.message_label.pack(anchor=tk.W)
+        self.message_label.pack(side=tk.LEFT)
+
+        # How much gets logged; "Summary" keeps large runs to their results
+        self.verbosity_var = tk.StringVar(value="All")
+        self.verbosity_box = ttk.Combobox(self.message_header, textvariable=self.verbosity_var,
+                                          values=list(message_log.VERBOSITY), state="readonly", width=8)
+        self.verbosity_box.pack(side=tk.RIGHT, padx=2)
+        self.verbosity_box.bind("<<ComboboxSelected>>", self.change_verbosity)
 
         self.message_scroll = tk.Scrollbar(self.message_frame)
         self.message_scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -116,7 +181,7 @@ class GraphVisualizer:
         self.start_node_entry = ttk.Entry(self.node_input_panel, font=('Helvetica', 12))
         self.start_node_entry.pack(fill=tk.X, padx=5, pady=2)
 
-        self.end_node_label = tk.Label(self.node_input_panel, text="End Node (Dijkstra):", 
+        self.end_node_label = tk.Label(self.node_input_panel, text="End Node (Dijkstra, several start nodes run in parallel):", 
                                     bg=self.panel_color, fg=self.text_color,
                                     font=('Helvetica', 10))
         self.end_node_label.pack(anchor=tk.W, padx=5)
@@ -145,7 +210,12 @@ class GraphVisualizer:
             ("Add Edge", self.add_edge_mode, self.edge_color),
             ("Delete Node", self.delete_node_mode, self.error_color),
             ("Delete Edge", self.delete_edge_mode, self.error_color),
-            ("Clear Graph", self.clear_graph, self.highlight_color)
+            ("Edit Weight", self.edit_weight_mode, self.edge_color),
+            ("Select", self.select_mode, self.queue_color),
+            ("Delete Selection", self.delete_selection, self.error_color),
+            ("Clear Graph", self.clear_graph, self.highlight_color),
+            ("Undo", self.undo, self.queue_color),
+            ("Redo", self.redo, self.queue_color)
         ]
 
         for text, command, color in edit_buttons:
@@ -154,6 +224,66 @@ class GraphVisualizer:
                           font=('Helvetica', 10), relief=tk.RAISED, bd=2)
             btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
 
+        # File buttons: bulk import/export bypass the per-element editing path
+        self.file_buttons_frame = tk.Frame(self.edit_panel, bg=self.panel_color)
+        self.file_buttons_frame.pack(fill=tk.X, pady=2)
+
+        file_buttons = [
+            ("Import Graph", self.import_graph),
+            ("Export Graph", self.export_graph)
+        ]
+
+        for text, command in file_buttons:
+            btn = tk.Button(self.file_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.path_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        # View controls: right-drag pans and the mouse wheel zooms
+        self.view_buttons_frame = tk.Frame(self.edit_panel, bg=self.panel_color)
+        self.view_buttons_frame.pack(fill=tk.X, pady=2)
+
+        view_buttons = [
+            ("Zoom In", lambda: self.view.zoom(self.canvas.winfo_width() / 2,
+                                              self.canvas.winfo_height() / 2, 1.5)),
+            ("Zoom Out", lambda: self.view.zoom(self.canvas.winfo_width() / 2,
+                                               self.canvas.winfo_height() / 2, 1 / 1.5)),
+            ("Fit View", self.fit_view)
+        ]
+
+        for text, command in view_buttons:
+            btn = tk.Button(self.view_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.path_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        # Layout controls: automatic placement for imported graphs
+        self.layout_buttons_frame = tk.Frame(self.edit_panel, bg=self.panel_color)
+        self.layout_buttons_frame.pack(fill=tk.X, pady=2)
+
+        self.layout_var = tk.StringVar(value="Force")
+        self.layout_box = ttk.Combobox(self.layout_buttons_frame, textvariable=self.layout_var,
+                                       values=list(layout.LAYOUTS), state="readonly", width=9)
+        self.layout_box.pack(side=tk.LEFT, padx=2, pady=2)
+
+        layout_buttons = [
+            ("Run Layout", self.run_layout),
+            ("Cancel Layout", self.cancel_layout)
+        ]
+
+        for text, command in layout_buttons:
+            btn = tk.Button(self.layout_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.path_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        # When set, new nodes and edges nudge their neighbourhood into place
+        self.relax_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.layout_buttons_frame, text="Relax on edit", variable=self.relax_var,
+                       bg=self.panel_color, fg=self.text_color, selectcolor=self.button_color,
+                       activebackground=self.panel_color,
+                       font=('Helvetica', 10)).pack(side=tk.LEFT, padx=2, pady=2)
+
         # Algorithm Buttons Panel
         self.algo_panel = tk.Frame(self.button_panel, bg=self.panel_color)
         self.algo_panel.pack(fill=tk.X, pady=(5, 0))
@@ -167,7 +297,11 @@ class GraphVisualizer:
         algo_buttons = [
             ("BFS", self.run_bfs, self.bfs_color),
             ("DFS", self.run_dfs, self.dfs_color),
-            ("Dijkstra", self.run_dijkstra, self.dijkstra_color)
+            ("Dijkstra", self.run_dijkstra, self.dijkstra_color),
+            ("A*", self.run_astar, self.astar_color),
+            ("Bidirectional", self.run_bidirectional, self.bidirectional_color),
+            ("ALT", self.run_alt, self.alt_color),
+            ("Cancel", self.cancel_runs, self.error_color)
         ]
 
         for text, command, color in algo_buttons:
@@ -176,6 +310,146 @@ class GraphVisualizer:
                           font=('Helvetica', 10, 'bold'), relief=tk.RAISED, bd=2)
             btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
 
+        # Live result kept up to date as the graph is edited
+        self.live_frame = tk.Frame(self.algo_panel, bg=self.panel_color)
+        self.live_frame.pack(fill=tk.X, pady=2)
+
+        tk.Label(self.live_frame, text="Live:", bg=self.panel_color, fg=self.text_color,
+                 font=('Helvetica', 10)).pack(side=tk.LEFT, padx=2)
+        self.live_var = tk.StringVar(value="Off")
+        self.live_box = ttk.Combobox(self.live_frame, textvariable=self.live_var,
+                                     values=LIVE_MODES, state="readonly", width=14)
+        self.live_box.pack(side=tk.LEFT, padx=2, pady=2)
+        self.live_box.bind("<<ComboboxSelected>>", self.change_live_mode)
+
+        # Landmark index for ALT queries and its overlay
+        self.landmark_buttons_frame = tk.Frame(self.algo_panel, bg=self.panel_color)
+        self.landmark_buttons_frame.pack(fill=tk.X, pady=2)
+
+        tk.Button(self.landmark_buttons_frame, text="Build Landmarks", command=self.build_landmarks,
+                  bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                  font=('Helvetica', 10), relief=tk.RAISED,
+                  bd=2).pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        self.landmark_overlay_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.landmark_buttons_frame, text="Landmark overlay",
+                       variable=self.landmark_overlay_var, command=self.toggle_landmark_overlay,
+                       bg=self.panel_color, fg=self.text_color, selectcolor=self.button_color,
+                       activebackground=self.panel_color,
+                       font=('Helvetica', 10)).pack(side=tk.LEFT, padx=2, pady=2)
+
+        # Distance matrix and nearest-facility searches
+        self.matrix_buttons_frame = tk.Frame(self.algo_panel, bg=self.panel_color)
+        self.matrix_buttons_frame.pack(fill=tk.X, pady=2)
+
+        matrix_buttons = [
+            ("All Pairs", self.run_all_pairs),
+            ("Nearest Facility", self.run_nearest_facility),
+            ("Show Matrix", self.show_matrix)
+        ]
+
+        for text, command in matrix_buttons:
+            btn = tk.Button(self.matrix_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        # Structure: components, spanning trees, orderings and flows
+        self.structure_buttons_frame = tk.Frame(self.algo_panel, bg=self.panel_color)
+        self.structure_buttons_frame.pack(fill=tk.X, pady=2)
+
+        structure_buttons = [
+            ("Components", self.run_components),
+            ("Kruskal MST", self.run_kruskal),
+            ("Prim MST", self.run_prim),
+            ("Topo Sort", self.run_topological_sort),
+            ("Max Flow", self.run_max_flow)
+        ]
+
+        for text, command in structure_buttons:
+            btn = tk.Button(self.structure_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        # Partitioning and sharded runs across the worker processes
+        self.shard_frame = tk.Frame(self.algo_panel, bg=self.panel_color)
+        self.shard_frame.pack(fill=tk.X, pady=2)
+
+        self.parts_var = tk.StringVar(value="4")
+        self.parts_box = ttk.Combobox(self.shard_frame, textvariable=self.parts_var,
+                                      values=SHARD_COUNTS, state="readonly", width=3)
+        self.parts_box.pack(side=tk.LEFT, padx=2, pady=2)
+
+        shard_buttons = [
+            ("Partition", self.run_partition),
+            ("Sharded BFS", lambda: self.run_sharded(sharded.BFS)),
+            ("Sharded Components", lambda: self.run_sharded(sharded.COMPONENTS)),
+            ("Sharded Nearest", lambda: self.run_sharded(sharded.NEAREST))
+        ]
+
+        for text, command in shard_buttons:
+            btn = tk.Button(self.shard_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        self.partition_colors_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.shard_frame, text="Partition colors", variable=self.partition_colors_var,
+                       command=self.toggle_partition_colors,
+                       bg=self.panel_color, fg=self.text_color, selectcolor=self.button_color,
+                       activebackground=self.panel_color,
+                       font=('Helvetica', 10)).pack(side=tk.LEFT, padx=2, pady=2)
+
+        # Playback Panel: replays the recorded trace of the last algorithm run
+        self.playback_panel = tk.Frame(self.button_panel, bg=self.panel_color)
+        self.playback_panel.pack(fill=tk.X, pady=(5, 0))
+
+        ttk.Label(self.playback_panel, text="Playback:", background=self.panel_color,
+                 foreground=self.text_color, font=('Helvetica', 10, 'bold')).pack(anchor=tk.W, padx=5)
+
+        self.playback_buttons_frame = tk.Frame(self.playback_panel, bg=self.panel_color)
+        self.playback_buttons_frame.pack(fill=tk.X, pady=2)
+
+        playback_buttons = [
+            ("Play/Pause", self.toggle_playback),
+            ("Step", self.step_playback),
+            ("Restart", self.restart_playback)
+        ]
+
+        for text, command in playback_buttons:
+            btn = tk.Button(self.playback_buttons_frame, text=text, command=command,
+                          bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                          font=('Helvetica', 10), relief=tk.RAISED, bd=2)
+            btn.pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
+        self.speed_var = tk.StringVar(value="1x")
+        self.speed_box = ttk.Combobox(self.playback_buttons_frame, textvariable=self.speed_var,
+                                      values=list(SPEEDS), state="readonly", width=8)
+        self.speed_box.pack(side=tk.LEFT, padx=2, pady=2)
+        self.speed_box.bind("<<ComboboxSelected>>", self.change_speed)
+
+        self.seek_var = tk.DoubleVar(value=0)
+        self.seek_scale = ttk.Scale(self.playback_panel, from_=0, to=1, variable=self.seek_var,
+                                    command=self.seek_playback)
+        self.seek_scale.pack(fill=tk.X, padx=5, pady=2)
+
+        # Instrumentation: live overlay and trace export
+        self.perf_frame = tk.Frame(self.control_panel, bg=self.panel_color)
+        self.perf_frame.pack(fill=tk.X, padx=5)
+
+        self.perf_overlay_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.perf_frame, text="Perf overlay", variable=self.perf_overlay_var,
+                       command=self.toggle_perf_overlay,
+                       bg=self.panel_color, fg=self.text_color, selectcolor=self.button_color,
+                       activebackground=self.panel_color,
+                       font=('Helvetica', 10)).pack(side=tk.LEFT, padx=2, pady=2)
+
+        tk.Button(self.perf_frame, text="Export Trace", command=self.export_perf_trace,
+                  bg=self.button_color, fg=self.text_color, activebackground=self.highlight_color,
+                  font=('Helvetica', 10), relief=tk.RAISED,
+                  bd=2).pack(side=tk.LEFT, padx=2, pady=2, expand=True, fill=tk.X)
+
         # Add exit fullscreen button
         self.exit_fullscreen_btn = ttk.Button(self.control_panel, text="Exit Fullscreen (F11)",
                                             command=self.toggle_fullscreen,
@@ -190,43 +464,139 @@ class GraphVisualizer:
                                  anchor=tk.W, font=('Helvetica', 10, 'bold'))
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-        # Graph data structures
-        self.nodes = []
-        self.edges = []
-        self.node_positions = {}
-        self.node_count = 0
+        # Messages and status are written to the widgets once per frame
+        self.messages = message_log.MessageLog(root, self.message_text, self.status_var, self.text_color)
+
+        # Graph data lives in the headless engine; the GUI only keeps canvas state
+        self.graph = Graph()
+        self.node_positions = self.graph.positions
+
+        # Undo/redo history of edits, as inverse change records or checkpoints
+        self.journal = Journal(self.graph)
+
+        # Highlight state is diffed and applied in batches once per frame
+        self.renderer = CanvasRenderer(self.canvas, self.node_color, self.edge_color)
+
+        # Grid index over node positions and edge segments for click hit-testing
+        self.hit_index = HitIndex(self.node_positions)
+
+        # Pan/zoom view that draws only the visible part of the graph, with
+        # less detail as more nodes come into view
+        self.view = GraphView(self.canvas, self.graph, self.hit_index, self.renderer, {
+            "node_color": self.node_color,
+            "edge_color": self.edge_color,
+            "outline_color": self.highlight_color,
+            "selection_color": self.queue_color,
+            "text_color": self.text_color,
+        })
         self.mode = "node"
         self.selected_nodes = []
+        self.selection = self.view.selection  # nodes picked with the rubber band in Select mode
+        self.selection_start = None
+        self.selection_rect = None
         self.current_weight = 1
         self.edge_creation_pending = False
 
-        # Store graph adjacency list: node -> list of (neighbor, weight)
-        self.graph = {}
-
-        # For storing canvas item IDs for edges and weights, to delete easily
-        self.edge_lines = {}  # key: (node1,node2) tuple sorted, value: line id
-        self.edge_weights_text = {}  # key: (node1,node2) tuple sorted, value: text id
+        # Algorithm traces are replayed with after() callbacks instead of blocking sleeps
+        self.trace_color = self.highlight_color
+        self.playback = Playback(self.root, self.apply_trace_event, self.reset_colors,
+                                 on_finish=self.on_playback_finished,
+                                 on_progress=self.on_playback_progress)
+
+        # Algorithms run on graph snapshots in worker processes; trace_run is
+        # the run feeding the playback, extra_runs the shortest path trees
+        # being computed for the path cache
+        self.runner = AlgorithmRunner(self.root)
+        self.trace_run = None
+        self.trace_label = ""
+        self.extra_runs = {}  # run id -> (snapshot version, start node, end node)
+
+        # Per-source shortest path trees, repaired or dropped as the graph changes
+        self.path_cache = ShortestPathCache(self.graph)
+
+        # ALT landmark index, built in the background and saved next to the
+        # imported graph file while the graph matches that file
+        self.landmark_index = None
+        self.landmark_run = None
+        self.landmark_version = None  # snapshot version of the build in progress
+        self.landmark_pending = None  # (start, end) query waiting for the build
+        self.graph_path = None
+        self.graph_file_version = None
+
+        # Partitioned copy of the graph in shared memory, the run computing
+        # the partition and the sharded job in progress
+        self.shards = None
+        self.partition_run = None
+        self.partition_then = None  # called once the partition is ready
+        self.sharded_job = None
+
+        # Live result and its pending update after edits
+        self.live = None
+        self.live_after_id = None
+
+        # All-pairs job in progress and the last finished distance matrix
+        self.all_pairs_job = None
+        self.distance_matrix = None
+        self.heatmap = HeatmapPanel(self.root, {
+            "bg_color": self.bg_color,
+            "panel_color": self.panel_color,
+            "text_color": self.text_color,
+            "button_color": self.button_color,
+        }, self.export_matrix)
+        self.trace_on_result = None
+        self.trace_started = 0.0
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Hot paths timed while the perf overlay is on
+        perf.probe(self.canvas, "itemconfig", "canvas.itemconfig")
+        perf.probe(self.renderer, "flush", "canvas.flush")
+        perf.probe(self.renderer.animator, "_frame", "tween.frame")
+        perf.probe(self.view, "redraw", "view.redraw")
+        perf.probe(self.messages, "log", "log.message")
+        perf.probe(self.messages, "flush", "log.flush")
+        perf.probe(self.playback, "apply_event", "playback.event")
+        perf.probe(self.runner, "_poll", "runner.poll")
+        perf.probe(self, "layout_tick", "layout.tick")
+        self.perf_overlay = PerfOverlay(self.root, self.canvas, self.text_color, self.panel_color)
 
         self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
+        # Right-drag pans, the wheel zooms (Button-4/5 are the X11 wheel events)
+        self.canvas.bind("<ButtonPress-3>", self.start_pan)
+        self.canvas.bind("<B3-Motion>", self.on_pan)
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.view.zoom(event.x, event.y, 1.2))
+        self.canvas.bind("<Button-5>", lambda event: self.view.zoom(event.x, event.y, 1 / 1.2))
+        self.pan_anchor = None
+        # Running layout generator and its pending after() callback
+        self.layout_job = None
+        self.layout_after_id = None
         self.root.bind("<F11>", lambda event: self.toggle_fullscreen())
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Shift-Z>", lambda event: self.redo())
         self.update_status("Welcome to Graph Algorithm Visualizer! Press F11 to toggle fullscreen.")
 
+    def close(self):
+        self.runner.shutdown()
+        self.drop_shards()
+        self.root.destroy()
+
     def toggle_fullscreen(self):
         self.root.attributes('-fullscreen', not self.root.attributes('-fullscreen'))
 
     def update_status(self, message):
-        self.status_var.set(message)
-        self.root.update_idletasks()
-
-    def log_message(self, message, color=None):
-        if color is None:
-            color = self.text_color
-        self.message_text.config(state=tk.NORMAL)
-        self.message_text.insert(tk.END, message + "\n", color)
-        self.message_text.tag_config(color, foreground=color)
-        self.message_text.see(tk.END)
-        self.message_text.config(state=tk.DISABLED)
-        self.update_status(message)
+        self.messages.status(message)
+
+    def log_message(self, message, color=None, level=message_log.INFO):
+        # Errors are shown at every verbosity
+        if color == self.error_color:
+            level = message_log.SUMMARY
+        self.messages.log(message, color, level)
+
+    def change_verbosity(self, event=None):
+        self.messages.verbosity = message_log.VERBOSITY[self.verbosity_var.get()]
 
     # Mode setters
     def add_node_mode(self):
@@ -250,109 +620,334 @@ class GraphVisualizer:
         self.selected_nodes = []
         self.log_message("Switched to Delete Edge Mode", self.error_color)
 
+    def edit_weight_mode(self):
+        self.mode = "edit_weight"
+        self.selected_nodes = []
+        self.log_message("Switched to Edit Weight Mode (click an edge to give it the set weight)",
+                         self.edge_color)
+
+    def select_mode(self):
+        self.mode = "select"
+        self.selected_nodes = []
+        self.log_message("Switched to Select Mode (drag to select nodes)", self.queue_color)
+
     def clear_graph(self):
+        self.cancel_layout(quiet=True)
+        self.cancel_runs(quiet=True)
+        self.playback.load([])
+        self.path_cache.clear()
+        self.drop_landmarks()
+        self.drop_matrix()
+        self.drop_shards()
+        self.graph_path = None
         self.canvas.delete("all")
-        self.nodes.clear()
-        self.edges.clear()
-        self.node_positions.clear()
-        self.graph.clear()
-        self.node_count = 0
-        self.edge_lines.clear()
-        self.edge_weights_text.clear()
+        with self.journal.edit("clear graph", bulk=True):
+            self.graph.clear()
+        self.hit_index.clear()
+        self.renderer.clear()
+        self.view.clear()
+        self.selection_rect = None
         self.selected_nodes.clear()
         self.log_message("Cleared the graph", self.highlight_color)
+        self.schedule_live_update()
+
+    # Import / export
+    def import_graph(self):
+        path = filedialog.askopenfilename(title="Import Graph", filetypes=GRAPH_FILE_TYPES)
+        if not path:
+            return
+        self.cancel_runs(quiet=True)
+        self.playback.load([])
+        self.path_cache.clear()
+        self.drop_landmarks()
+        self.drop_matrix()
+        self.drop_shards()
+        self.graph_path = None
+        self.cancel_layout(quiet=True)
+        try:
+            with self.journal.edit("import", bulk=True):
+                labels = graph_io.load_graph(self.graph, path)
+        except (OSError, ValueError) as exc:
+            self.log_message(f"Import failed: {exc}", self.error_color)
+            return
+        self.rebuild_canvas()
+        self.schedule_live_update()
+        self.log_message(f"Imported {len(self.graph)} nodes and {self.graph.edge_count} edges "
+                         f"from {os.path.basename(path)}", self.highlight_color)
+        if any(label != node for node, label in enumerate(labels)):
+            # Labels that are not usable ids were numbered in order of appearance
+            sample = ", ".join(f"{node} = {label!r}" for node, label in enumerate(labels[:5]))
+            self.log_message(f"Node labels renumbered as ids: {sample}"
+                             f"{', ...' if len(labels) > 5 else ''}", self.highlight_color)
+        self.graph_path = path
+        self.graph_file_version = self.graph.version
+        self.load_landmarks()
+
+    def rebuild_canvas(self):
+        # Redraws everything after the graph was replaced wholesale
+        self.canvas.delete("all")
+        self.renderer.clear()
+        self.view.clear()
+        self.hit_index.rebuild(self.graph)
+        self.selected_nodes.clear()
+        self.view.fit()
+
+    # Undo / redo
+    def undo(self):
+        self.step_history(self.journal.undo, "Undid")
+
+    def redo(self):
+        self.step_history(self.journal.redo, "Redid")
+
+    def step_history(self, step, verb):
+        if self.layout_job is not None:
+            self.log_message("A layout is running; cancel it before editing", self.error_color)
+            return
+        self.cancel_runs(quiet=True)
+        self.playback.load([])
+        self.selected_nodes = []
+        result = step()
+        if result is None:
+            self.log_message(f"Nothing to {verb[:-1].lower()}", self.error_color)
+            return
+        label, changes = result
+        if changes is None:
+            # Checkpoint restored: derived state no longer matches any version
+            self.path_cache.clear()
+            self.drop_landmarks()
+            self.drop_matrix()
+            self.rebuild_canvas()
+        else:
+            self.apply_graph_changes(changes)
+        self.log_message(f"{verb} {label}", self.queue_color)
+        self.schedule_live_update()
+
+    def apply_graph_changes(self, changes):
+        # Brings the spatial index and canvas in line with change records
+        # (without versions) that have already been applied to the graph
+        for change in changes:
+            kind = change[0]
+            if kind == ADD_NODE:
+                self.hit_index.add_node(change[1])
+                self.view.draw_node(change[1])
+            elif kind == REMOVE_NODE:
+                self.view.erase(nodes=(change[1],))
+                self.hit_index.remove_node(change[1])
+                self.renderer.forget_node(change[1])
+                self.selection.discard(change[1])
+            elif kind == ADD_EDGE:
+                self.hit_index.add_edge(change[1], change[2])
+                self.view.draw_edge(change[1], change[2])
+            elif kind == REMOVE_EDGE:
+                self.remove_edge_from_canvas(change[1], change[2])
+            elif kind == SET_WEIGHT:
+                self.view.erase(edges=((change[1], change[2]),))
+                self.view.draw_edge(change[1], change[2])
+
+    def export_graph(self):
+        path = filedialog.asksaveasfilename(title="Export Graph", defaultextension=".json",
+                                            filetypes=GRAPH_FILE_TYPES)
+        if not path:
+            return
+        try:
+            graph_io.save_graph(self.graph, path)
+        except OSError as exc:
+            self.log_message(f"Export failed: {exc}", self.error_color)
+            return
+        self.log_message(f"Exported {len(self.graph)} nodes and {self.graph.edge_count} edges "
+                         f"to {os.path.basename(path)}", self.highlight_color)
+        self.graph_path = path
+        self.graph_file_version = self.graph.version
+        self.save_landmarks()
 
     def on_canvas_click(self, event):
+        # Editing works in world coordinates; the view maps them to the screen
+        x, y = self.view.to_world(event.x, event.y)
+        if self.layout_job is not None and self.mode != "select":
+            self.log_message("A layout is running; cancel it before editing", self.error_color)
+            return
         if self.mode == "node":
-            self.create_node(event.x, event.y)
+            self.create_node(round(x), round(y))
         elif self.mode == "edge":
-            self.select_node_for_edge(event.x, event.y)
+            self.select_node_for_edge(x, y)
         elif self.mode == "delete_node":
-            self.delete_node(event.x, event.y)
+            self.delete_node(x, y)
         elif self.mode == "delete_edge":
-            self.select_edge_for_deletion(event.x, event.y)
+            self.select_edge_for_deletion(x, y)
+        elif self.mode == "edit_weight":
+            self.select_edge_for_weight(x, y)
+        elif self.mode == "select":
+            self.start_selection(event.x, event.y)
+
+    def on_canvas_drag(self, event):
+        if self.mode == "select" and self.selection_start is not None:
+            x0, y0 = self.selection_start
+            self.canvas.coords(self.selection_rect, x0, y0, event.x, event.y)
+
+    def on_canvas_release(self, event):
+        if self.mode == "select" and self.selection_start is not None:
+            self.finish_selection(event.x, event.y)
+
+    # Pan and zoom
+    def start_pan(self, event):
+        self.pan_anchor = (event.x, event.y)
+
+    def on_pan(self, event):
+        if self.pan_anchor is not None:
+            x0, y0 = self.pan_anchor
+            self.pan_anchor = (event.x, event.y)
+            self.view.pan(event.x - x0, event.y - y0)
+
+    def on_mouse_wheel(self, event):
+        self.view.zoom(event.x, event.y, 1.2 if event.delta > 0 else 1 / 1.2)
+
+    def fit_view(self):
+        self.view.fit()
+        self.update_status(f"View: {self.view.level} detail, zoom {self.view.scale:.2f}")
+
+    # Automatic layout
+    def run_layout(self):
+        self.cancel_layout(quiet=True)
+        if not len(self.graph):
+            self.log_message("Nothing to lay out", self.error_color)
+            return
+        self.layout_job = layout.LAYOUTS[self.layout_var.get()](self.graph)
+        self.update_status(f"{self.layout_var.get()} layout: 0%")
+        self.layout_after_id = self.root.after(1, self.layout_tick)
+
+    def layout_tick(self):
+        # Advances the layout for one time slice, then yields to the event loop
+        self.layout_after_id = None
+        deadline = time.perf_counter() + LAYOUT_SLICE
+        progress = 0.0
+        try:
+            while time.perf_counter() < deadline:
+                progress = next(self.layout_job)
+        except StopIteration:
+            self.layout_job = None
+            self.finish_layout()
+            self.log_message(f"{self.layout_var.get()} layout finished for {len(self.graph)} nodes",
+                             self.highlight_color)
+            return
+        self.update_status(f"{self.layout_var.get()} layout: {progress:.0%}")
+        self.layout_after_id = self.root.after(1, self.layout_tick)
+
+    def cancel_layout(self, quiet=False):
+        if self.layout_job is None:
+            return
+        if self.layout_after_id is not None:
+            self.root.after_cancel(self.layout_after_id)
+            self.layout_after_id = None
+        self.layout_job.close()
+        self.layout_job = None
+        # Keep whatever positions the layout reached
+        self.finish_layout()
+        if not quiet:
+            self.log_message("Layout cancelled", self.error_color)
+
+    def finish_layout(self):
+        self.hit_index.rebuild(self.graph)
+        self.view.fit()
+
+    def relax_after_edit(self, node):
+        if not self.relax_var.get():
+            return
+        moved = layout.relax_around(self.graph, node, near=self.hit_index.nodes.query_box)
+        for moved_node in moved:
+            self.hit_index.add_node(moved_node)
+            for tail, head, _ in self.graph.incident_edges(moved_node):
+                self.hit_index.add_edge(tail, head)
+        self.view.redraw()
 
     # Node creation
     def create_node(self, x, y):
-        r = 25  # Larger nodes for better visibility
-        node_id = self.node_count
-        # Create node with gradient effect
-        self.canvas.create_oval(x - r, y - r, x + r, y + r, 
-                              fill=self.node_color, outline=self.highlight_color,
-                              width=3, tags=f"node{node_id}")
-        self.canvas.create_text(x, y, text=str(node_id), 
-                              fill=self.text_color, font=('Helvetica', 12, 'bold'),
-                              tags=f"node{node_id}")
-        self.node_positions[node_id] = (x, y)
-        self.nodes.append(node_id)
-        self.graph[node_id] = []
-        self.node_count += 1
-        self.log_message(f"Node {node_id} added at ({x}, {y})", self.node_color)
+        with self.journal.edit("add node"):
+            node_id = self.graph.add_node(x, y)
+        self.hit_index.add_node(node_id)
+        self.view.draw_node(node_id)
+        self.log_message(f"Node {node_id} added at ({x}, {y})", self.node_color, level=message_log.DETAIL)
+        self.relax_after_edit(node_id)
+        self.schedule_live_update()
 
     # Node deletion
     def delete_node(self, x, y):
-        node_to_delete = None
-        for node_id, (nx, ny) in self.node_positions.items():
-            if abs(x - nx) < 30 and abs(y - ny) < 30:  # Larger click area
-                node_to_delete = node_id
-                break
+        node_to_delete = self.hit_index.node_at(x, y)
         if node_to_delete is not None:
-            # Remove node from canvas
-            self.canvas.delete(f"node{node_to_delete}")
-            # Remove edges connected to this node
-            edges_to_remove = [edge for edge in self.edges if node_to_delete in edge]
-            for edge in edges_to_remove:
-                self.remove_edge_from_canvas(edge[0], edge[1])
-                self.edges.remove(edge)
-                # Remove from graph adjacency
-                self.graph[edge[0]] = [(n, w) for (n, w) in self.graph[edge[0]] if n != edge[1]]
-                self.graph[edge[1]] = [(n, w) for (n, w) in self.graph[edge[1]] if n != edge[0]]
-
-            # Remove node from data structures
-            self.nodes.remove(node_to_delete)
-            del self.node_positions[node_to_delete]
-            del self.graph[node_to_delete]
+            # Remove the node and its connected edges from the engine and canvas
+            self.view.erase(nodes=(node_to_delete,))
+            self.hit_index.remove_node(node_to_delete)
+            self.renderer.forget_node(node_to_delete)
+            with self.journal.edit("delete node"):
+                removed = self.graph.remove_node(node_to_delete)
+            for node1, node2, _ in removed:
+                self.remove_edge_from_canvas(node1, node2)
             self.log_message(f"Deleted node {node_to_delete} and its connected edges", self.error_color)
+            self.schedule_live_update()
+
+    # Rubber band selection
+    def start_selection(self, x, y):
+        self.clear_selection()
+        self.selection_start = (x, y)
+        self.selection_rect = self.canvas.create_rectangle(x, y, x, y, outline=self.queue_color,
+                                                           dash=(4, 2), width=2)
+
+    def finish_selection(self, x, y):
+        x0, y0 = self.selection_start
+        self.selection_start = None
+        self.canvas.delete(self.selection_rect)
+        self.selection_rect = None
+        x0, y0 = self.view.to_world(x0, y0)
+        x, y = self.view.to_world(x, y)
+        for node in self.hit_index.nodes_in_box(x0, y0, x, y):
+            self.view.set_selected(node, True)
+        self.log_message(f"Selected {len(self.selection)} nodes", self.queue_color)
+
+    def clear_selection(self):
+        for node in list(self.selection):
+            self.view.set_selected(node, False)
+
+    def delete_selection(self):
+        nodes = [node for node in self.selection if node in self.graph]
+        self.selection.clear()
+        if not nodes:
+            self.log_message("No nodes selected", self.error_color)
+            return
+
+        # One pass over the engine, then a handful of batched canvas deletes
+        # Large selections may outrun the change log; a checkpoint keeps them undoable
+        with self.journal.edit("delete selection", bulk=len(nodes) >= BULK_EDIT_NODES):
+            removed = self.graph.remove_nodes(nodes)
+        for node1, node2, _ in removed:
+            self.hit_index.remove_edge(node1, node2)
+            self.renderer.forget_edge(node1, node2)
+        for node in nodes:
+            self.hit_index.remove_node(node)
+            self.renderer.forget_node(node)
+        self.view.erase(nodes, [(node1, node2) for node1, node2, _ in removed])
+        self.log_message(f"Deleted {len(nodes)} nodes and {len(removed)} edges", self.error_color)
+        self.schedule_live_update()
 
     # Edge creation
     def select_node_for_edge(self, x, y):
-        for node_id, (nx, ny) in self.node_positions.items():
-            if abs(x - nx) < 30 and abs(y - ny) < 30:  # Larger click area
-                if node_id not in self.selected_nodes:
-                    self.selected_nodes.append(node_id)
-                    self.log_message(f"Node {node_id} selected", self.highlight_color)
-                    
-                    # Highlight selected node with animation
-                    self.animate_node(node_id, self.highlight_color)
-                    
-                    if len(self.selected_nodes) == 2:
-                        self.create_edge(self.selected_nodes[0], self.selected_nodes[1])
-                        # Reset node colors with animation
-                        for n in self.selected_nodes:
-                            self.animate_node(n, self.node_color)
-                        self.selected_nodes = []
-                break
-
-    def animate_node(self, node_id, target_color):
-        current_color = self.node_color
-        steps = 10
-        delay = 30  # ms
-        
-        r1, g1, b1 = self.hex_to_rgb(current_color)
-        r2, g2, b2 = self.hex_to_rgb(target_color)
-        
-        for i in range(steps + 1):
-            r = int(r1 + (r2 - r1) * i / steps)
-            g = int(g1 + (g2 - g1) * i / steps)
-            b = int(b1 + (b2 - b1) * i / steps)
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            self.canvas.itemconfig(f"node{node_id}", fill=color)
-            self.root.update()
-            self.root.after(delay)
-
-    def hex_to_rgb(self, hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        node_id = self.hit_index.node_at(x, y)
+        if node_id is not None and node_id not in self.selected_nodes:
+            self.selected_nodes.append(node_id)
+            self.log_message(f"Node {node_id} selected", self.highlight_color, level=message_log.DETAIL)
+
+            # Highlight selected node with animation
+            self.animate_node(node_id, self.highlight_color)
+
+            if len(self.selected_nodes) == 2:
+                self.create_edge(self.selected_nodes[0], self.selected_nodes[1])
+                # Fade both back once the second node's highlight has shown
+                for n in self.selected_nodes:
+                    self.animate_node(n, self.node_color, self.highlight_color, tween.DURATION)
+                self.selected_nodes = []
+
+    def animate_node(self, node_id, target_color, start_color=None, delay=0.0):
+        # Fades the node's fill without blocking; start_color defaults to
+        # the fill it currently has
+        self.renderer.fade_node(node_id, target_color, start_color, delay)
 
     def set_weight(self):
         try:
@@ -370,81 +965,56 @@ class GraphVisualizer:
             return
 
         # Check if edge already exists
-        edge_key = tuple(sorted((node1, node2)))
-        if edge_key in self.edge_lines:
+        if self.graph.has_edge(node1, node2):
             self.log_message("Edge already exists", self.error_color)
             return
+        with self.journal.edit("add edge"):
+            self.graph.add_edge(node1, node2, self.current_weight)
+        self.hit_index.add_edge(node1, node2)
+        self.view.draw_edge(node1, node2)
 
-        x1, y1 = self.node_positions[node1]
-        x2, y2 = self.node_positions[node2]
-
-        # Create arrow with style
-        line_id = self.canvas.create_line(x1, y1, x2, y2, 
-                                        fill=self.edge_color, width=3,
-                                        arrow=tk.LAST, arrowshape=(12, 15, 6),
-                                        dash=(4, 2) if node1 > node2 else None)  # Different style for reverse edges
-        self.edges.append((node1, node2))
-        self.edge_lines[edge_key] = line_id
-
-        # Add weight text above the edge line midpoint
-        mid_x = (x1 + x2) / 2
-        mid_y = (y1 + y2) / 2
-        offset = -15  # Move weight label slightly above the line
-        weight_text_id = self.canvas.create_text(mid_x, mid_y + offset, 
-                                              text=str(self.current_weight), 
-                                              fill=self.text_color, 
-                                              font=("Helvetica", 12, "bold"),
-                                              tags=f"weight{edge_key}")
-        self.edge_weights_text[edge_key] = weight_text_id
-
-        self.graph[node1].append((node2, self.current_weight))
-        self.graph[node2].append((node1, self.current_weight))
-
-        self.log_message(f"Edge added between {node1} and {node2} with weight {self.current_weight}", self.edge_color)
+        self.log_message(f"Edge added between {node1} and {node2} with weight {self.current_weight}",
+                         self.edge_color, level=message_log.DETAIL)
+        self.relax_after_edit(node2)
+        self.schedule_live_update()
 
     # Remove edge helper
     def remove_edge_from_canvas(self, node1, node2):
-        edge_key = tuple(sorted((node1, node2)))
-        if edge_key in self.edge_lines:
-            self.canvas.delete(self.edge_lines[edge_key])
-            del self.edge_lines[edge_key]
-        if edge_key in self.edge_weights_text:
-            self.canvas.delete(self.edge_weights_text[edge_key])
-            del self.edge_weights_text[edge_key]
+        self.hit_index.remove_edge(node1, node2)
+        self.renderer.forget_edge(node1, node2)
+        self.view.erase(edges=((node1, node2),))
 
     # Delete edge mode
     def select_edge_for_deletion(self, x, y):
-        # Detect which edge line is near clicked point
-        # We'll approximate by checking distance to line segments
-        for (node1, node2) in self.edges:
-            x1, y1 = self.node_positions[node1]
-            x2, y2 = self.node_positions[node2]
-
-            if self.point_near_line(x, y, x1, y1, x2, y2):
-                # Delete edge line and weight text
-                self.remove_edge_from_canvas(node1, node2)
-                self.edges.remove((node1, node2))
-                # Remove from graph adjacency list
-                self.graph[node1] = [(n, w) for (n, w) in self.graph[node1] if n != node2]
-                self.graph[node2] = [(n, w) for (n, w) in self.graph[node2] if n != node1]
-                self.log_message(f"Deleted edge between {node1} and {node2}", self.error_color)
-                break
-
-    # Helper to check if point (px,py) near line segment (x1,y1)-(x2,y2)
-    def point_near_line(self, px, py, x1, y1, x2, y2, threshold=15):  # Larger threshold
-        # Calculate distance from point to line segment
-        line_mag = ((x2 - x1)**2 + (y2 - y1)**2)**0.5
-        if line_mag < 0.000001:
-            return False
-
-        u = ((px - x1)*(x2 - x1) + (py - y1)*(y2 - y1)) / (line_mag**2)
-        if u < 0 or u > 1:
-            return False
-
-        ix = x1 + u * (x2 - x1)
-        iy = y1 + u * (y2 - y1)
-        dist = ((px - ix)**2 + (py - iy)**2)**0.5
-        return dist <= threshold
+        # Detect which edge line is near clicked point using the spatial index
+        edge = self.hit_index.edge_at(x, y)
+        if edge is not None:
+            node1, node2 = edge
+            # Delete edge line and weight text
+            self.remove_edge_from_canvas(node1, node2)
+            with self.journal.edit("delete edge"):
+                self.graph.remove_edge(node1, node2)
+            self.log_message(f"Deleted edge between {node1} and {node2}", self.error_color)
+            self.schedule_live_update()
+
+    # Edit weight mode
+    def select_edge_for_weight(self, x, y):
+        edge = self.hit_index.edge_at(x, y)
+        if edge is None:
+            return
+        node1, node2 = edge
+        old = self.graph.weight(node1, node2)
+        if old == self.current_weight:
+            self.log_message(f"Edge between {node1} and {node2} already has weight {old}",
+                             self.error_color)
+            return
+        with self.journal.edit("set weight"):
+            self.graph.set_weight(node1, node2, self.current_weight)
+        self.view.erase(edges=((node1, node2),))
+        self.view.draw_edge(node1, node2)
+        self.log_message(f"Weight of edge between {node1} and {node2} changed from {old} "
+                         f"to {self.current_weight}", self.edge_color)
+        self.schedule_live_update()
 
     # BFS
     def run_bfs(self):
@@ -458,31 +1028,19 @@ class GraphVisualizer:
             self.log_message("Start node does not exist.", self.error_color)
             return
 
-        visited = []
-        queue = []
-
-        visited.append(start_node)
-        queue.append(start_node)
-
         self.log_message("\nBFS Traversal:", self.bfs_color)
+        if algorithms.HAVE_NUMPY and self.graph.edge_count >= LEVEL_BFS_MIN_EDGES:
+            self.start_trace("BFS", "level_bfs", (start_node,), self.bfs_color,
+                             on_result=self.log_levels)
+        else:
+            self.start_trace("BFS", "bfs", (start_node,), self.bfs_color)
 
-        while queue:
-            current = queue.pop(0)
-            self.log_message(f"Visited {current}")
-            self.highlight_node(current, self.bfs_color)
-            self.root.update()
-            self.root.after(500)  # Pause for visualization
-
-            for neighbor, _ in self.graph[current]:
-                if neighbor not in visited:
-                    visited.append(neighbor)
-                    queue.append(neighbor)
-                    self.highlight_edge(current, neighbor, self.bfs_color)
-                    self.root.update()
-                    self.root.after(300)
-
-        # Reset colors after traversal
-        self.reset_colors()
+    def log_levels(self, result):
+        sizes = algorithms.level_sizes(result[0])
+        widest = max(range(len(sizes)), key=sizes.__getitem__)
+        self.log_message(f"BFS reached {sum(sizes)} of {len(self.graph)} nodes in {len(sizes)} levels; "
+                         f"widest level {widest} has {sizes[widest]} nodes", self.bfs_color,
+                         level=message_log.SUMMARY)
 
     # DFS
     def run_dfs(self):
@@ -496,100 +1054,798 @@ class GraphVisualizer:
             self.log_message("Start node does not exist.", self.error_color)
             return
             
-        visited = []
         self.log_message("\nDFS Traversal:", self.dfs_color)
-        self.dfs_helper(start_node, visited)
-        self.reset_colors()
-
-    def dfs_helper(self, node, visited):
-        if node not in visited:
-            visited.append(node)
-            self.log_message(f"Visited {node}")
-            self.highlight_node(node, self.dfs_color)
-            self.root.update()
-            self.root.after(500)  # Pause for visualization
-
-            for neighbor, _ in self.graph[node]:
-                if neighbor not in visited:
-                    self.highlight_edge(node, neighbor, self.dfs_color)
-                    self.root.update()
-                    self.root.after(300)
-                    self.dfs_helper(neighbor, visited)
+        self.start_trace("DFS", "dfs", (start_node,), self.dfs_color)
 
     # Dijkstra
     def run_dijkstra(self):
+        # Several comma-separated start nodes run concurrently; the first one
+        # is animated and the others report their paths when they finish
         try:
-            start_node = int(self.start_node_entry.get())
+            start_nodes = [int(text) for text in self.start_node_entry.get().split(",")]
             end_node = int(self.end_node_entry.get())
         except ValueError:
             self.log_message("Invalid node numbers", self.error_color)
             return
             
+        for start_node in start_nodes:
+            if start_node not in self.graph:
+                self.log_message(f"Start node {start_node} does not exist.", self.error_color)
+                return
+        if end_node not in self.graph:
+            self.log_message("End node does not exist.", self.error_color)
+            return
+            
+        self.log_message("\nDijkstra's Shortest Path:", self.dijkstra_color)
+        snapshot = None
+        tree = self.path_cache.lookup(start_nodes[0])
+        if tree is not None:
+            self.show_cached_path(tree, end_node)
+        else:
+            snapshot = self.start_trace("Dijkstra", "dijkstra", (start_nodes[0], end_node),
+                                        self.dijkstra_color)
+            # The animated search stops at end_node; cache the full tree too
+            self.request_tree(snapshot, start_nodes[0], None)
+        for start_node in start_nodes[1:]:
+            tree = self.path_cache.lookup(start_node)
+            if tree is not None:
+                self.log_path(tree, end_node)
+            else:
+                snapshot = snapshot or self.graph.snapshot()
+                self.request_tree(snapshot, start_node, end_node)
+        self.log_message("Path cache: {hits} hits, {misses} misses, {repairs} repaired".format(
+            **self.path_cache.stats()))
+
+    # Goal-directed point-to-point searches
+    def run_astar(self):
+        # The heuristic scale is kept up to date on the live graph, so the
+        # search on the snapshot does not rescan every edge for it
+        self.run_point_to_point("A*", "astar", self.astar_color,
+                                lambda: (algorithms.heuristic_scale(self.graph),))
+
+    def run_bidirectional(self):
+        self.run_point_to_point("Bidirectional Dijkstra", "bidirectional_dijkstra",
+                                self.bidirectional_color)
+
+    def run_point_to_point(self, label, name, color, extra_args=None):
+        # extra_args() supplies arguments after the endpoints
+        endpoints = self.read_endpoints()
+        if endpoints is None:
+            return
+        self.log_message(f"\n{label} Shortest Path:", color)
+        args = endpoints + extra_args() if extra_args is not None else endpoints
+        self.start_trace(label, name, args, color)
+
+    def read_endpoints(self):
+        # (start node, end node) from the entries, or None after logging why not
+        try:
+            start_node = int(self.start_node_entry.get())
+            end_node = int(self.end_node_entry.get())
+        except ValueError:
+            self.log_message("Invalid node numbers", self.error_color)
+            return None
+
         if start_node not in self.graph:
             self.log_message("Start node does not exist.", self.error_color)
-            return
+            return None
         if end_node not in self.graph:
             self.log_message("End node does not exist.", self.error_color)
+            return None
+        return start_node, end_node
+
+    # ALT: A* with landmark lower bounds, answered on the Tk thread
+    def run_alt(self):
+        endpoints = self.read_endpoints()
+        if endpoints is None:
             return
-            
-        distances = {node: float('inf') for node in self.graph}
-        distances[start_node] = 0
-        visited = set()
-        previous_nodes = {node: None for node in self.graph}
+        self.log_message("\nALT Shortest Path:", self.alt_color)
+        if self.current_landmarks() is None:
+            # The query runs once the index is ready
+            self.build_landmarks(pending=endpoints)
+        else:
+            self.answer_alt(*endpoints)
 
-        min_heap = [(0, start_node)]
+    def answer_alt(self, start_node, end_node):
+        index = self.current_landmarks()
+        if index is None or start_node not in self.graph or end_node not in self.graph:
+            self.log_message("Graph changed before the ALT query could run", self.error_color)
+            return
+        self.cancel_runs(quiet=True)
+        self.reset_colors()
+        started = time.perf_counter()
+        events = list(index.query(self.graph, start_node, end_node))
+        elapsed = time.perf_counter() - started
+        self.trace_color = self.alt_color
+        self.trace_label = "ALT"
+        self.playback.load(events)
+        self.seek_scale.config(to=max(1, len(events)))
+        self.playback.play()
+        settled = sum(1 for event in events if event[0] == algorithms.SETTLE)
+        self.log_message(f"ALT answered in {elapsed * 1000:.2f} ms, settled {settled} of "
+                         f"{len(self.graph)} nodes", self.alt_color, level=message_log.SUMMARY)
+
+    def current_landmarks(self):
+        # The landmark index if it is still valid for the graph, else None
+        index = self.landmark_index
+        if index is not None and not index.refresh(self.graph):
+            self.landmark_index = index = None
+            self.log_message("Graph edits invalidated the landmark index", self.error_color)
+        return index
+
+    def build_landmarks(self, pending=None):
+        if self.landmark_run is not None:
+            self.landmark_pending = pending or self.landmark_pending
+            return
+        if not len(self.graph):
+            self.log_message("The graph is empty", self.error_color)
+            return
+        snapshot = self.graph.snapshot()
+        self.landmark_pending = pending
+        self.landmark_version = snapshot.version
+        self.landmark_run = self.runner.submit("landmark_tables", snapshot, (landmarks.LANDMARK_COUNT,),
+                                               None, self.on_landmarks_done)
+        self.log_message(f"Building landmark index ({landmarks.LANDMARK_COUNT} landmarks)...",
+                         self.alt_color)
+
+    def on_landmarks_done(self, run_id, status, payload):
+        if run_id != self.landmark_run:
+            return
+        self.landmark_run = None
+        pending, self.landmark_pending = self.landmark_pending, None
+        if status == FAILED:
+            self.log_message(f"Landmark build failed: {payload}", self.error_color)
+            return
+        if status != DONE:
+            return
+        index = landmarks.LandmarkIndex(self.landmark_version, *payload)
+        if not index.refresh(self.graph):
+            self.log_message("Graph changed while building landmarks; rebuilding", self.error_color)
+            self.build_landmarks(pending)
+            return
+        self.landmark_index = index
+        self.log_message(f"Landmark index ready: landmarks {index.landmarks}", self.alt_color,
+                         level=message_log.SUMMARY)
+        self.save_landmarks()
+        if self.landmark_overlay_var.get():
+            self.show_landmark_overlay()
+        if pending is not None:
+            self.answer_alt(*pending)
+
+    def drop_landmarks(self):
+        if self.landmark_run is not None:
+            self.runner.cancel(self.landmark_run)
+        self.landmark_index = None
+
+    def save_landmarks(self):
+        # Only while the graph still matches the file it came from
+        index = self.current_landmarks()
+        if index is None or self.graph_path is None or self.graph.version != self.graph_file_version:
+            return
+        try:
+            index.save(self.graph, landmarks.index_path(self.graph_path))
+        except OSError as exc:
+            self.log_message(f"Could not save the landmark index: {exc}", self.error_color)
 
-        self.log_message("\nDijkstra's Shortest Path:", self.dijkstra_color)
+    def load_landmarks(self):
+        path = landmarks.index_path(self.graph_path)
+        if not os.path.exists(path):
+            return
+        try:
+            index = landmarks.load_index(self.graph, path)
+        except (OSError, ValueError) as exc:
+            self.log_message(f"Could not load the landmark index: {exc}", self.error_color)
+            return
+        if index is None:
+            self.log_message("Saved landmark index belongs to a different graph; ignored",
+                             self.error_color)
+            return
+        self.landmark_index = index
+        self.log_message(f"Loaded landmark index ({len(index)} landmarks)", self.alt_color)
+
+    def toggle_landmark_overlay(self):
+        self.stop_live()
+        if self.landmark_overlay_var.get():
+            self.show_landmark_overlay()
+        else:
+            self.reset_colors()
+
+    def show_landmark_overlay(self):
+        # Marks the landmarks and, given an end node, shades every node by its
+        # lower bound to it
+        index = self.current_landmarks()
+        if index is None:
+            self.log_message("Build the landmark index first", self.error_color)
+            self.landmark_overlay_var.set(False)
+            return
+        self.reset_colors()
+        try:
+            target = int(self.end_node_entry.get())
+        except ValueError:
+            target = None
+        if target in self.graph:
+            bound = index.bounds_to(target)
+            bounds = {node: bound(node) for node in self.graph.nodes()}
+            top = max((value for value in bounds.values() if value < float('inf')), default=0.0)
+            for node, value in bounds.items():
+                if value < float('inf'):
+                    shade = min(len(LANDMARK_SHADES) - 1, int(value / top * len(LANDMARK_SHADES))) if top else 0
+                    self.highlight_node(node, LANDMARK_SHADES[shade])
+            self.log_message(f"Landmark overlay: lower bounds to node {target}, largest {top:g}",
+                             self.alt_color)
+        for node in index.landmarks:
+            if node in self.graph:
+                self.highlight_node(node, self.highlight_color)
+
+    # Live results: repaired after every edit instead of recomputed
+    def change_live_mode(self, event=None):
+        mode = self.live_var.get()
+        self.stop_live()
+        self.reset_colors()
+        if mode == "Off":
+            return
+        if mode == "Components":
+            live = LiveComponents(self.graph)
+        else:
+            try:
+                start_node = int(self.start_node_entry.get())
+            except ValueError:
+                start_node = None
+            if start_node not in self.graph:
+                self.log_message("Enter an existing start node for a live tree", self.error_color)
+                return
+            live = LiveTree(self.graph, start_node, weighted=mode == "Shortest paths")
+        self.cancel_runs(quiet=True)
+        self.playback.load([])
+        self.live = live
+        self.live_var.set(mode)
+        self.paint_live(None)
+        self.log_message(f"Live {mode.lower()}: {self.describe_live()}", self.queue_color)
+
+    def stop_live(self):
+        self.live = None
+        self.live_var.set("Off")
+        if self.live_after_id is not None:
+            self.root.after_cancel(self.live_after_id)
+            self.live_after_id = None
+
+    def schedule_live_update(self):
+        # Edits made in the same event handler are folded into one update
+        if self.live is not None and self.live_after_id is None:
+            self.live_after_id = self.root.after_idle(self.update_live)
+
+    def update_live(self):
+        self.live_after_id = None
+        live = self.live
+        if live is None or live.version == self.graph.version:
+            return
+        if not live.valid:
+            self.stop_live()
+            self.reset_colors()
+            self.log_message("Live result stopped: its start node was deleted", self.error_color)
+            return
+        started = time.perf_counter()
+        changed = live.update()
+        self.paint_live(changed)
+        perf.record("live.update", started)
+        updated = "all nodes" if changed is None else f"{len(changed)} nodes"
+        self.log_message(f"Live result updated ({updated}): {self.describe_live()}", self.queue_color,
+                         level=message_log.DETAIL)
+
+    def describe_live(self):
+        live = self.live
+        if isinstance(live, LiveComponents):
+            return f"{len(live)} components"
+        return f"{len(live.distances)} nodes reached from {live.source}"
+
+    def live_node_color(self, node):
+        live = self.live
+        if isinstance(live, LiveComponents):
+            return NODE_SHADES[live.component(node) % len(NODE_SHADES)]
+        if node == live.source:
+            return self.highlight_color
+        distance = live.distances.get(node)
+        if distance is None:
+            return self.node_color
+        return self.dijkstra_color if live.weighted else NODE_SHADES[distance % len(NODE_SHADES)]
+
+    def paint_live(self, changed):
+        # Repaints the nodes (and tree edges) an update changed; changed is
+        # None after a full recomputation
+        live = self.live
+        tree = isinstance(live, LiveTree)
+        edge_color = (self.dijkstra_color if live.weighted else self.bfs_color) if tree else None
+        if changed is None:
+            self.reset_colors()
+            for node in self.graph.nodes():
+                self.highlight_node(node, self.live_node_color(node))
+            if tree:
+                for node, parent in live.previous_nodes.items():
+                    if parent is not None:
+                        self.highlight_edge(parent, node, edge_color)
+            return
+        for node in changed:
+            if node in self.graph:
+                self.highlight_node(node, self.live_node_color(node))
+        if tree:
+            for node, old_parent in changed.items():
+                parent = live.previous_nodes.get(node)
+                if (old_parent is not None and old_parent != parent and self.graph.has_edge(old_parent, node)
+                        and live.previous_nodes.get(old_parent) != node):
+                    self.renderer.set_edge(old_parent, node, self.edge_color, width=self.renderer.edge_width)
+                if parent is not None:
+                    self.highlight_edge(parent, node, edge_color)
+
+    # Multi-source Dijkstra: every node's nearest start node
+    def run_nearest_facility(self):
+        try:
+            sources = [int(text) for text in self.start_node_entry.get().split(",")]
+        except ValueError:
+            self.log_message("Invalid node numbers", self.error_color)
+            return
+        missing = [source for source in sources if source not in self.graph]
+        if missing:
+            self.log_message(f"Start nodes {missing} do not exist.", self.error_color)
+            return
+        self.log_message(f"\nNearest facility among {sources}:", self.facility_color)
+        self.start_trace("Nearest facility", "multi_source_dijkstra", (sources,), self.facility_color,
+                         on_result=self.log_facilities)
+
+    def log_facilities(self, result):
+        served = {}
+        for node, (distance, source) in result.items():
+            count, farthest = served.get(source, (0, (-1, None)))
+            served[source] = (count + 1, max(farthest, (distance, node)))
+        for source, (count, (distance, node)) in sorted(served.items()):
+            self.log_message(f"  {source}: serves {count} nodes, farthest {node} at {distance:g}",
+                             self.facility_color)
+        unreached = len(self.graph) - len(result)
+        if unreached:
+            self.log_message(f"  {unreached} nodes reach no facility", self.error_color)
+
+    # Connected components, spanning trees, topological order and max flow
+    def run_components(self):
+        self.log_message("\nConnected Components:", self.components_color)
+        self.start_trace("Components", "connected_components", (), self.components_color,
+                         on_result=self.log_components)
+
+    def log_components(self, result):
+        sizes = result[1]
+        if sizes:
+            self.log_message(f"{len(sizes)} components, largest has {sizes[0]} nodes; "
+                             f"{sizes.count(1)} isolated nodes", self.components_color,
+                             level=message_log.SUMMARY)
+
+    def run_kruskal(self):
+        self.log_message("\nKruskal Minimum Spanning Forest:", self.mst_color)
+        self.start_trace("Kruskal", "kruskal_mst", (), self.mst_color, on_result=self.log_tree)
+
+    def run_prim(self):
+        try:
+            start_node = int(self.start_node_entry.get())
+        except ValueError:
+            self.log_message("Invalid start node", self.error_color)
+            return
+
+        if start_node not in self.graph:
+            self.log_message("Start node does not exist.", self.error_color)
+            return
 
-        while min_heap:
-            current_dist, current_node = heapq.heappop(min_heap)
+        self.log_message("\nPrim Minimum Spanning Tree:", self.mst_color)
+        self.start_trace("Prim", "prim_mst", (start_node,), self.mst_color, on_result=self.log_tree)
 
-            if current_node in visited:
-                continue
+    def log_tree(self, result):
+        total, tree = result
+        self.log_message(f"Spanning tree weight {total:g} with {len(tree)} edges", self.mst_color,
+                         level=message_log.SUMMARY)
 
-            visited.add(current_node)
-            self.highlight_node(current_node, self.dijkstra_color)
-            self.root.update()
-            self.root.after(300)
-            
-            if current_node == end_node:
-                break
-
-            for neighbor, weight in self.graph[current_node]:
-                if neighbor not in visited:
-                    new_dist = current_dist + weight
-                    if new_dist < distances[neighbor]:
-                        distances[neighbor] = new_dist
-                        previous_nodes[neighbor] = current_node
-                        heapq.heappush(min_heap, (new_dist, neighbor))
-                        self.highlight_edge(current_node, neighbor, self.dijkstra_color)
-                        self.root.update()
-                        self.root.after(200)
-
-        # Reconstruct path
-        path = []
-        current = end_node
-        while current is not None:
-            path.append(current)
-            current = previous_nodes[current]
-        path.reverse()
-
-        if distances[end_node] != float('inf'):
-            self.log_message(f"Shortest path from {start_node} to {end_node}: {path}")
-            self.log_message(f"Total distance: {distances[end_node]}")
-            
-            # Highlight the final path
-            self.highlight_path(path)
+    def run_topological_sort(self):
+        self.log_message("\nTopological Sort:", self.topo_color)
+        self.start_trace("Topological sort", "topological_sort", (), self.topo_color,
+                         on_result=self.log_order)
+
+    def log_order(self, result):
+        order, cycle = result
+        if cycle is None:
+            self.log_message(f"Topological order: {order}", self.topo_color, level=message_log.SUMMARY)
+        else:
+            self.log_message(f"Not a DAG, cycle found: {cycle + cycle[:1]}", self.error_color)
+
+    def run_max_flow(self):
+        endpoints = self.read_endpoints()
+        if endpoints is None:
+            return
+        if endpoints[0] == endpoints[1]:
+            self.log_message("Source and sink must differ", self.error_color)
+            return
+        self.log_message(f"\nMax Flow from {endpoints[0]} to {endpoints[1]}:", self.flow_color)
+        self.start_trace("Max flow", "max_flow", endpoints, self.flow_color, on_result=self.log_flow)
+
+    def log_flow(self, result):
+        flow, source_side, cut = result
+        self.log_message(f"Maximum flow {flow:g}; minimum cut separates {len(source_side)} nodes "
+                         f"by {[(tail, head) for tail, head, _ in cut]}", self.flow_color,
+                         level=message_log.SUMMARY)
+
+    # All-pairs distance matrix
+    def run_all_pairs(self):
+        if self.all_pairs_job is not None:
+            self.log_message("All-pairs job already running", self.error_color)
+            return
+        if not len(self.graph):
+            self.log_message("The graph is empty", self.error_color)
+            return
+        try:
+            job = all_pairs.AllPairsJob(self.runner, self.graph, self.on_all_pairs_done,
+                                        self.on_all_pairs_progress)
+        except ValueError as exc:
+            self.log_message(f"All pairs: {exc}", self.error_color)
+            return
+        if not job.finished:
+            self.all_pairs_job = job
+            self.all_pairs_started = time.perf_counter()
+            self.log_message(f"\nAll pairs ({job.method}) for {len(job.nodes)} nodes...", self.queue_color)
+
+    def on_all_pairs_progress(self, job, fraction):
+        self.update_status(f"All pairs: {fraction:.0%} of rows computed")
+
+    def on_all_pairs_done(self, job):
+        self.all_pairs_job = None
+        if job.error is not None:
+            if job.error != "cancelled":
+                self.log_message(f"All pairs failed: {job.error}", self.error_color)
+            return
+        elapsed = time.perf_counter() - self.all_pairs_started
+        self.distance_matrix = job
+        inf = float('inf')
+        finite = [max((value for value in row if value < inf), default=0.0) for row in job.rows]
+        self.log_message(f"All pairs done in {elapsed:.2f} s; diameter {max(finite, default=0.0):g}",
+                         self.queue_color, level=message_log.SUMMARY)
+        if job.version != self.graph.version:
+            self.log_message("The graph changed meanwhile; the matrix shows the earlier graph",
+                             self.error_color)
+        self.show_matrix()
+
+    def show_matrix(self):
+        if self.distance_matrix is None:
+            self.log_message("Run All Pairs first", self.error_color)
+            return
+        job = self.distance_matrix
+        self.heatmap.show(job.nodes, job.rows, f"Distance matrix ({job.method})")
+
+    def export_matrix(self):
+        if self.distance_matrix is None:
+            return
+        path = filedialog.asksaveasfilename(title="Export Distance Matrix", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            all_pairs.save_matrix(path, self.distance_matrix.nodes, self.distance_matrix.rows)
+        except OSError as exc:
+            self.log_message(f"Export failed: {exc}", self.error_color)
+            return
+        self.log_message(f"Exported the distance matrix to {os.path.basename(path)}", self.queue_color)
+
+    def drop_matrix(self):
+        if self.all_pairs_job is not None:
+            self.all_pairs_job.cancel()
+        self.distance_matrix = None
+        self.heatmap.close()
+
+    # Partitioning and sharded runs
+    def run_partition(self, then=None):
+        # Partitions a snapshot in the background; then() runs once the
+        # shards are ready
+        if self.partition_run is not None:
+            self.log_message("Partitioning already running", self.error_color)
+            return
+        parts = int(self.parts_var.get())
+        if len(self.graph) < parts:
+            self.log_message(f"Partitioning into {parts} parts needs at least {parts} nodes",
+                             self.error_color)
+            return
+        self.drop_shards()
+        snapshot = self.graph.snapshot()
+        self.partition_then = then
+        self.partition_started = time.perf_counter()
+        self.partition_run = self.runner.submit(
+            "partition_graph", snapshot, (parts,), None,
+            lambda run_id, status, payload: self.on_partition_done(snapshot, parts, status, payload))
+        self.log_message(f"\nPartitioning into {parts} parts...", self.queue_color)
+
+    def on_partition_done(self, snapshot, parts, status, payload):
+        self.partition_run = None
+        then, self.partition_then = self.partition_then, None
+        if status != DONE:
+            if status == FAILED:
+                self.log_message(f"Partitioning failed: {payload}", self.error_color)
+            return
+        if snapshot.version != self.graph.version:
+            self.log_message("The graph changed while partitioning; partition again", self.error_color)
+            return
+        labels, cut = payload
+        self.shards = sharded.ShardedGraph(snapshot, labels, parts)
+        share = cut / snapshot.edge_count if snapshot.edge_count else 0.0
+        self.log_message(f"Partitioned in {time.perf_counter() - self.partition_started:.2f} s: "
+                         f"parts of {min(self.shards.sizes)}-{max(self.shards.sizes)} nodes, "
+                         f"{cut} cut edges ({share:.1%})", self.queue_color, level=message_log.SUMMARY)
+        if self.partition_colors_var.get():
+            self.show_partition_colors()
+        if then is not None:
+            then()
+
+    def drop_shards(self):
+        if self.sharded_job is not None:
+            self.sharded_job.cancel()
+        if self.shards is not None:
+            self.shards.release()
+            self.shards = None
+
+    def toggle_partition_colors(self):
+        self.stop_live()
+        if self.partition_colors_var.get():
+            self.show_partition_colors()
         else:
-            self.log_message(f"No path exists from {start_node} to {end_node}", self.error_color)
+            self.reset_colors()
+
+    def show_partition_colors(self):
+        # Fills each node by its part and marks the cut edges
+        if self.shards is None:
+            self.log_message("Partition the graph first", self.error_color)
+            self.partition_colors_var.set(False)
+            return
+        self.reset_colors()
+        labels = self.shards.labels
+        for node in self.graph.nodes():
+            if node < len(labels) and labels[node] >= 0:
+                self.highlight_node(node, NODE_SHADES[labels[node] % len(NODE_SHADES)])
+        for tail, head, _ in self.graph.edges():
+            if tail < len(labels) and head < len(labels) and labels[tail] != labels[head]:
+                self.highlight_edge(tail, head, self.error_color)
+
+    def run_sharded(self, kind):
+        if self.sharded_job is not None:
+            self.log_message("A sharded run is already in progress", self.error_color)
+            return
+        sources = []
+        if kind != sharded.COMPONENTS:
+            try:
+                sources = [int(text) for text in self.start_node_entry.get().split(",")]
+            except ValueError:
+                self.log_message("Invalid node numbers", self.error_color)
+                return
+            missing = [source for source in sources if source not in self.graph]
+            if missing:
+                self.log_message(f"Start nodes {missing} do not exist.", self.error_color)
+                return
+        if self.shards is None or self.shards.version != self.graph.version:
+            self.run_partition(then=lambda: self.run_sharded(kind))
+            return
+        self.sharded_started = time.perf_counter()
+        self.log_message(f"\nSharded {kind} on {self.shards.parts} shards:", self.queue_color)
+        job = sharded.ShardedJob(self.runner, self.shards, kind, sources,
+                                 self.on_sharded_done, self.on_sharded_progress)
+        if not job.finished:
+            self.sharded_job = job
+
+    def on_sharded_progress(self, job):
+        self.update_status(f"Sharded {job.kind}: round {job.rounds}, {job.offers} boundary offers")
+
+    def on_sharded_done(self, job):
+        self.sharded_job = None
+        if job.error is not None:
+            if job.error != "cancelled":
+                self.log_message(f"Sharded {job.kind} failed: {job.error}", self.error_color)
+            return
+        perf.record("run.sharded " + job.kind, self.sharded_started)
+        self.log_message(f"Done in {time.perf_counter() - self.sharded_started:.2f} s, {job.rounds} rounds, "
+                         f"{job.offers} boundary offers", self.queue_color, level=message_log.SUMMARY)
+        if job.kind == sharded.COMPONENTS:
+            self.log_components(job.result)
+        elif job.kind == sharded.NEAREST:
+            self.log_facilities(job.result)
+        else:
+            hops = job.result[0]
+            reached = sum(1 for hop in hops if hop >= 0)
+            self.log_message(f"Reached {reached} nodes in {max(hops) + 1} levels", self.bfs_color,
+                             level=message_log.SUMMARY)
+
+    # Instrumentation
+    def toggle_perf_overlay(self):
+        if self.perf_overlay_var.get():
+            perf.enable()
+            self.perf_overlay.show()
+            self.log_message("Perf overlay on; hot paths are being timed", self.queue_color)
+        else:
+            self.perf_overlay.hide()
+            perf.disable()
+
+    def export_perf_trace(self):
+        if not perf.histograms and not perf.counters:
+            self.log_message("Nothing recorded; turn on the perf overlay first", self.error_color)
+            return
+        path = filedialog.asksaveasfilename(title="Export Performance Trace", defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            count = perf.save_chrome_trace(path)
+        except OSError as exc:
+            self.log_message(f"Export failed: {exc}", self.error_color)
+            return
+        self.log_message(f"Exported {count} trace events to {os.path.basename(path)} "
+                         f"(open in chrome://tracing or Perfetto)", self.queue_color)
+
+    # Background runs and trace playback
+    def start_trace(self, label, name, args, color, on_result=None):
+        # Starts algorithms.<name>(graph, *args) on a snapshot and plays its
+        # events as they stream in; on_result gets the algorithm's return
+        # value.  Returns the snapshot for further runs.
+        self.cancel_runs(quiet=True)
+        self.stop_live()
+        self.reset_colors()
+        self.trace_color = color
+        self.trace_label = label
+        self.trace_on_result = on_result
+        self.trace_started = time.perf_counter()
+        self.playback.load([], complete=False)
+        self.seek_scale.config(to=1)
+        snapshot = self.graph.snapshot()
+        self.trace_run = self.runner.submit(name, snapshot, args, self.on_trace_events, self.on_trace_done)
+        self.update_status(f"{label}: computing...")
+        self.playback.play()
+        return snapshot
+
+    def cancel_runs(self, quiet=False):
+        # Stops the traced run and pending trees; a landmark build, a
+        # partitioning or an all-pairs or sharded job is only stopped by the
+        # Cancel button
+        runs = list(self.extra_runs)
+        if self.trace_run is not None:
+            runs.append(self.trace_run)
+        jobs = []
+        if not quiet:
+            runs.extend(run for run in (self.landmark_run, self.partition_run) if run is not None)
+            jobs = [job for job in (self.all_pairs_job, self.sharded_job) if job is not None]
+        if not runs and not jobs:
+            if not quiet:
+                self.log_message("No algorithm is running", self.error_color)
+            return
+        for run_id in runs:
+            self.runner.cancel(run_id)
+        for job in jobs:
+            job.cancel()
+        if not quiet:
+            self.log_message("Algorithm run cancelled", self.error_color)
+
+    def on_trace_events(self, run_id, events, progress):
+        perf.count("steps." + self.trace_label, len(events))
+        self.playback.extend(events)
+        self.seek_scale.config(to=max(1, len(self.playback.events)))
+        self.update_status(f"{self.trace_label}: {progress:.0%} computed, "
+                           f"{len(self.playback.events)} steps")
+
+    def on_trace_done(self, run_id, status, error):
+        # error is the return value for DONE
+        self.trace_run = None
+        perf.record("run." + self.trace_label, self.trace_started)
+        if status == FAILED:
+            self.log_message(f"{self.trace_label} failed: {error}", self.error_color)
+            self.playback.pause()
+            self.update_status(f"{self.trace_label} failed")
+            return
+        if status == CANCELLED:
+            self.playback.pause()
+            self.update_status(f"{self.trace_label} cancelled")
+            return
+        self.playback.extend([], complete=True)
+        settled = sum(1 for event in self.playback.events if event[0] == algorithms.SETTLE)
+        if settled:
+            # Makes the work of the different searches comparable
+            self.log_message(f"{self.trace_label} settled {settled} of {len(self.graph)} nodes",
+                             self.trace_color, level=message_log.SUMMARY)
+        if status == DONE and self.trace_on_result is not None:
+            self.trace_on_result(error)
+
+    # Shortest path trees for the path cache
+    def request_tree(self, snapshot, start_node, end_node):
+        # Computes the full tree from start_node in the background; the path
+        # to end_node is logged when it arrives (None: only cache it)
+        run_id = self.runner.submit("shortest_path_tree", snapshot, (start_node,),
+                                    None, self.on_tree_done)
+        self.extra_runs[run_id] = (snapshot.version, start_node, end_node)
+
+    def on_tree_done(self, run_id, status, payload):
+        version, start_node, end_node = self.extra_runs.pop(run_id)
+        if status == FAILED:
+            self.log_message(f"Dijkstra from {start_node} failed: {payload}", self.error_color)
+            return
+        if status != DONE:
+            return
+        self.path_cache.store(start_node, version, *payload)
+        if end_node is not None:
+            # current() replays any edits made while the tree was computed
+            tree = self.path_cache.current(start_node)
+            if tree is None:
+                self.log_message(f"Graph changed while searching from {start_node}; run again",
+                                 self.error_color)
+            else:
+                self.log_path(tree, end_node)
+
+    def log_path(self, tree, end_node):
+        path, distance = tree.path_to(end_node)
+        if path:
+            self.log_message(f"Shortest path from {tree.source} to {end_node}: {path} "
+                             f"(distance {distance:g})", self.dijkstra_color, level=message_log.SUMMARY)
+        else:
+            self.log_message(f"No path exists from {tree.source} to {end_node}", self.error_color)
+
+    def show_cached_path(self, tree, end_node):
+        # A cache hit skips the search animation and shows the result
+        path, distance = tree.path_to(end_node)
+        self.cancel_runs(quiet=True)
+        self.reset_colors()
+        self.playback.load([(algorithms.PATH, tree.source, end_node, path, distance)])
+        self.seek_scale.config(to=1)
+        self.playback.play()
+
+    def apply_trace_event(self, event, quiet):
+        kind = event[0]
+        if kind == algorithms.VISIT:
+            if not quiet:
+                self.log_message(f"Visited {event[1]}", level=message_log.DETAIL)
+            self.highlight_node(event[1], self.trace_color)
+        elif kind == algorithms.SETTLE:
+            self.highlight_node(event[1], self.trace_color)
+        elif kind in (algorithms.TRAVERSE, algorithms.RELAX):
+            self.highlight_edge(event[1], event[2], self.trace_color)
+        elif kind == algorithms.CUT:
+            self.highlight_edge(event[1], event[2], self.error_color)
+        elif kind == algorithms.PATH:
+            start_node, end_node, path, distance = event[1:]
+            if path:
+                self.log_message(f"Shortest path from {start_node} to {end_node}: {path}",
+                                 level=message_log.SUMMARY)
+                self.log_message(f"Total distance: {distance:g}", level=message_log.SUMMARY)
+
+                # Highlight the final path
+                self.highlight_path(path)
+            else:
+                self.log_message(f"No path exists from {start_node} to {end_node}", self.error_color)
+
+    def toggle_playback(self):
+        if self.playback.finished:
+            self.restart_playback()
+        else:
+            self.playback.toggle()
+
+    def step_playback(self):
+        self.playback.step()
+
+    def restart_playback(self):
+        self.playback.seek(0)
+        self.playback.play()
+
+    def seek_playback(self, value):
+        index = int(float(value))
+        if index != self.playback.index:
+            self.playback.seek(index)
+
+    def change_speed(self, event=None):
+        self.playback.set_speed(SPEEDS[self.speed_var.get()])
+
+    def on_playback_progress(self, index, total):
+        self.seek_var.set(index)
+
+    def on_playback_finished(self):
+        self.update_status(f"Playback finished ({len(self.playback.events)} steps)")
 
     def highlight_node(self, node, color):
-        self.canvas.itemconfig(f"node{node}", fill=color)
+        self.renderer.set_node(node, color)
 
     def highlight_edge(self, node1, node2, color):
-        edge_key = tuple(sorted((node1, node2)))
-        if edge_key in self.edge_lines:
-            self.canvas.itemconfig(self.edge_lines[edge_key], fill=color, width=4)
+        if self.graph.has_edge(node1, node2):
+            self.renderer.set_edge(node1, node2, color, width=4)
 
     def highlight_path(self, path):
         # Reset all colors first
@@ -604,15 +1860,14 @@ class GraphVisualizer:
             self.highlight_edge(path[i], path[i+1], self.path_color)
 
     def reset_colors(self):
-        for node in self.nodes:
-            self.canvas.itemconfig(f"node{node}", fill=self.node_color)
-            
-        for edge in self.edge_lines.values():
-            self.canvas.itemconfig(edge, fill=self.edge_color, width=2)
+        self.renderer.reset()
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["--benchmark"]:
+        # Headless benchmark suite instead of the window
+        from benchmarks.suite import main
+        sys.exit(main(sys.argv[2:]))
     root = tk.Tk()
     app = GraphVisualizer(root)
     root.mainloop()
-
@@ -0,0 +1,1187 @@
+import array
+import heapq
+import math
+import weakref
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # bfs_levels and floyd_warshall need it; callers check HAVE_NUMPY
+    np = None
+
+import search_state
+from graph_core import ADD_EDGE, SET_WEIGHT, edge_key
+from search_state import QUEUED, SETTLED
+from union_find import UnionFind
+
+# Graph algorithms as generators of trace events.
+#
+# Each algorithm runs at full speed against a graph_core.Graph and yields plain
+# tuples whose first element is the event kind.  The GUI replays them through
+# playback.Playback; batch jobs can consume them directly or use the helpers at
+# the bottom of this module.
+#
+#   (VISIT, node)               node reached by a traversal
+#   (TRAVERSE, node, neighbor)  tree edge followed by a traversal
+#   (SETTLE, node)              node settled by a shortest path search
+#   (RELAX, node, neighbor, d)  edge relaxation that improved neighbor to d
+#   (PATH, start, end, path, d) final path; path is [] and d is inf if none
+#   (CUT, tail, head)           edge in a minimum cut
+#
+# Generators that compute more than a trace (components, spanning trees,
+# flows...) return their result as the generator's return value.
+
+VISIT = "visit"
+TRAVERSE = "traverse"
+SETTLE = "settle"
+RELAX = "relax"
+PATH = "path"
+CUT = "cut"
+
+HAVE_NUMPY = np is not None
+
+
+# BFS
+def bfs(graph, start_node):
+    offsets, targets, _ = graph.csr()
+    visited = bytearray(graph.node_count)
+    queue = deque()
+
+    visited[start_node] = 1
+    queue.append(start_node)
+
+    while queue:
+        current = queue.popleft()
+        yield (VISIT, current)
+
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                queue.append(neighbor)
+                yield (TRAVERSE, current, neighbor)
+
+
+# Level-synchronous BFS
+#
+# Expands a whole frontier per step with NumPy over the CSR arrays and
+# switches direction per level (Beamer et al.): top-down scans the frontier's
+# edges; bottom-up scans the edges of the unvisited nodes and looks for a
+# parent in the frontier, which is cheaper once the frontier holds most of
+# the remaining edges.
+BOTTOM_UP_ALPHA = 14  # go bottom-up when frontier edges > unvisited edges / alpha
+TOP_DOWN_BETA = 24  # back to top-down when frontier nodes < nodes / beta
+SMALL_FRONTIER = 256  # smaller frontiers are expanded in plain Python
+
+
+def _edge_slots(offsets, nodes):
+    # CSR slot indices of all edges of nodes, grouped by node, and the degrees
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64), counts
+    shifts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return shifts + np.arange(total, dtype=np.int64), counts
+
+
+def bfs_levels(graph, start_node):
+    # Hop distance and BFS parent of every node id as int32 arrays; -1 marks
+    # unreached nodes and the start node's parent.  Needs NumPy.
+    offsets_list, targets_list, _ = graph.csr()
+    offsets = np.frombuffer(offsets_list, dtype=np.int64)
+    targets = np.frombuffer(targets_list, dtype=np.int32)
+    node_count = graph.node_count
+    hops = np.full(node_count, -1, dtype=np.int32)
+    parents = np.full(node_count, -1, dtype=np.int32)
+    degrees = np.diff(offsets)
+    hops[start_node] = 0
+    unvisited_edges = int(degrees.sum()) - int(degrees[start_node])
+    bottom_up = False
+    level = 0
+
+    # Small frontiers are expanded in plain Python on memoryviews: per level
+    # NumPy call overhead would dominate on long thin graphs (a chain has one
+    # node per level)
+    hops_view, parents_view = memoryview(hops), memoryview(parents)
+    small_frontier = [start_node]
+    frontier = None
+
+    while True:
+        if frontier is None:
+            if not small_frontier:
+                break
+            if len(small_frontier) > SMALL_FRONTIER:
+                frontier = np.array(small_frontier, dtype=np.int64)
+                continue
+            level += 1
+            found_list = []
+            for node in small_frontier:
+                for i in range(offsets_list[node], offsets_list[node + 1]):
+                    neighbor = targets_list[i]
+                    if hops_view[neighbor] == -1:
+                        hops_view[neighbor] = level
+                        parents_view[neighbor] = node
+                        unvisited_edges -= offsets_list[neighbor + 1] - offsets_list[neighbor]
+                        found_list.append(neighbor)
+            small_frontier = found_list
+            continue
+
+        level += 1
+        frontier_edges = int(degrees[frontier].sum())
+        if not bottom_up and frontier_edges > unvisited_edges / BOTTOM_UP_ALPHA:
+            bottom_up = True
+        elif bottom_up and frontier.size < node_count / TOP_DOWN_BETA:
+            bottom_up = False
+
+        if bottom_up:
+            unvisited = np.flatnonzero((hops == -1) & (degrees > 0))
+            slots, counts = _edge_slots(offsets, unvisited)
+            in_frontier = np.zeros(node_count, dtype=bool)
+            in_frontier[frontier] = True
+            neighbors = targets[slots]
+            hit = in_frontier[neighbors]
+            owners = np.repeat(unvisited, counts)[hit]
+            found, first = np.unique(owners, return_index=True)
+            found_parents = neighbors[hit][first]
+        else:
+            slots, counts = _edge_slots(offsets, frontier)
+            neighbors = targets[slots]
+            fresh = hops[neighbors] == -1
+            sources = np.repeat(frontier, counts)[fresh]
+            found, first = np.unique(neighbors[fresh], return_index=True)
+            found_parents = sources[first]
+
+        hops[found] = level
+        parents[found] = found_parents
+        unvisited_edges -= int(degrees[found].sum())
+        if found.size <= SMALL_FRONTIER:
+            frontier = None
+            small_frontier = found.tolist()
+            bottom_up = False
+        else:
+            frontier = found.astype(np.int64)
+    return hops, parents
+
+
+def _bfs_levels_python(graph, start_node):
+    # Same result as bfs_levels() without NumPy
+    hops = array.array('i', [-1]) * graph.node_count
+    parents = array.array('i', [-1]) * graph.node_count
+    hops[start_node] = 0
+    for event in bfs(graph, start_node):
+        if event[0] == TRAVERSE:
+            parents[event[2]] = event[1]
+            hops[event[2]] = hops[event[1]] + 1
+    return hops, parents
+
+
+def level_bfs(graph, start_node):
+    # BFS for huge graphs: computes all levels first (bfs_levels), then
+    # replays them as the usual VISIT/TRAVERSE trace, level by level with
+    # each node's children after it.  Returns (hops, parents).
+    if np is None:
+        hops, parents = _bfs_levels_python(graph, start_node)
+        yield from bfs(graph, start_node)
+        return hops, parents
+    hops, parents = bfs_levels(graph, start_node)
+    reached = np.flatnonzero(hops >= 0)
+    reached = reached[np.argsort(hops[reached], kind='stable')]
+    level_ends = np.searchsorted(hops[reached], np.arange(1, int(hops.max()) + 2))
+    position = np.zeros(graph.node_count, dtype=np.int64)  # index within its level
+    level = reached[:1]
+    begin = 1
+    for end in level_ends[1:]:
+        children = reached[begin:end]
+        begin = end
+        # Children grouped in the order their parents were visited
+        children = children[np.argsort(position[parents[children]], kind='stable')]
+        position[children] = np.arange(children.size)
+        bounds = np.searchsorted(position[parents[children]], np.arange(level.size + 1))
+        children_list = children.tolist()
+        for i, node in enumerate(level.tolist()):
+            yield (VISIT, node)
+            for child in children_list[bounds[i]:bounds[i + 1]]:
+                yield (TRAVERSE, node, child)
+        level = children
+    for node in level.tolist():
+        yield (VISIT, node)
+    return hops, parents
+
+
+# DFS
+def dfs(graph, start_node):
+    # Explicit-stack DFS producing the same order as the recursive version:
+    # stack holds the path from the start node and positions the index of the
+    # next neighbor to try for each node on it
+    offsets, targets, _ = graph.csr()
+    visited = bytearray(graph.node_count)
+
+    visited[start_node] = 1
+    yield (VISIT, start_node)
+    stack = [start_node]
+    positions = [offsets[start_node]]
+
+    while stack:
+        node = stack[-1]
+        i = positions[-1]
+        end = offsets[node + 1]
+        while i < end and visited[targets[i]]:
+            i += 1
+        if i == end:
+            stack.pop()
+            positions.pop()
+            continue
+        positions[-1] = i + 1
+
+        neighbor = targets[i]
+        visited[neighbor] = 1
+        yield (TRAVERSE, node, neighbor)
+        yield (VISIT, neighbor)
+        stack.append(neighbor)
+        positions.append(offsets[neighbor])
+
+
+# Dijkstra
+def dijkstra(graph, start_node, end_node):
+    # Labels live in reusable dense arrays (see search_state), so setup is O(1)
+    # and the work is proportional to the nodes reached.  Superseded queue
+    # entries are recognised against the dense distance label and skipped;
+    # heapq's C implementation beats a pure Python decrease-key heap
+    # (search_state.IndexedHeap) here, see benchmarks/dijkstra.py.
+    offsets, targets, weights = graph.csr()
+    state = search_state.acquire(graph)
+    try:
+        distances, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        distances[start_node] = 0
+        previous[start_node] = -1
+        min_heap = [(0, start_node)]
+
+        while min_heap:
+            current_dist, current_node = heappop(min_heap)
+            if states[current_node] == SETTLED or current_dist > distances[current_node]:
+                continue
+            states[current_node] = SETTLED
+            yield (SETTLE, current_node)
+
+            if current_node == end_node:
+                break
+
+            for i in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[i]
+                new_dist = current_dist + weights[i]
+                if stamps[neighbor] != generation:
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                elif states[neighbor] == SETTLED or new_dist >= distances[neighbor]:
+                    continue
+                distances[neighbor] = new_dist
+                previous[neighbor] = current_node
+                heappush(min_heap, (new_dist, neighbor))
+                yield (RELAX, current_node, neighbor, new_dist)
+
+        if stamps[end_node] == generation and states[end_node] == SETTLED:
+            distance = distances[end_node]
+            path = _dense_path(previous, end_node)
+        else:
+            distance = float('inf')
+            path = []
+    finally:
+        search_state.release(state)
+    yield (PATH, start_node, end_node, path, distance)
+
+
+def _dense_path(previous, end_node):
+    path = []
+    node = end_node
+    while node != -1:
+        path.append(node)
+        node = previous[node]
+    path.reverse()
+    return path
+
+
+# A*
+_scales = weakref.WeakKeyDictionary()  # graph -> (version, position_version, raw scale)
+
+
+def heuristic_scale(graph):
+    # Largest factor c with c * (straight-line edge length) <= weight for every
+    # edge.  c times the Euclidean distance to the target is then a consistent
+    # A* heuristic however the weights relate to the drawing; c is 0 (plain
+    # Dijkstra) when some edge is cheaper than any positive length allows.
+    #
+    # The factor is cached per graph.  Edits since the cached version are
+    # folded in from the change log: added edges and new weights can only
+    # lower it, and removed edges or raised weights leave a factor that is
+    # still safe, if a little low.  Moved nodes mean a fresh scan.
+    cached = _scales.get(graph)
+    changes = None
+    if cached is not None and cached[1] == graph.position_version:
+        changes = graph.changes_since(cached[0])
+    if changes is None:
+        scale = _scan_scale(graph)
+    else:
+        scale = cached[2]
+        xs, ys = graph.coordinate_arrays()
+        for change in changes:
+            if change[1] == ADD_EDGE:
+                node1, node2, weight = change[2], change[3], change[4]
+            elif change[1] == SET_WEIGHT:
+                node1, node2, weight = change[2], change[3], change[5]
+            else:
+                continue
+            length = math.hypot(xs[node2] - xs[node1], ys[node2] - ys[node1])
+            if length > 0 and weight < scale * length:
+                scale = weight / length
+    _scales[graph] = (graph.version, graph.position_version, scale)
+    if scale == float('inf'):
+        return 0.0
+    return max(0.0, scale) * (1 - 1e-9)  # keep rounding on the safe side
+
+
+def _scan_scale(graph):
+    # Smallest weight / length ratio over all edges, inf when there is none
+    offsets, targets, weights = graph.csr()
+    xs, ys = graph.coordinate_arrays()
+    if np is not None:
+        offsets = np.frombuffer(offsets, dtype=np.int64)
+        heads = np.frombuffer(targets, dtype=np.int32)
+        tails = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        keep = tails < heads
+        tails, heads = tails[keep], heads[keep]
+        x = np.frombuffer(xs, dtype=np.float64)
+        y = np.frombuffer(ys, dtype=np.float64)
+        lengths = np.hypot(x[heads] - x[tails], y[heads] - y[tails])
+        positive = lengths > 0
+        if not positive.any():
+            return float('inf')
+        ratios = np.frombuffer(weights, dtype=np.float64)[keep][positive] / lengths[positive]
+        return float(ratios.min())
+    scale = float('inf')
+    for node in graph.nodes():
+        x, y = xs[node], ys[node]
+        for i in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[i]
+            if neighbor < node:
+                continue
+            length = math.hypot(xs[neighbor] - x, ys[neighbor] - y)
+            if length > 0 and weights[i] < scale * length:
+                scale = weights[i] / length
+    return scale
+
+
+def astar(graph, start_node, end_node, scale=None):
+    # scale is heuristic_scale(graph) when the caller already knows it; the
+    # GUI keeps it on the live graph and passes it along with the snapshot.
+    # Labels live in the dense search_state arrays, as in dijkstra().
+    offsets, targets, weights = graph.csr()
+    xs, ys = graph.coordinate_arrays()
+    if scale is None:
+        scale = heuristic_scale(graph)
+    end_x, end_y = xs[end_node], ys[end_node]
+    state = search_state.acquire(graph)
+    try:
+        distances, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heappush, heappop, hypot = heapq.heappush, heapq.heappop, math.hypot
+
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        distances[start_node] = 0
+        previous[start_node] = -1
+        # (estimate, -distance, node): ties go to the node furthest along
+        min_heap = [(scale * hypot(xs[start_node] - end_x, ys[start_node] - end_y), 0, start_node)]
+
+        while min_heap:
+            _, negative_dist, current_node = heappop(min_heap)
+            current_dist = -negative_dist
+            if states[current_node] == SETTLED or current_dist > distances[current_node]:
+                continue
+            states[current_node] = SETTLED
+            yield (SETTLE, current_node)
+
+            if current_node == end_node:
+                break
+
+            for i in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[i]
+                new_dist = current_dist + weights[i]
+                if stamps[neighbor] != generation:
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                elif states[neighbor] == SETTLED or new_dist >= distances[neighbor]:
+                    continue
+                distances[neighbor] = new_dist
+                previous[neighbor] = current_node
+                estimate = new_dist + scale * hypot(xs[neighbor] - end_x, ys[neighbor] - end_y)
+                heappush(min_heap, (estimate, -new_dist, neighbor))
+                yield (RELAX, current_node, neighbor, new_dist)
+
+        if stamps[end_node] == generation and states[end_node] == SETTLED:
+            distance = distances[end_node]
+            path = _dense_path(previous, end_node)
+        else:
+            distance = float('inf')
+            path = []
+    finally:
+        search_state.release(state)
+    yield (PATH, start_node, end_node, path, distance)
+
+
+# Bidirectional Dijkstra
+def bidirectional_dijkstra(graph, start_node, end_node):
+    # Searches from both ends, always advancing the side with the smaller
+    # frontier distance, and stops once the two frontiers together cannot
+    # beat the best connection found so far
+    offsets, targets, weights = graph.csr()
+    inf = float('inf')
+    distances = ({start_node: 0}, {end_node: 0})
+    previous_nodes = ({start_node: None}, {end_node: None})
+    settled = (set(), set())
+    heaps = ([(0, start_node)], [(0, end_node)])
+    best = 0 if start_node == end_node else inf
+    meeting = None  # (node on the start side, node on the end side)
+
+    while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        current_dist, current_node = heapq.heappop(heaps[side])
+        if current_node in settled[side]:
+            continue
+        settled[side].add(current_node)
+        yield (SETTLE, current_node)
+
+        own, other = distances[side], distances[1 - side]
+        for i in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[i]
+            new_dist = current_dist + weights[i]
+            if new_dist < own.get(neighbor, inf):
+                own[neighbor] = new_dist
+                previous_nodes[side][neighbor] = current_node
+                heapq.heappush(heaps[side], (new_dist, neighbor))
+                yield (RELAX, current_node, neighbor, new_dist)
+            if neighbor in other and new_dist + other[neighbor] < best:
+                best = new_dist + other[neighbor]
+                meeting = (current_node, neighbor) if side == 0 else (neighbor, current_node)
+
+    if start_node == end_node:
+        path = [start_node]
+    elif meeting is None:
+        path = []
+    else:
+        forward, backward = meeting
+        path = reconstruct_path(previous_nodes[0], forward, distances[0][forward])
+        node = backward
+        while node is not None:
+            path.append(node)
+            node = previous_nodes[1][node]
+    yield (PATH, start_node, end_node, path, best)
+
+
+# ALT: A* with landmark lower bounds
+def distance_table(graph, source):
+    # Distances from source to every node id (inf when unreachable or dead)
+    offsets, targets, weights = graph.csr()
+    inf = float('inf')
+    table = array.array('d', [inf]) * graph.node_count
+    table[source] = 0.0
+    settled = bytearray(graph.node_count)
+    min_heap = [(0.0, source)]
+    while min_heap:
+        current_dist, current_node = heapq.heappop(min_heap)
+        if settled[current_node]:
+            continue
+        settled[current_node] = 1
+        for i in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[i]
+            new_dist = current_dist + weights[i]
+            if new_dist < table[neighbor]:
+                table[neighbor] = new_dist
+                heapq.heappush(min_heap, (new_dist, neighbor))
+    return table
+
+
+def landmark_tables(graph, count):
+    # Picks up to count landmarks by farthest-first selection and returns
+    # (landmarks, distance tables).  Each new landmark is the node furthest
+    # from the ones chosen so far; nodes no landmark reaches (another
+    # component) are taken first so every component gets one.
+    nodes = list(graph.nodes())
+    if not nodes:
+        return [], []
+    inf = float('inf')
+    # Seed with the node furthest from an arbitrary one, which sits on the
+    # periphery of its component
+    seed_table = distance_table(graph, nodes[0])
+    first = max(nodes, key=lambda node: seed_table[node] if seed_table[node] < inf else -1.0)
+    landmarks = [first]
+    tables = [distance_table(graph, first)]
+    closest = array.array('d', tables[0])
+    while len(landmarks) < count:
+        best, best_dist = None, 0.0
+        for node in nodes:
+            dist = closest[node]
+            if dist > best_dist:
+                best, best_dist = node, dist
+                if dist == inf:
+                    break
+        if best is None:
+            break  # every node is a landmark or at distance 0 from one
+        table = distance_table(graph, best)
+        landmarks.append(best)
+        tables.append(table)
+        for node in nodes:
+            if table[node] < closest[node]:
+                closest[node] = table[node]
+    return landmarks, tables
+
+
+def landmark_bounds(tables, end_node):
+    # Returns bound(node), the triangle inequality lower bound on the
+    # distance from node to end_node: max over landmarks of
+    # |d(L, end) - d(L, node)|, inf when a landmark reaches exactly one of the
+    # two.  Nodes added after the tables were built get 0.
+    inf = float('inf')
+    limit = min((len(table) for table in tables), default=0)
+    if end_node >= limit:
+        return lambda node: 0.0
+    reaching_end = [(table, table[end_node]) for table in tables if table[end_node] < inf]
+    missing_end = [table for table in tables if table[end_node] == inf]
+
+    def bound(node):
+        if node >= limit:
+            return 0.0
+        for table in missing_end:
+            if table[node] < inf:
+                return inf
+        best = 0.0
+        for table, to_end in reaching_end:
+            difference = to_end - table[node]  # -inf if node is unreachable
+            if difference < 0:
+                difference = -difference
+            if difference > best:
+                best = difference
+        return best
+
+    return bound
+
+
+def alt(graph, start_node, end_node, tables):
+    # A* ordered by the landmark bound.  The bound is consistent, so every
+    # node is settled once; nodes with an infinite bound cannot reach
+    # end_node and are never queued.
+    offsets, targets, weights = graph.csr()
+    inf = float('inf')
+    bound = landmark_bounds(tables, end_node)
+    bounds = {}  # node -> bound, for nodes queued in this search
+
+    state = search_state.acquire(graph)
+    try:
+        distances, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heappush, heappop = heapq.heappush, heapq.heappop
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        distances[start_node] = 0
+        previous[start_node] = -1
+        # (estimate, -distance, node): ties go to the node furthest along
+        bounds[start_node] = bound(start_node)
+        min_heap = [(bounds[start_node], 0, start_node)] if bounds[start_node] < inf else []
+
+        while min_heap:
+            _, negative_dist, current_node = heappop(min_heap)
+            current_dist = -negative_dist
+            if states[current_node] == SETTLED or current_dist > distances[current_node]:
+                continue
+            states[current_node] = SETTLED
+            yield (SETTLE, current_node)
+
+            if current_node == end_node:
+                break
+
+            for i in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[i]
+                new_dist = current_dist + weights[i]
+                if stamps[neighbor] != generation:
+                    remaining = bound(neighbor)
+                    if remaining == inf:
+                        continue
+                    bounds[neighbor] = remaining
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                elif states[neighbor] == SETTLED or new_dist >= distances[neighbor]:
+                    continue
+                else:
+                    remaining = bounds[neighbor]
+                distances[neighbor] = new_dist
+                previous[neighbor] = current_node
+                heappush(min_heap, (new_dist + remaining, -new_dist, neighbor))
+                yield (RELAX, current_node, neighbor, new_dist)
+
+        if stamps[end_node] == generation and states[end_node] == SETTLED:
+            distance = distances[end_node]
+            path = _dense_path(previous, end_node)
+        else:
+            distance = inf
+            path = []
+    finally:
+        search_state.release(state)
+    yield (PATH, start_node, end_node, path, distance)
+
+
+# Multi-source and all-pairs shortest paths
+def multi_source_dijkstra(graph, sources):
+    # One search seeded with every source at distance 0: each node ends up
+    # with its distance to the nearest source and which source that is.
+    # Returns {node: (distance, nearest source)} over the reached nodes.
+    offsets, targets, weights = graph.csr()
+    inf = float('inf')
+    distances = {}
+    nearest = {}
+    settled = bytearray(graph.node_count)
+    min_heap = []
+    for source in sources:
+        if source not in distances:
+            distances[source] = 0
+            nearest[source] = source
+            min_heap.append((0, source))
+    heapq.heapify(min_heap)
+
+    while min_heap:
+        current_dist, current_node = heapq.heappop(min_heap)
+        if settled[current_node]:
+            continue
+        settled[current_node] = 1
+        yield (SETTLE, current_node)
+
+        owner = nearest[current_node]
+        for i in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[i]
+            new_dist = current_dist + weights[i]
+            if not settled[neighbor] and new_dist < distances.get(neighbor, inf):
+                distances[neighbor] = new_dist
+                nearest[neighbor] = owner
+                heapq.heappush(min_heap, (new_dist, neighbor))
+                yield (RELAX, current_node, neighbor, new_dist)
+
+    return {node: (distances[node], nearest[node]) for node in distances}
+
+
+def distance_rows(graph, sources):
+    # Distance rows for all-pairs jobs: for each source, its distance to
+    # every live node in graph.nodes() order (inf when unreachable)
+    nodes = list(graph.nodes())
+    dense = len(nodes) == graph.node_count
+    rows = []
+    for source in sources:
+        table = distance_table(graph, source)
+        rows.append(table if dense else array.array('d', (table[node] for node in nodes)))
+    return rows
+
+
+def floyd_warshall(graph):
+    # All-pairs distances of the live nodes (graph.nodes() order) as an n x n
+    # NumPy array, relaxing one whole row/column pair per pivot.  O(n^3) work
+    # but vectorised, which beats repeated Dijkstra on small dense graphs.
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    matrix = np.full((len(nodes), len(nodes)), np.inf)
+    np.fill_diagonal(matrix, 0.0)
+    for tail, head, weight in graph.edges():
+        i, j = index[tail], index[head]
+        if weight < matrix[i, j]:
+            matrix[i, j] = matrix[j, i] = weight
+    for pivot in range(len(nodes)):
+        np.minimum(matrix, matrix[:, pivot, None] + matrix[None, pivot, :], out=matrix)
+    return matrix
+
+
+def shortest_path_tree(graph, start_node):
+    # Full single-source search without a trace.  Returns (distances,
+    # previous_nodes) dicts over the reachable nodes; previous_nodes[start_node]
+    # is None.
+    offsets, targets, weights = graph.csr()
+    state = search_state.acquire(graph)
+    try:
+        distances, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heappush, heappop = heapq.heappush, heapq.heappop
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        distances[start_node] = 0
+        previous[start_node] = -1
+        reached = [start_node]
+        min_heap = [(0, start_node)]
+
+        while min_heap:
+            current_dist, current_node = heappop(min_heap)
+            if states[current_node] == SETTLED or current_dist > distances[current_node]:
+                continue
+            states[current_node] = SETTLED
+            for i in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[i]
+                new_dist = current_dist + weights[i]
+                if stamps[neighbor] != generation:
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                    reached.append(neighbor)
+                elif states[neighbor] == SETTLED or new_dist >= distances[neighbor]:
+                    continue
+                distances[neighbor] = new_dist
+                previous[neighbor] = current_node
+                heappush(min_heap, (new_dist, neighbor))
+
+        tree_distances = {node: distances[node] for node in reached}
+        tree_previous = {node: previous[node] for node in reached}
+        tree_previous[start_node] = None
+        return tree_distances, tree_previous
+    finally:
+        search_state.release(state)
+
+
+def reconstruct_path(previous_nodes, end_node, distance):
+    if distance == float('inf'):
+        return []
+    path = []
+    current = end_node
+    while current is not None:
+        path.append(current)
+        current = previous_nodes[current]
+    path.reverse()
+    return path
+
+
+# Connected components
+def connected_components(graph):
+    # Union-find over the edges; each edge that merges two components is
+    # traced, so the trace draws a spanning forest.  Returns (labels, sizes):
+    # labels[node] is the component index (-1 for dead ids) and sizes the
+    # component sizes, largest first.
+    sets = UnionFind(graph.node_count)
+    for tail, head, _ in graph.edges():
+        if sets.union(tail, head) != -1:
+            yield (TRAVERSE, tail, head)
+    roots = {}
+    labels = array.array('i', [-1]) * graph.node_count
+    for node in graph.nodes():
+        root = sets.find(node)
+        if root not in roots:
+            roots[root] = len(roots)
+            yield (VISIT, node)
+        labels[node] = roots[root]
+    counts = [0] * len(roots)
+    for node in graph.nodes():
+        counts[labels[node]] += 1
+    # Relabel so that component 0 is the largest
+    order = sorted(range(len(counts)), key=counts.__getitem__, reverse=True)
+    rank = [0] * len(order)
+    for new_label, old_label in enumerate(order):
+        rank[old_label] = new_label
+    for node in graph.nodes():
+        labels[node] = rank[labels[node]]
+    return labels, [counts[label] for label in order]
+
+
+# Minimum spanning trees.  Both return (total weight, [(tail, head, weight)]).
+def kruskal_mst(graph):
+    # Minimum spanning forest: edges by increasing weight, kept when they
+    # join two trees.  O(E log E).
+    sets = UnionFind(graph.node_count)
+    total = 0
+    tree = []
+    for tail, head, weight in sorted(graph.edges(), key=lambda edge: edge[2]):
+        if sets.union(tail, head) != -1:
+            total += weight
+            tree.append((tail, head, weight))
+            yield (TRAVERSE, tail, head)
+            if len(tree) == len(graph) - 1:
+                break
+    return total, tree
+
+
+def prim_mst(graph, start_node):
+    # Spanning tree of start_node's component, grown from it.  Each node is
+    # queued once and its key lowered in place (IndexedHeap decrease-key),
+    # O(E log V).
+    offsets, targets, weights = graph.csr()
+    state = search_state.acquire(graph)
+    try:
+        keys, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heap = state.heap
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        keys[start_node] = 0
+        previous[start_node] = -1
+        heap.push(start_node, 0)
+        total = 0
+        tree = []
+        while heap:
+            _, node = heap.pop()
+            states[node] = SETTLED
+            parent = previous[node]
+            if parent != -1:
+                total += keys[node]
+                tree.append((parent, node, keys[node]))
+                yield (TRAVERSE, parent, node)
+            yield (VISIT, node)
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[i]
+                weight = weights[i]
+                if stamps[neighbor] != generation:
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                    heap.push(neighbor, weight)
+                elif states[neighbor] == QUEUED and weight < keys[neighbor]:
+                    heap.decrease(neighbor, weight)
+                else:
+                    continue
+                keys[neighbor] = weight
+                previous[neighbor] = node
+    finally:
+        search_state.release(state)
+    return total, tree
+
+
+# Directed algorithms: edges point from tail to head (the arrow on the canvas)
+def topological_sort(graph):
+    # Kahn's algorithm, O(V + E).  Returns (order, cycle): the topological
+    # order and None, or None and one directed cycle as a node list.
+    offsets, targets, _ = graph.csr()
+    tails = graph.csr_tails()
+    in_degree = array.array('i', [0]) * graph.node_count
+    for node in graph.nodes():
+        for i in range(offsets[node], offsets[node + 1]):
+            if tails[i]:
+                in_degree[targets[i]] += 1
+    ready = deque(node for node in graph.nodes() if not in_degree[node])
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        yield (VISIT, node)
+        for i in range(offsets[node], offsets[node + 1]):
+            if tails[i]:
+                head = targets[i]
+                yield (TRAVERSE, node, head)
+                in_degree[head] -= 1
+                if not in_degree[head]:
+                    ready.append(head)
+    if len(order) == len(graph):
+        return order, None
+    cycle = find_cycle(graph)
+    for tail, head in zip(cycle, cycle[1:] + cycle[:1]):
+        yield (CUT, tail, head)
+    return None, cycle
+
+
+def find_cycle(graph):
+    # A directed cycle as a node list, or None.  Iterative three-colour DFS.
+    offsets, targets, _ = graph.csr()
+    tails = graph.csr_tails()
+    colour = bytearray(graph.node_count)  # 0 new, 1 on the stack, 2 done
+    for root in graph.nodes():
+        if colour[root]:
+            continue
+        colour[root] = 1
+        stack = [root]
+        positions = [offsets[root]]
+        while stack:
+            node = stack[-1]
+            i = positions[-1]
+            end = offsets[node + 1]
+            while i < end and not (tails[i] and colour[targets[i]] != 2):
+                i += 1
+            if i == end:
+                colour[node] = 2
+                stack.pop()
+                positions.pop()
+                continue
+            positions[-1] = i + 1
+            head = targets[i]
+            if colour[head] == 1:
+                return stack[stack.index(head):]
+            colour[head] = 1
+            stack.append(head)
+            positions.append(offsets[head])
+    return None
+
+
+def max_flow(graph, source, sink):
+    # Dinic's algorithm with edge weights as capacities along the edge
+    # direction, O(V^2 E) (much less on unit capacities).  Each augmenting
+    # path is traced, then the minimum cut edges.  Returns (flow value,
+    # source side of the cut as a set, cut edges as (tail, head, weight)).
+    offsets, targets, weights = graph.csr()
+    tails = graph.csr_tails()
+    # Residual capacity per CSR slot; a slot and its twin at the other
+    # endpoint are the forward and backward arcs of one edge
+    residual = array.array('d', (weights[i] if tails[i] else 0.0 for i in range(len(targets))))
+    twin = array.array('q', bytes(8 * len(targets)))
+    first_slot = {}
+    for node in graph.nodes():
+        for i in range(offsets[node], offsets[node + 1]):
+            key = edge_key(node, targets[i])
+            other = first_slot.pop(key, None)
+            if other is None:
+                first_slot[key] = i
+            else:
+                twin[i] = other
+                twin[other] = i
+    flow = 0
+    inf = float('inf')
+
+    while source != sink:
+        # Level graph
+        level = array.array('i', [-1]) * graph.node_count
+        level[source] = 0
+        queue = deque([source])
+        while queue and level[sink] == -1:
+            node = queue.popleft()
+            for i in range(offsets[node], offsets[node + 1]):
+                if residual[i] > 0 and level[targets[i]] == -1:
+                    level[targets[i]] = level[node] + 1
+                    queue.append(targets[i])
+        if level[sink] == -1:
+            break
+        # Blocking flow by repeated DFS with per-node edge pointers
+        pointer = array.array('q', offsets[:-1])
+        while True:
+            path = []  # slots from source
+            node = source
+            while node != sink:
+                i = pointer[node]
+                end = offsets[node + 1]
+                while i < end and not (residual[i] > 0 and level[targets[i]] == level[node] + 1):
+                    i += 1
+                pointer[node] = i
+                if i == end:
+                    if not path:
+                        break
+                    # Dead end: retreat and skip the edge that led here
+                    level[node] = -1
+                    i = path.pop()
+                    node = targets[twin[i]]
+                    pointer[node] += 1
+                    continue
+                path.append(i)
+                node = targets[i]
+            if node != sink:
+                break
+            pushed = min(residual[i] for i in path)
+            if pushed == inf:
+                pushed = 0
+            for i in path:
+                residual[i] -= pushed
+                residual[twin[i]] += pushed
+                yield (TRAVERSE, targets[twin[i]], targets[i])
+            flow += pushed
+
+    # Minimum cut: nodes still reachable from the source in the residual graph
+    source_side = {source}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        yield (VISIT, node)
+        for i in range(offsets[node], offsets[node + 1]):
+            if residual[i] > 0 and targets[i] not in source_side:
+                source_side.add(targets[i])
+                queue.append(targets[i])
+    cut = []
+    for node in source_side:
+        for i in range(offsets[node], offsets[node + 1]):
+            if tails[i] and targets[i] not in source_side:
+                cut.append((node, targets[i], weights[i]))
+                yield (CUT, node, targets[i])
+    return flow, source_side, cut
+
+
+# Partitioning and sharded rounds (driven by sharded.ShardedJob)
+PARTITION_ROUNDS = 8  # label propagation passes after the BFS split
+PARTITION_IMBALANCE = 0.05  # parts may grow this much past an equal share
+
+
+def partition_graph(graph, parts, rounds=PARTITION_ROUNDS):
+    # Splits the live nodes into parts of near-equal size with few cut edges.
+    # The nodes are laid out in BFS order from a peripheral node of each
+    # component and cut into consecutive runs, then label propagation moves
+    # nodes to the part most of their neighbours are in while that part has
+    # room.  Returns (labels, cut): labels[node] is the node's part (-1 for dead
+    # ids) and cut the number of edges between parts.
+    offsets, targets, _ = graph.csr()
+    node_count = graph.node_count
+    parts = max(1, min(parts, len(graph)))
+    order = []
+    seen = bytearray(node_count)
+    probe = bytearray(node_count)
+    for start in graph.nodes():
+        if seen[start]:
+            continue
+        # The last node of a BFS is far from where it started; growing from it
+        # keeps the runs compact
+        run = _bfs_run(offsets, targets, start, probe)
+        for node in run:
+            probe[node] = 0
+        order.extend(_bfs_run(offsets, targets, run[-1], seen))
+
+    labels = array.array('i', [-1]) * node_count
+    share = len(order) / parts
+    for position, node in enumerate(order):
+        labels[node] = min(parts - 1, int(position / share))
+    sizes = [0] * parts
+    for node in order:
+        sizes[labels[node]] += 1
+    capacity = int(share * (1 + PARTITION_IMBALANCE)) + 1
+
+    for _ in range(rounds):
+        moved = 0
+        for node in order:
+            current = labels[node]
+            counts = {}
+            for i in range(offsets[node], offsets[node + 1]):
+                part = labels[targets[i]]
+                counts[part] = counts.get(part, 0) + 1
+            best = current
+            best_count = counts.get(current, 0)
+            for part, count in counts.items():
+                if count > best_count and sizes[part] < capacity:
+                    best, best_count = part, count
+            if best != current and sizes[current] > 1:
+                labels[node] = best
+                sizes[current] -= 1
+                sizes[best] += 1
+                moved += 1
+        if not moved:
+            break
+    cut = sum(1 for node in order for i in range(offsets[node], offsets[node + 1])
+              if labels[targets[i]] != labels[node]) // 2
+    return labels, cut
+
+
+def _bfs_run(offsets, targets, start, seen):
+    # Nodes reachable from start in BFS order, flagging them in seen
+    seen[start] = 1
+    run = [start]
+    for node in run:
+        for i in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[i]
+            if not seen[neighbor]:
+                seen[neighbor] = 1
+                run.append(neighbor)
+    return run
+
+
+# The round functions below run one shard of a graph whose shards are the
+# consecutive id ranges lo..hi-1, against state arrays shared by all shards
+# (shared_graph.SharedArray).  Each shard writes only its own entries.  Other
+# shards' entries are read only to skip offers that cannot help; entries only
+# ever decrease, so a stale read costs a redundant offer, never a lost one.
+# Both return (offers, changed): the best offer the shard makes to each node of
+# another shard, and how many of its own nodes improved.
+
+def shard_search(graph, lo, hi, distances, via, updates, weighted=True, inherit=False):
+    # One round of a multi-source shortest path search (hop counts unless
+    # weighted).  updates are (node, distance, via) offers for this shard's
+    # nodes: the sources in the first round, then boundary offers.  via is
+    # the BFS parent, or with inherit the source each node is nearest to.
+    offsets, targets, weights = graph.csr()
+    dist = distances.values
+    labels = via.values
+    min_heap = []
+    for node, distance, label in updates:
+        if distance < dist[node]:
+            dist[node] = distance
+            labels[node] = label
+            min_heap.append((distance, node))
+    heapq.heapify(min_heap)
+    offers = {}
+    changed = 0
+    while min_heap:
+        current_dist, current_node = heapq.heappop(min_heap)
+        if current_dist > dist[current_node]:
+            continue
+        changed += 1
+        label = labels[current_node] if inherit else current_node
+        for i in range(offsets[current_node], offsets[current_node + 1]):
+            neighbor = targets[i]
+            new_dist = current_dist + (weights[i] if weighted else 1)
+            if new_dist >= dist[neighbor]:
+                continue
+            if lo <= neighbor < hi:
+                dist[neighbor] = new_dist
+                labels[neighbor] = label
+                heapq.heappush(min_heap, (new_dist, neighbor))
+            else:
+                offer = offers.get(neighbor)
+                if offer is None or new_dist < offer[0]:
+                    offers[neighbor] = (new_dist, label)
+    return [(node, distance, label) for node, (distance, label) in offers.items()], changed
+
+
+def shard_components(graph, lo, hi, labels, updates=None):
+    # One round of min-label propagation for connected components; labels
+    # start as the node ids.  The first round (updates None) labels each
+    # component within the shard by its smallest id, later rounds spread
+    # smaller (node, label) offers received over the boundary.
+    offsets, targets, _ = graph.csr()
+    values = labels.values
+    if updates is None:
+        updates = [(node, node) for node in range(lo, hi)]
+        first = True
+    else:
+        updates = sorted(updates, key=lambda update: update[1])
+        first = False
+    offers = {}
+    changed = 0
+    for start, label in updates:
+        if values[start] < label or (values[start] == label and not first):
+            continue
+        values[start] = label
+        changed += 1
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[i]
+                if values[neighbor] <= label:
+                    continue
+                if lo <= neighbor < hi:
+                    values[neighbor] = label
+                    changed += 1
+                    stack.append(neighbor)
+                else:
+                    offer = offers.get(neighbor)
+                    if offer is None or label < offer:
+                        offers[neighbor] = label
+    return list(offers.items()), changed
+
+
+# Headless helpers
+def bfs_order(graph, start_node):
+    return [event[1] for event in bfs(graph, start_node) if event[0] == VISIT]
+
+
+def dfs_order(graph, start_node):
+    return [event[1] for event in dfs(graph, start_node) if event[0] == VISIT]
+
+
+def level_sizes(hops):
+    # Nodes per BFS level from a hop distance array (-1: unreached)
+    if np is not None and isinstance(hops, np.ndarray):
+        return np.bincount(hops[hops >= 0]).tolist()
+    sizes = [0] * (max(hops) + 1)
+    for hop in hops:
+        if hop >= 0:
+            sizes[hop] += 1
+    return sizes
+
+
+def shortest_path(graph, start_node, end_node):
+    # Returns (path, distance); path is [] when end_node is unreachable
+    for event in dijkstra(graph, start_node, end_node):
+        if event[0] == PATH:
+            return event[3], event[4]
@@ -0,0 +1,124 @@
+import csv
+
+import algorithms
+import shared_graph
+from worker import DONE, FAILED
+
+# All-pairs shortest path jobs on the AlgorithmRunner.
+#
+# Two strategies, picked per graph:
+#
+#   repeated Dijkstra   the sources are split into chunks, each chunk is one
+#                       runner job (algorithms.distance_rows) and the chunks
+#                       run on all worker processes at once.  The graph is
+#                       handed over as a shared_graph.SharedGraph, so every
+#                       worker maps one copy of the CSR arrays instead of
+#                       unpickling its own (thread workers get a snapshot).
+#   Floyd-Warshall      one job running the NumPy version, for small graphs
+#                       with many edges per node where O(n^3) vectorised work
+#                       beats n heap-based searches
+#
+# The result is a row per live node in graph.nodes() order; rows are arrays of
+# doubles, or one NumPy matrix after Floyd-Warshall.
+
+MAX_MATRIX_NODES = 6000  # 6000^2 doubles is 288 MB
+FLOYD_WARSHALL_MAX_NODES = 800
+FLOYD_WARSHALL_MIN_DEGREE = 12  # average degree from which it is preferred
+CHUNKS_PER_WORKER = 4  # more chunks than workers evens out uneven searches
+
+
+def use_floyd_warshall(graph):
+    node_count = len(graph)
+    return (algorithms.HAVE_NUMPY and 0 < node_count <= FLOYD_WARSHALL_MAX_NODES
+            and 2 * graph.edge_count >= FLOYD_WARSHALL_MIN_DEGREE * node_count)
+
+
+class AllPairsJob:
+    def __init__(self, runner, graph, on_done, on_progress=None):
+        # on_done(job) and on_progress(job, fraction) are called on the Tk
+        # thread; after on_done, job.error is None or the failure text
+        self.nodes = list(graph.nodes())
+        if len(self.nodes) > MAX_MATRIX_NODES:
+            raise ValueError(f"{len(self.nodes)} nodes; the distance matrix is limited to "
+                             f"{MAX_MATRIX_NODES}")
+        self.runner = runner
+        self.version = graph.version
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.rows = [None] * len(self.nodes)
+        self.method = "Floyd-Warshall" if use_floyd_warshall(graph) else "Dijkstra"
+        self.error = None
+        self.finished = False
+        self._runs = {}  # run id -> index of the chunk's first row
+        self._shared = None
+        if self.method == "Floyd-Warshall":
+            run_id = runner.submit("floyd_warshall", graph.snapshot(), (), None, self._on_matrix)
+            self._runs[run_id] = 0
+            return
+        runner.start()
+        if runner.use_processes:
+            self._shared = shared_graph.share(graph)
+            source_graph = self._shared
+        else:
+            source_graph = graph.snapshot()  # worker threads share it anyway
+        chunk_count = max(1, min(len(self.nodes), runner.max_workers * CHUNKS_PER_WORKER))
+        size = -(-len(self.nodes) // chunk_count) if self.nodes else 1
+        for first in range(0, len(self.nodes), size):
+            run_id = runner.submit("distance_rows", source_graph, (self.nodes[first:first + size],),
+                                   None, self._on_rows)
+            self._runs[run_id] = first
+        if not self._runs:
+            self._finish()
+
+    @property
+    def done_rows(self):
+        return sum(1 for row in self.rows if row is not None)
+
+    def cancel(self):
+        for run_id in list(self._runs):
+            self.runner.cancel(run_id)
+
+    def _on_matrix(self, run_id, status, payload):
+        if self._check(run_id, status, payload):
+            self.rows = payload
+            self._finish()
+
+    def _on_rows(self, run_id, status, payload):
+        first = self._runs.get(run_id)
+        if not self._check(run_id, status, payload):
+            return
+        self.rows[first:first + len(payload)] = payload
+        if self._runs:
+            if self.on_progress is not None:
+                self.on_progress(self, self.done_rows / len(self.rows))
+        else:
+            self._finish()
+
+    def _check(self, run_id, status, payload):
+        # True for a successful chunk; the first failure ends the job
+        if self._runs.pop(run_id, None) is None or self.finished:
+            return False
+        if status == DONE:
+            return True
+        self.error = payload if status == FAILED else "cancelled"
+        self._finish()
+        self.cancel()
+        return False
+
+    def _finish(self):
+        self.finished = True
+        if self._shared is not None:
+            self._shared.release()
+            self._shared = None
+        self.on_done(self)
+
+
+def save_matrix(path, nodes, rows):
+    # CSV with node ids along the first row and column; unreachable is empty
+    inf = float('inf')
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([""] + nodes)
+        for node, row in zip(nodes, rows):
+            writer.writerow([node] + [f"{value:g}" if value < inf else "" for value in row])
+
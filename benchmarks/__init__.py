@@ -0,0 +1,170 @@
+import math
+import random
+
+from graph_core import Graph
+
+# Synthetic graphs shared by the benchmark scripts in this package.
+
+
+def chain_graph(node_count, weight=1):
+    graph = Graph()
+    for i in range(node_count):
+        graph.add_node(i * 10.0, 0.0)
+    graph.add_edges((i, i + 1, weight) for i in range(node_count - 1))
+    return graph
+
+
+def grid_graph(side, weight=1):
+    graph = Graph()
+    for row in range(side):
+        for col in range(side):
+            graph.add_node(col * 10.0, row * 10.0)
+
+    def edges():
+        for row in range(side):
+            for col in range(side):
+                node = row * side + col
+                if col + 1 < side:
+                    yield node, node + 1, weight
+                if row + 1 < side:
+                    yield node, node + side, weight
+
+    graph.add_edges(edges())
+    return graph
+
+
+def road_graph(side, seed=0):
+    # Road-network-like planar graph: jittered grid points joined to their
+    # right/down neighbours (a few links missing) plus occasional diagonals,
+    # weighted by length times a small detour factor.  About 2.3 edges per
+    # node, so side=660 gives roughly 10^6 edges.
+    rng = random.Random(seed)
+    graph = Graph()
+    for row in range(side):
+        for col in range(side):
+            graph.add_node((col + rng.uniform(-0.3, 0.3)) * 10.0, (row + rng.uniform(-0.3, 0.3)) * 10.0)
+    xs, ys = graph.coordinate_arrays()
+
+    def link(node1, node2):
+        length = math.hypot(xs[node1] - xs[node2], ys[node1] - ys[node2])
+        return node1, node2, round(length * rng.uniform(1.0, 1.4), 2)
+
+    def edges():
+        for row in range(side):
+            for col in range(side):
+                node = row * side + col
+                if col + 1 < side and rng.random() < 0.95:
+                    yield link(node, node + 1)
+                if row + 1 < side and rng.random() < 0.95:
+                    yield link(node, node + side)
+                if col + 1 < side and row + 1 < side and rng.random() < 0.4:
+                    yield link(node, node + side + 1)
+
+    graph.add_edges(edges())
+    return graph
+
+
+def geometric_graph(node_count, degree=6, seed=0, spacing=10.0):
+    # Random geometric graph: uniform points in a square, each joined to the
+    # points within the radius that gives about `degree` neighbours on
+    # average, weighted by distance.  Points are bucketed by radius-sized
+    # cells so building it is linear.
+    rng = random.Random(seed)
+    side = math.sqrt(node_count) * spacing
+    radius = math.sqrt(degree / (math.pi * node_count)) * side
+    graph = Graph()
+    cells = {}
+    for node in range(node_count):
+        x, y = rng.uniform(0, side), rng.uniform(0, side)
+        graph.add_node(x, y)
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(node)
+    positions = graph.positions
+
+    def edges():
+        for (cx, cy), members in cells.items():
+            for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+                others = cells.get((cx + dx, cy + dy))
+                if others is None:
+                    continue
+                for node1 in members:
+                    x1, y1 = positions[node1]
+                    for node2 in others:
+                        if (dx, dy) == (0, 0) and node2 <= node1:
+                            continue
+                        x2, y2 = positions[node2]
+                        length = math.hypot(x1 - x2, y1 - y2)
+                        if length <= radius:
+                            yield node1, node2, round(length, 2)
+
+    graph.add_edges(edges())
+    return graph
+
+
+def scale_free_graph(node_count, links=2, seed=0, spacing=10.0):
+    # Barabasi-Albert preferential attachment: each new node joins `links`
+    # existing nodes picked with probability proportional to their degree.
+    # Positions are random; weights are small integers.
+    rng = random.Random(seed)
+    side = math.sqrt(node_count) * spacing
+    graph = Graph()
+    for _ in range(node_count):
+        graph.add_node(rng.uniform(0, side), rng.uniform(0, side))
+    ends = []  # every edge endpoint once, so a uniform pick is degree-weighted
+
+    def edges():
+        for node in range(1, node_count):
+            targets = set()
+            while len(targets) < min(links, node):
+                targets.add(rng.choice(ends) if ends and rng.random() < 0.9 else rng.randrange(node))
+            for target in targets:
+                ends.extend((node, target))
+                yield node, target, rng.randint(1, 9)
+
+    graph.add_edges(edges())
+    return graph
+
+
+class HeadlessCanvas:
+    # Stands in for a Tk canvas: counts item creations and Tcl-level calls,
+    # and keeps after() callbacks for run_pending()
+    def __init__(self, width=1600, height=1000):
+        self.width = width
+        self.height = height
+        self.created = 0
+        self.calls = 0
+        self.pending = {}
+        self._next_id = 0
+
+    def _item(self, *args, **kwargs):
+        self.created += 1
+        self.calls += 1
+        return self.created
+
+    create_oval = create_line = create_text = create_rectangle = create_image = _item
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    delete = itemconfig = dtag = addtag_withtag = move = scale = tag_raise = tag_lower = _call
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def after(self, ms, callback, *args):
+        self._next_id += 1
+        self.pending[self._next_id] = (callback, args)
+        return self._next_id
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_pending(self):
+        while self.pending:
+            callback, args = self.pending.pop(next(iter(self.pending)))
+            callback(*args)
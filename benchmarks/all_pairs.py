@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+import time
+
+import all_pairs
+from benchmarks import road_graph
+from graph_core import Graph
+from worker import AlgorithmRunner
+
+# All-pairs scaling: the repeated-Dijkstra job on 1..N worker processes, and
+# Floyd-Warshall against repeated Dijkstra on a small dense graph.
+#
+#   python -m benchmarks.all_pairs [side] [max workers]
+
+
+class HeadlessRoot:
+    # Just enough of Tk's after() for AlgorithmRunner
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+            time.sleep(0.002)
+
+
+def timed_job(graph, workers, processes=True):
+    root = HeadlessRoot()
+    runner = AlgorithmRunner(root, processes=processes, max_workers=workers)
+    runner.start()
+    started = time.perf_counter()
+    job = all_pairs.AllPairsJob(runner, graph, lambda job: None)
+    root.run()
+    elapsed = time.perf_counter() - started
+    runner.shutdown()
+    if job.error is not None:
+        raise RuntimeError(job.error)
+    return job, elapsed
+
+
+def dense_graph(node_count, probability, seed=0):
+    rng = random.Random(seed)
+    graph = Graph()
+    for _ in range(node_count):
+        graph.add_node()
+    graph.add_edges((i, j, rng.randint(1, 100)) for i in range(node_count)
+                    for j in range(i + 1, node_count) if rng.random() < probability)
+    return graph
+
+
+def main(side=40, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    graph = road_graph(side)
+    print(f"repeated Dijkstra, {len(graph)} nodes, {graph.edge_count} edges")
+    base = None
+    for workers in sorted({1, 2, 4, 8, max_workers}):
+        if workers > max_workers:
+            continue
+        _, elapsed = timed_job(graph, workers)
+        base = base or elapsed
+        print(f"{workers:>4} workers {elapsed:>8.2f} s  speedup {base / elapsed:.2f}x")
+
+    dense = dense_graph(400, 0.1)
+    print(f"dense graph, {len(dense)} nodes, {dense.edge_count} edges")
+    job, elapsed = timed_job(dense, 1)
+    print(f"{job.method:>16} {elapsed:>8.2f} s")
+    limit = all_pairs.FLOYD_WARSHALL_MAX_NODES
+    all_pairs.FLOYD_WARSHALL_MAX_NODES = 0
+    try:
+        job, elapsed = timed_job(dense, 1)
+    finally:
+        all_pairs.FLOYD_WARSHALL_MAX_NODES = limit
+    print(f"{job.method:>16} {elapsed:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,130 @@
+import heapq
+import random
+import sys
+import time
+from collections import deque
+
+import algorithms
+import search_state
+from benchmarks import road_graph
+from search_state import QUEUED, SETTLED
+
+# Point-to-point Dijkstra on road-like graphs.  Three versions are compared:
+#
+#   legacy   the previous dict/lazy-heapq implementation, kept verbatim below
+#   indexed  dense search_state labels with the decrease-key IndexedHeap
+#   dense    algorithms.dijkstra: dense labels with heapq, skipping
+#            superseded entries
+#
+# Queries run between random node pairs at increasing hop distance, so the
+# short ones show the per-run setup cost and the long ones the per-node cost.
+#
+#   python -m benchmarks.dijkstra [side]      side=660 is ~10^6 edges
+
+
+def legacy_dijkstra(graph, start_node, end_node):
+    distances = {node: float('inf') for node in graph}
+    distances[start_node] = 0
+    visited = set()
+    previous_nodes = {node: None for node in graph}
+
+    min_heap = [(0, start_node)]
+
+    while min_heap:
+        current_dist, current_node = heapq.heappop(min_heap)
+
+        if current_node in visited:
+            continue
+
+        visited.add(current_node)
+        yield (algorithms.SETTLE, current_node)
+
+        if current_node == end_node:
+            break
+
+        for neighbor, weight in graph.neighbors(current_node):
+            if neighbor not in visited:
+                new_dist = current_dist + weight
+                if new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    previous_nodes[neighbor] = current_node
+                    heapq.heappush(min_heap, (new_dist, neighbor))
+                    yield (algorithms.RELAX, current_node, neighbor, new_dist)
+
+    path = algorithms.reconstruct_path(previous_nodes, end_node, distances[end_node])
+    yield (algorithms.PATH, start_node, end_node, path, distances[end_node])
+
+
+def indexed_dijkstra(graph, start_node, end_node):
+    offsets, targets, weights = graph.csr()
+    state = search_state.acquire(graph)
+    try:
+        distances, previous, states, stamps = state.distances, state.previous, state.states, state.stamps
+        generation = state.generation
+        heap = state.heap
+        stamps[start_node] = generation
+        states[start_node] = QUEUED
+        distances[start_node] = 0
+        previous[start_node] = -1
+        heap.push(start_node, 0)
+        while heap:
+            current_dist, current_node = heap.pop()
+            states[current_node] = SETTLED
+            yield (algorithms.SETTLE, current_node)
+            if current_node == end_node:
+                break
+            for i in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[i]
+                new_dist = current_dist + weights[i]
+                if stamps[neighbor] != generation:
+                    stamps[neighbor] = generation
+                    states[neighbor] = QUEUED
+                    heap.push(neighbor, new_dist)
+                elif states[neighbor] == QUEUED and new_dist < distances[neighbor]:
+                    heap.decrease(neighbor, new_dist)
+                else:
+                    continue
+                distances[neighbor] = new_dist
+                previous[neighbor] = current_node
+                yield (algorithms.RELAX, current_node, neighbor, new_dist)
+        reached = stamps[end_node] == generation and states[end_node] == SETTLED
+        distance = distances[end_node] if reached else float('inf')
+    finally:
+        search_state.release(state)
+    yield (algorithms.PATH, start_node, end_node, [], distance)
+
+
+def run(algorithm, graph, start_node, end_node):
+    started = time.perf_counter()
+    last = deque(algorithm(graph, start_node, end_node), maxlen=1)[0]
+    return time.perf_counter() - started, last[4]
+
+
+def main(side=660, queries=3, seed=1):
+    print(f"building {side}x{side} road graph...")
+    graph = road_graph(side)
+    graph.csr()
+    print(f"{len(graph)} nodes, {graph.edge_count} edges")
+    rng = random.Random(seed)
+    versions = (("legacy", legacy_dijkstra), ("indexed", indexed_dijkstra), ("dense", algorithms.dijkstra))
+    print(f"{'hops':>6}" + "".join(f"{name + ' s':>12}" for name, _ in versions) + f"{'speedup':>10}")
+    for hops in (5, 50, side // 2, side - 1):
+        totals = [0.0] * len(versions)
+        for _ in range(queries):
+            row, col = rng.randrange(side - hops), rng.randrange(side - hops)
+            start_node = row * side + col
+            end_node = (row + hops) * side + col
+            expected = None
+            for i, (name, algorithm) in enumerate(versions):
+                seconds, distance = run(algorithm, graph, start_node, end_node)
+                if expected is None:
+                    expected = distance
+                elif abs(distance - expected) > 1e-6:
+                    raise AssertionError(f"{name}: distance {distance} != {expected}")
+                totals[i] += seconds
+        # speedup of algorithms.dijkstra over the legacy version
+        print(f"{hops:>6}" + "".join(f"{total / queries:>12.4f}" for total in totals)
+              + f"{totals[0] / totals[-1]:>10.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 660)
@@ -0,0 +1,74 @@
+import random
+import sys
+import time
+
+from benchmarks import grid_graph
+from spatial import HitIndex, point_near_line
+
+# Hit-test latency against node count: the grid index versus the linear scans
+# GraphVisualizer used to do on every click.
+#
+#   python -m benchmarks.hit_test [max_nodes]
+
+QUERIES = 2000
+
+
+def build_index(graph):
+    index = HitIndex(graph.positions)
+    for node in graph.nodes():
+        index.add_node(node)
+    for node1, node2, _ in graph.edges():
+        index.add_edge(node1, node2)
+    return index
+
+
+def linear_node_at(positions, x, y):
+    for node_id, (nx, ny) in positions.items():
+        if abs(x - nx) < 30 and abs(y - ny) < 30:
+            return node_id
+    return None
+
+
+def linear_edge_at(graph, x, y):
+    positions = graph.positions
+    for node1, node2, _ in graph.edges():
+        x1, y1 = positions[node1]
+        x2, y2 = positions[node2]
+        if point_near_line(x, y, x1, y1, x2, y2):
+            return node1, node2
+    return None
+
+
+def time_queries(query, points):
+    started = time.perf_counter()
+    for x, y in points:
+        query(x, y)
+    return (time.perf_counter() - started) / len(points) * 1e6
+
+
+def main(max_nodes=100_000):
+    rng = random.Random(42)
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= max_nodes]
+    print(f"{'nodes':>10}{'edges':>10}{'node us':>10}{'edge us':>10}{'scan node us':>14}{'scan edge us':>14}")
+    for size in sizes:
+        side = int(size ** 0.5)
+        graph = grid_graph(side)
+        # grid_graph spaces nodes 10px apart; spread them out to canvas scale
+        for node in graph.nodes():
+            x, y = graph.positions[node]
+            graph.positions[node] = (x * 8, y * 8)
+        index = build_index(graph)
+        extent = side * 80
+        points = [(rng.uniform(0, extent), rng.uniform(0, extent)) for _ in range(QUERIES)]
+        node_us = time_queries(index.node_at, points)
+        edge_us = time_queries(index.edge_at, points)
+        # The linear scans are far slower; sample fewer clicks for them
+        few = points[:max(5, QUERIES * 1000 // size)]
+        scan_node_us = time_queries(lambda x, y: linear_node_at(graph.positions, x, y), few)
+        scan_edge_us = time_queries(lambda x, y: linear_edge_at(graph, x, y), few)
+        print(f"{len(graph):>10}{graph.edge_count:>10}{node_us:>10.1f}{edge_us:>10.1f}"
+              f"{scan_node_us:>14.1f}{scan_edge_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,55 @@
+import random
+import sys
+import time
+from collections import deque
+
+import algorithms
+import landmarks
+from benchmarks import road_graph
+
+# Repeated point-to-point queries on a road-like graph: ALT with the landmark
+# index against bidirectional Dijkstra and plain Dijkstra, plus the one-off
+# cost of building the index.
+#
+#   python -m benchmarks.landmarks [side] [queries]
+
+
+def run(events):
+    started = time.perf_counter()
+    last = deque(events, maxlen=1)[0]
+    return time.perf_counter() - started, last[4]
+
+
+def main(side=300, queries=20, seed=1):
+    print(f"building {side}x{side} road graph...")
+    graph = road_graph(side)
+    graph.csr()
+    print(f"{len(graph)} nodes, {graph.edge_count} edges")
+    started = time.perf_counter()
+    index = landmarks.build_index(graph)
+    print(f"landmark index: {len(index)} landmarks in {time.perf_counter() - started:.2f} s")
+
+    rng = random.Random(seed)
+    nodes = len(graph)
+    versions = (
+        ("dijkstra", lambda start, end: algorithms.dijkstra(graph, start, end)),
+        ("bidirectional", lambda start, end: algorithms.bidirectional_dijkstra(graph, start, end)),
+        ("alt", lambda start, end: index.query(graph, start, end)),
+    )
+    totals = [0.0] * len(versions)
+    for _ in range(queries):
+        start_node, end_node = rng.randrange(nodes), rng.randrange(nodes)
+        expected = None
+        for i, (name, search) in enumerate(versions):
+            seconds, distance = run(search(start_node, end_node))
+            if expected is None:
+                expected = distance
+            elif abs(distance - expected) > 1e-6:
+                raise AssertionError(f"{name}: distance {distance} != {expected}")
+            totals[i] += seconds
+    for (name, _), total in zip(versions, totals):
+        print(f"{name:>14}{total / queries * 1000:>10.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
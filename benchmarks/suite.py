@@ -0,0 +1,334 @@
+import argparse
+import csv
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import algorithms
+from benchmarks import (HeadlessCanvas, chain_graph, geometric_graph, grid_graph,
+                        scale_free_graph)
+from benchmarks.hit_test import build_index
+from graph_core import edge_key
+from lod import GraphView
+from renderer import CanvasRenderer
+
+# Benchmark suite for the graph engine and the canvas drawing code.
+#
+#   python -m benchmarks [--graphs grid,chain] [--sizes 1000,10000]
+#                        [--repeat 3] [--json out.json] [--csv out.csv]
+#                        [--baseline old.json] [--threshold 0.25]
+#   python 208pro.py --benchmark [same options]
+#
+# For every synthetic graph type and size it times the traversals and
+# searches behind the BFS/DFS/Dijkstra buttons, the edits behind create_edge
+# and delete_node, click hit-testing, and drawing on a headless canvas (the
+# GraphView and CanvasRenderer code paths without Tk).  Each case reports its
+# best time over the repeats and the peak memory it allocated (measured in a
+# separate run under tracemalloc, which slows Python down).  With --baseline
+# the results are compared against an earlier --json file and the exit status
+# is 1 when any case got slower by more than the threshold.
+
+GRAPHS = {
+    "grid": lambda size: grid_graph(int(size ** 0.5), weight=1),
+    "geometric": lambda size: geometric_graph(size, seed=1),
+    "scale-free": lambda size: scale_free_graph(size, seed=1),
+    "chain": chain_graph,
+}
+SPREAD = 8  # generators space nodes 10 px apart; the GUI's nodes are 50 px wide
+MUTATIONS = 1000
+EDIT_REACH = 400  # px
+QUERIES = 2000
+STYLE = {
+    "node_color": "#89B4FA",
+    "edge_color": "#CDD6F4",
+    "outline_color": "#F38BA8",
+    "selection_color": "#F9E2AF",
+    "text_color": "#F8F8F2",
+}
+
+
+def consume(events):
+    deque(events, maxlen=0)
+
+
+class Scene:
+    # The GUI's engine objects on a headless canvas
+    def __init__(self, graph):
+        self.graph = graph
+        self.canvas = HeadlessCanvas()
+        self.hit_index = build_index(graph)
+        self.renderer = CanvasRenderer(self.canvas, STYLE["node_color"], STYLE["edge_color"])
+        self.view = GraphView(self.canvas, graph, self.hit_index, self.renderer, STYLE)
+
+
+# Cases: each takes (graph, rng), does its untimed setup and returns
+# (callable to time, operation count)
+def bfs_case(graph, rng):
+    graph.csr()
+    return lambda: consume(algorithms.bfs(graph, 0)), len(graph)
+
+
+def dfs_case(graph, rng):
+    graph.csr()
+    return lambda: consume(algorithms.dfs(graph, 0)), len(graph)
+
+
+def dijkstra_case(graph, rng):
+    graph.csr()
+    end_node = graph.node_count - 1
+    return lambda: consume(algorithms.dijkstra(graph, 0, end_node)), len(graph)
+
+
+def components_case(graph, rng):
+    graph.csr()
+    return lambda: consume(algorithms.connected_components(graph)), len(graph)
+
+
+def create_edge_case(graph, rng):
+    # GraphVisualizer.create_edge without logging: engine, hit index, canvas
+    scene = Scene(graph.snapshot())
+    scene.view.fit()
+    # Users connect nearby nodes: the second end is within EDIT_REACH
+    pairs = set()
+    for _ in range(MUTATIONS * 10):
+        if len(pairs) >= min(MUTATIONS, len(graph) // 2):
+            break
+        node1 = rng.randrange(len(graph))
+        x, y = graph.positions[node1]
+        node2 = rng.choice(scene.hit_index.nodes_in_box(x - EDIT_REACH, y - EDIT_REACH,
+                                                        x + EDIT_REACH, y + EDIT_REACH))
+        if node1 != node2 and not scene.graph.has_edge(node1, node2):
+            pairs.add(edge_key(node1, node2))
+
+    def run():
+        for node1, node2 in pairs:
+            scene.graph.add_edge(node1, node2, 1)
+            scene.hit_index.add_edge(node1, node2)
+            scene.view.draw_edge(node1, node2)
+
+    return run, len(pairs)
+
+
+def delete_node_case(graph, rng):
+    # GraphVisualizer.delete_node without logging
+    scene = Scene(graph.snapshot())
+    scene.view.fit()
+    nodes = rng.sample(range(len(graph)), min(MUTATIONS, len(graph) // 2))
+
+    def run():
+        for node in nodes:
+            scene.view.erase(nodes=(node,))
+            scene.hit_index.remove_node(node)
+            scene.renderer.forget_node(node)
+            for node1, node2, _ in scene.graph.remove_node(node):
+                scene.hit_index.remove_edge(node1, node2)
+                scene.renderer.forget_edge(node1, node2)
+                scene.view.erase(edges=((node1, node2),))
+
+    return run, len(nodes)
+
+
+def hit_test_case(graph, rng):
+    index = build_index(graph)
+    bounds = graph.bounds()
+    points = [(rng.uniform(bounds[0], bounds[2]), rng.uniform(bounds[1], bounds[3]))
+              for _ in range(QUERIES)]
+
+    def run():
+        for x, y in points:
+            if index.node_at(x, y) is None:
+                index.edge_at(x, y)
+
+    return run, len(points)
+
+
+def render_case(graph, rng):
+    # Fit-to-window redraw: culling, level of detail and item creation
+    scene = Scene(graph)
+    return scene.view.fit, 1
+
+
+def highlight_case(graph, rng):
+    # One traversal's worth of node and edge highlights, flushed in a batch
+    scene = Scene(graph)
+    scene.view.fit()
+    edges = [(tail, head) for tail, head, _ in graph.edges()]
+
+    def run():
+        renderer = scene.renderer
+        for node in graph.nodes():
+            renderer.set_node(node, "#94E2D5")
+        for tail, head in edges:
+            renderer.set_edge(tail, head, "#94E2D5")
+        renderer.flush()
+        renderer.reset()
+        renderer.flush()
+
+    return run, len(graph) + len(edges)
+
+
+CASES = {
+    "bfs": bfs_case,
+    "dfs": dfs_case,
+    "dijkstra": dijkstra_case,
+    "components": components_case,
+    "create_edge": create_edge_case,
+    "delete_node": delete_node_case,
+    "hit_test": hit_test_case,
+    "render": render_case,
+    "highlight": highlight_case,
+}
+
+
+def build_graph(kind, size):
+    graph = GRAPHS[kind](size)
+    for node in graph.nodes():
+        x, y = graph.positions[node]
+        graph.positions[node] = (x * SPREAD, y * SPREAD)
+    return graph
+
+
+def measure(case, graph, seed, repeat):
+    # (best seconds, operations, peak KiB); setup is redone for every run
+    # because the mutation cases change their copy of the graph
+    best = float('inf')
+    for _ in range(repeat):
+        run, operations = case(graph, random.Random(seed))
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    run, _ = case(graph, random.Random(seed))
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, operations, peak / 1024
+
+
+def run_suite(graphs, sizes, cases, repeat, seed=0, report=print):
+    results = []
+    report(f"{'graph':<11}{'nodes':>9}{'edges':>9}  {'case':<12}{'seconds':>10}{'us/op':>10}{'peak KiB':>10}")
+    for kind in graphs:
+        for size in sizes:
+            started = time.perf_counter()
+            graph = build_graph(kind, size)
+            build_seconds = time.perf_counter() - started
+            for name in cases:
+                seconds, operations, peak = measure(CASES[name], graph, seed, repeat)
+                result = {
+                    "graph": kind,
+                    "nodes": len(graph),
+                    "edges": graph.edge_count,
+                    "case": name,
+                    "seconds": seconds,
+                    "operations": operations,
+                    "us_per_op": seconds / max(operations, 1) * 1e6,
+                    "peak_kib": peak,
+                    "build_seconds": build_seconds,
+                }
+                results.append(result)
+                report(f"{kind:<11}{len(graph):>9}{graph.edge_count:>9}  {name:<12}{seconds:>10.4f}"
+                       f"{result['us_per_op']:>10.2f}{peak:>10.0f}")
+    return results
+
+
+def peak_rss_kib():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS
+
+
+def save_json(path, results, settings):
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": algorithms.HAVE_NUMPY,
+        "peak_rss_kib": peak_rss_kib(),
+        "settings": settings,
+    }
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+
+
+def save_csv(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else ["case"])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare(results, baseline_path, threshold, report=print):
+    # Returns the number of cases slower than baseline by more than threshold
+    with open(baseline_path) as f:
+        baseline = {(r["graph"], r["nodes"], r["case"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    report(f"\n{'graph':<11}{'nodes':>9}  {'case':<12}{'baseline':>10}{'now':>10}{'ratio':>8}")
+    for result in results:
+        old = baseline.get((result["graph"], result["nodes"], result["case"]))
+        if old is None:
+            continue
+        ratio = result["seconds"] / old["seconds"] if old["seconds"] else float('inf')
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  slower"
+            regressions += 1
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        report(f"{result['graph']:<11}{result['nodes']:>9}  {result['case']:<12}{old['seconds']:>10.4f}"
+               f"{result['seconds']:>10.4f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def parse_list(text, choices=None):
+    items = [item.strip() for item in text.split(",") if item.strip()]
+    if choices is not None:
+        unknown = [item for item in items if item not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown {unknown}; choose from {', '.join(choices)}")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Graph engine benchmarks")
+    parser.add_argument("--graphs", type=lambda text: parse_list(text, GRAPHS), default=list(GRAPHS),
+                        help="comma-separated graph types: " + ", ".join(GRAPHS))
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in parse_list(text)],
+                        default=[1000, 10000], help="comma-separated node counts")
+    parser.add_argument("--cases", type=lambda text: parse_list(text, CASES), default=list(CASES),
+                        help="comma-separated cases: " + ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results and run metadata to this file")
+    parser.add_argument("--csv", help="write results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown ratio above 1 counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.graphs, args.sizes, args.cases, max(1, args.repeat), args.seed)
+    settings = {"graphs": args.graphs, "sizes": args.sizes, "cases": args.cases,
+                "repeat": args.repeat, "seed": args.seed}
+    if args.json:
+        save_json(args.json, results, settings)
+    if args.csv:
+        save_csv(args.csv, results)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} cases slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import sys
+import time
+from collections import deque
+
+import algorithms
+from benchmarks import chain_graph, grid_graph
+
+# Traversal scaling benchmark: BFS and DFS on chain and grid graphs from 10^5
+# to 10^6 nodes.  Time per node should stay flat if the traversals are linear.
+# With NumPy the frontier-based bfs_levels (no trace) is timed as well.
+#
+#   python -m benchmarks.traversal [max_nodes]
+
+
+def consume(events):
+    deque(events, maxlen=0)
+
+
+def time_traversal(algorithm, graph, start_node):
+    graph.csr()  # compact outside the timed region
+    started = time.perf_counter()
+    consume(algorithm(graph, start_node))
+    return time.perf_counter() - started
+
+
+def main(max_nodes=1_000_000):
+    sizes = [n for n in (100_000, 250_000, 500_000, 1_000_000) if n <= max_nodes]
+    print(f"{'graph':<8}{'nodes':>10}{'edges':>10}{'algorithm':>10}{'seconds':>10}{'ns/node':>10}")
+    for name in ("chain", "grid"):
+        for size in sizes:
+            if name == "chain":
+                graph = chain_graph(size)
+            else:
+                side = int(size ** 0.5)
+                graph = grid_graph(side)
+            traversals = [("bfs", algorithms.bfs), ("dfs", algorithms.dfs)]
+            if algorithms.HAVE_NUMPY:
+                traversals.append(("levels", algorithms.bfs_levels))
+            for label, algorithm in traversals:
+                seconds = time_traversal(algorithm, graph, 0)
+                print(f"{name:<8}{len(graph):>10}{graph.edge_count:>10}{label:>10}"
+                      f"{seconds:>10.3f}{seconds / len(graph) * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
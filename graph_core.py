@@ -0,0 +1,594 @@
+import array
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Mapping
+
+# Headless graph storage shared by the GUI, the algorithms and batch jobs.
+#
+# Adjacency is undirected (every edge is visible from both endpoints) but each
+# edge remembers the direction it was created in, matching the arrows drawn by
+# GraphVisualizer.create_edge.
+#
+# Layout:
+#   * a compressed sparse row (CSR) base: _offsets[u].._offsets[u+1] index into
+#     the parallel _targets / _weights / _tails arrays, kept in insertion order;
+#     _by_target holds the same slots sorted by target so edge lookups are a
+#     binary search within one node's slice
+#   * a small mutable delta layer on top of it for interactive edits:
+#       _added      node -> {neighbor: (weight, is_tail)}
+#       _removed    canonical (min, max) keys of base edges that were deleted
+#       _reweighted canonical key -> new weight for base edges
+# Deleted nodes are only marked dead in _alive; their base entries are skipped
+# until the next compact() folds the delta back into fresh CSR arrays.
+#
+# Edge lookup and deletion cost O(log degree) on the base and O(1) in the delta;
+# deleting a node costs O(degree) and never scans the rest of the graph.
+#
+# A compacted edge takes 34 bytes: two slots (one per direction) of a 4-byte
+# target, an 8-byte weight, a 4-byte _by_target entry and a tail flag.  That
+# is about a fifth of the tuple-per-edge dicts this replaced, not a tenth:
+# float64 keeps imported weights exact and _by_target pays for the indexed
+# lookup.
+#
+# Every structural edit bumps version and is appended to a bounded change log,
+# so caches keyed on a version can find out exactly what changed since:
+#   (version, ADD_NODE, node)
+#   (version, REMOVE_NODE, node)           after REMOVE_EDGE for its edges
+#   (version, ADD_EDGE, tail, head, weight)
+#   (version, REMOVE_EDGE, tail, head, weight)
+#   (version, SET_WEIGHT, node1, node2, old weight, new weight)
+# Bulk loads, clear() and restore() restart the log.  Position changes are not
+# logged; they bump position_version instead, so values derived from the
+# drawing can tell when to recompute.
+
+MIN_DELTA_BEFORE_COMPACT = 1024
+CHANGE_LOG_LIMIT = 4096
+
+ADD_NODE = "add_node"
+REMOVE_NODE = "remove_node"
+ADD_EDGE = "add_edge"
+REMOVE_EDGE = "remove_edge"
+SET_WEIGHT = "set_weight"
+
+
+def edge_key(node1, node2):
+    return (node1, node2) if node1 < node2 else (node2, node1)
+
+
+def build_csr(node_count, tails, heads, weights):
+    # Counting sort of an edge list into the undirected CSR arrays used by
+    # Graph.  Each node keeps its neighbours in edge order; self-loops and
+    # repeats of an already seen pair (in either direction) are dropped.
+    # Returns (offsets, targets, weights, tail_flags, by_target).
+    degree = array.array('q', bytes(8 * (node_count + 1)))
+    for node1, node2 in zip(tails, heads):
+        if node1 != node2:
+            degree[node1] += 1
+            degree[node2] += 1
+    offsets = array.array('q', [0])
+    total = 0
+    for node in range(node_count):
+        total += degree[node]
+        offsets.append(total)
+
+    cursor = array.array('q', offsets)
+    targets = array.array('i', bytes(4 * total))
+    slot_weights = array.array('d', bytes(8 * total))
+    tail_flags = bytearray(total)
+    edge_of = array.array('i', bytes(4 * total))
+    for i, (node1, node2, weight) in enumerate(zip(tails, heads, weights)):
+        if node1 == node2:
+            continue
+        slot = cursor[node1]
+        cursor[node1] = slot + 1
+        targets[slot] = node2
+        slot_weights[slot] = weight
+        tail_flags[slot] = 1
+        edge_of[slot] = i
+        slot = cursor[node2]
+        cursor[node2] = slot + 1
+        targets[slot] = node1
+        slot_weights[slot] = weight
+        edge_of[slot] = i
+    del cursor
+
+    # Slots sorted by target per node; the sort is stable so the first edge of
+    # a repeated pair comes first
+    by_target = array.array('i')
+    duplicates = None
+    for node in range(node_count):
+        order = sorted(range(offsets[node], offsets[node + 1]), key=targets.__getitem__)
+        for previous, slot in zip(order, order[1:]):
+            if targets[previous] == targets[slot]:
+                if duplicates is None:
+                    duplicates = bytearray(len(tails))
+                duplicates[edge_of[slot]] = 1
+        by_target.extend(order)
+
+    if duplicates is not None:
+        keep = [i for i in range(len(tails)) if not duplicates[i]]
+        return build_csr(node_count,
+                         array.array('i', (tails[i] for i in keep)),
+                         array.array('i', (heads[i] for i in keep)),
+                         array.array('d', (weights[i] for i in keep)))
+    return offsets, targets, slot_weights, tail_flags, by_target
+
+
+class PositionView(Mapping):
+    # dict-like node -> (x, y) view over the coordinate arrays of a Graph
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        if node not in self._graph:
+            raise KeyError(node)
+        return (self._graph._xs[node], self._graph._ys[node])
+
+    def __setitem__(self, node, position):
+        if node not in self._graph:
+            raise KeyError(node)
+        self._graph._xs[node], self._graph._ys[node] = position
+        self._graph.position_version += 1
+
+    def __iter__(self):
+        return self._graph.nodes()
+
+    def __len__(self):
+        return len(self._graph)
+
+    def __contains__(self, node):
+        return node in self._graph
+
+
+def _copy_array(values, typecode):
+    # Copies an array or memoryview of the given type without boxing items
+    copy = array.array(typecode)
+    copy.frombytes(memoryview(values).cast('B'))
+    return copy
+
+
+class Graph:
+    def __init__(self):
+        self.positions = PositionView(self)
+        self.version = 0
+        self.position_version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_LIMIT)
+        self._capture = None  # unbounded copy of the log while capturing
+        self.clear()
+
+    def clear(self):
+        # Node storage, indexed by node id. Ids are never reused until clear().
+        self.node_count = 0
+        self.edge_count = 0
+        self._live_nodes = 0
+        self._alive = bytearray()
+        self._xs = array.array('d')
+        self._ys = array.array('d')
+
+        # CSR base
+        self._offsets = array.array('q', [0])
+        self._targets = array.array('i')
+        self._weights = array.array('d')
+        self._tails = bytearray()
+        self._by_target = array.array('i')
+
+        # Delta layer
+        self._added = {}
+        self._removed = set()
+        self._reweighted = {}
+        self._delta_size = 0
+        self._dead_since_compact = False  # some base entries point at deleted nodes
+        self._mapping = None  # keeps an mmap alive while the base arrays view it
+        self._restart_log()
+
+    def load_csr(self, xs, ys, offsets, targets, weights, tails, by_target, alive=None, mapping=None):
+        # Replaces the whole graph with prebuilt base arrays, e.g. from
+        # build_csr() or a memory-mapped file; the base arrays may be any
+        # buffer-backed sequences (array, memoryview)
+        self.clear()
+        node_count = len(offsets) - 1
+        self._alive = bytearray(alive) if alive is not None else bytearray(b"\x01" * node_count)
+        self._xs = array.array('d', xs)
+        self._ys = array.array('d', ys)
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        self._tails = tails
+        self._by_target = by_target
+        self._mapping = mapping
+        self.node_count = node_count
+        self._live_nodes = self._alive.count(1)
+        self.edge_count = len(targets) // 2
+
+    def __len__(self):
+        return self._live_nodes
+
+    def __contains__(self, node):
+        return isinstance(node, int) and 0 <= node < self.node_count and self._alive[node] == 1
+
+    def __iter__(self):
+        return self.nodes()
+
+    def nodes(self):
+        alive = self._alive
+        return (node for node in range(self.node_count) if alive[node])
+
+    # Node editing
+    def add_node(self, x=0.0, y=0.0):
+        node_id = self.node_count
+        self._alive.append(1)
+        self._xs.append(x)
+        self._ys.append(y)
+        self.node_count += 1
+        self._live_nodes += 1
+        self._record(ADD_NODE, node_id)
+        return node_id
+
+    def restore_node(self, node):
+        # Brings a removed node back under its old id and position, without
+        # its edges (undo re-adds those one by one)
+        if not (isinstance(node, int) and 0 <= node < self.node_count) or self._alive[node]:
+            raise KeyError(node)
+        # Base entries left over from before the removal must stay hidden
+        offsets = self._offsets
+        if node < len(offsets) - 1:
+            targets = self._targets
+            for i in range(offsets[node], offsets[node + 1]):
+                key = edge_key(node, targets[i])
+                if key not in self._removed:
+                    self._removed.add(key)
+                    self._reweighted.pop(key, None)
+                    self._delta_size += 1
+        self._alive[node] = 1
+        self._live_nodes += 1
+        self._record(ADD_NODE, node)
+        self._maybe_compact()
+
+    def remove_node(self, node):
+        # Returns the removed edges as (tail, head, weight) tuples
+        if node not in self:
+            raise KeyError(node)
+        return self.remove_nodes((node,))
+
+    def remove_nodes(self, nodes):
+        # Bulk delete in O(sum of degrees); unknown ids are ignored.  Returns
+        # every removed edge once as (tail, head, weight).
+        doomed = {node for node in nodes if node in self}
+        removed = []
+        for node in doomed:
+            for neighbor, weight, is_tail in self._entries(node):
+                if neighbor in doomed and neighbor < node:
+                    continue  # reported from the other endpoint
+                removed.append((node, neighbor, weight) if is_tail else (neighbor, node, weight))
+        added = self._added
+        for node in doomed:
+            for neighbor in added.pop(node, ()):
+                other = added.get(neighbor)
+                if other is not None and node in other:
+                    del other[node]
+                    self._delta_size -= 1
+            self._alive[node] = 0
+        if doomed:
+            self._dead_since_compact = True
+        self._live_nodes -= len(doomed)
+        self.edge_count -= len(removed)
+        for tail, head, weight in removed:
+            self._record(REMOVE_EDGE, tail, head, weight)
+        for node in doomed:
+            self._record(REMOVE_NODE, node)
+        return removed
+
+    # Edge editing
+    def add_edge(self, node1, node2, weight=1):
+        if node1 not in self:
+            raise KeyError(node1)
+        if node2 not in self:
+            raise KeyError(node2)
+        if node1 == node2:
+            raise ValueError("Cannot connect node to itself")
+        if self.has_edge(node1, node2):
+            raise ValueError("Edge already exists")
+        self._added.setdefault(node1, {})[node2] = (weight, True)
+        self._added.setdefault(node2, {})[node1] = (weight, False)
+        self.edge_count += 1
+        self._delta_size += 1
+        self._record(ADD_EDGE, node1, node2, weight)
+        self._maybe_compact()
+
+    def add_edges(self, edges):
+        # Bulk insert of (tail, head, weight) triples with a single compaction
+        # at the end; invalid and duplicate edges raise like add_edge
+        added = self._added
+        count = 0
+        for node1, node2, weight in edges:
+            if node1 not in self:
+                raise KeyError(node1)
+            if node2 not in self:
+                raise KeyError(node2)
+            if node1 == node2:
+                raise ValueError("Cannot connect node to itself")
+            if node2 in added.get(node1, ()) or self._base_weight(node1, node2) is not None:
+                raise ValueError("Edge already exists")
+            added.setdefault(node1, {})[node2] = (weight, True)
+            added.setdefault(node2, {})[node1] = (weight, False)
+            count += 1
+        self.edge_count += count
+        self._delta_size += count
+        self._restart_log()
+        self.compact()
+
+    def remove_edge(self, node1, node2):
+        # Returns the weight of the removed edge
+        added = self._added.get(node1)
+        if added is not None and node2 in added:
+            weight, _ = added.pop(node2)
+            del self._added[node2][node1]
+            self._delta_size -= 1
+        else:
+            weight = self._base_weight(node1, node2)
+            if weight is None or node1 not in self or node2 not in self:
+                raise KeyError((node1, node2))
+            key = edge_key(node1, node2)
+            weight = self._reweighted.pop(key, weight)
+            self._removed.add(key)
+            self._delta_size += 1
+        self.edge_count -= 1
+        self._record(REMOVE_EDGE, node1, node2, weight)
+        self._maybe_compact()
+        return weight
+
+    def set_weight(self, node1, node2, weight):
+        added = self._added.get(node1)
+        if added is not None and node2 in added:
+            old = added[node2][0]
+            added[node2] = (weight, added[node2][1])
+            other = self._added[node2]
+            other[node1] = (weight, other[node1][1])
+            self._record(SET_WEIGHT, node1, node2, old, weight)
+            return
+        old = self.weight(node1, node2)  # raises KeyError for a missing edge
+        key = edge_key(node1, node2)
+        if key not in self._reweighted:
+            self._delta_size += 1
+        self._reweighted[key] = weight
+        self._record(SET_WEIGHT, node1, node2, old, weight)
+        self._maybe_compact()
+
+    # Checkpoints for undo.  The CSR base arrays are never written in place
+    # (compact() replaces them), so a checkpoint shares them and copies only
+    # the per-node arrays and the delta layer.
+    def checkpoint(self):
+        return (self.node_count, self.edge_count, self._live_nodes, bytes(self._alive),
+                self._xs.tobytes(), self._ys.tobytes(),
+                self._offsets, self._targets, self._weights, self._tails, self._by_target,
+                {node: dict(entries) for node, entries in self._added.items()},
+                frozenset(self._removed), dict(self._reweighted),
+                self._delta_size, self._dead_since_compact, self._mapping)
+
+    def restore(self, checkpoint):
+        # Returns the graph to a checkpoint; the change log restarts
+        (self.node_count, self.edge_count, self._live_nodes, alive, xs, ys,
+         self._offsets, self._targets, self._weights, self._tails, self._by_target,
+         added, removed, reweighted, self._delta_size, self._dead_since_compact, self._mapping) = checkpoint
+        self._alive = bytearray(alive)
+        self._xs = array.array('d')
+        self._xs.frombytes(xs)
+        self._ys = array.array('d')
+        self._ys.frombytes(ys)
+        self._added = {node: dict(entries) for node, entries in added.items()}
+        self._removed = set(removed)
+        self._reweighted = dict(reweighted)
+        self._restart_log()
+
+    # Change log
+    def changes_since(self, version):
+        # Changes made after version, oldest first, or None when the log no
+        # longer reaches back that far
+        changes = self._changes
+        if version < self._log_start or (changes and changes[0][0] > version + 1):
+            return None
+        return [change for change in changes if change[0] > version]
+
+    def start_capture(self):
+        # Keeps every change from now on, however many, until stop_capture();
+        # for callers such as the undo journal that must not lose records to
+        # the bounded log
+        self._capture = []
+
+    def stop_capture(self):
+        # The changes since start_capture(), oldest first, or None when the
+        # log was restarted (clear, load, restore) in between
+        captured, self._capture = self._capture, None
+        return captured
+
+    def _record(self, *change):
+        self.version += 1
+        self._changes.append((self.version,) + change)
+        if self._capture is not None:
+            self._capture.append((self.version,) + change)
+
+    def _restart_log(self):
+        self.version += 1
+        self._changes.clear()
+        self._log_start = self.version
+        self._capture = None
+
+    # Queries
+    def has_edge(self, node1, node2):
+        if node1 not in self or node2 not in self:
+            return False
+        added = self._added.get(node1)
+        if added is not None and node2 in added:
+            return True
+        return self._base_weight(node1, node2) is not None
+
+    def weight(self, node1, node2):
+        added = self._added.get(node1)
+        if added is not None and node2 in added:
+            return added[node2][0]
+        if node1 in self and node2 in self:
+            weight = self._base_weight(node1, node2)
+            if weight is not None:
+                return self._reweighted.get(edge_key(node1, node2), weight)
+        raise KeyError((node1, node2))
+
+    def bounds(self):
+        # (min_x, min_y, max_x, max_y) over live nodes, or None when empty
+        if not self._live_nodes:
+            return None
+        xs, ys = self._xs, self._ys
+        if self._live_nodes == self.node_count:
+            return min(xs), min(ys), max(xs), max(ys)
+        live = list(self.nodes())
+        return (min(xs[n] for n in live), min(ys[n] for n in live),
+                max(xs[n] for n in live), max(ys[n] for n in live))
+
+    def coordinate_arrays(self):
+        # The x and y arrays indexed by node id, for bulk position writers
+        # such as layouts, which call positions_changed() after writing;
+        # entries of dead nodes are ignored
+        return self._xs, self._ys
+
+    def positions_changed(self):
+        self.position_version += 1
+
+    def neighbors(self, node):
+        # Yields (neighbor, weight) pairs in insertion order
+        for neighbor, weight, _ in self._entries(node):
+            yield neighbor, weight
+
+    def degree(self, node):
+        return sum(1 for _ in self._entries(node))
+
+    def incident_edges(self, node):
+        # Yields (tail, head, weight) for every edge touching node
+        for neighbor, weight, is_tail in self._entries(node):
+            if is_tail:
+                yield node, neighbor, weight
+            else:
+                yield neighbor, node, weight
+
+    def edges(self):
+        # Yields every edge once as (tail, head, weight)
+        for node in self.nodes():
+            for neighbor, weight, is_tail in self._entries(node):
+                if is_tail:
+                    yield node, neighbor, weight
+
+    def csr(self):
+        # Folds the delta layer in and returns the (offsets, targets, weights)
+        # arrays; offsets has node_count + 1 entries and dead nodes are empty.
+        if self._delta_size or len(self._offsets) != self.node_count + 1 or self._dead_since_compact:
+            self.compact()
+        return self._offsets, self._targets, self._weights
+
+    def csr_tails(self):
+        # Per-slot flags parallel to csr() targets: 1 where the slot's node is
+        # the edge's tail, i.e. the edge points from it to the target
+        self.csr()
+        return self._tails
+
+    def base_arrays(self):
+        # Compacted storage arrays by name, for serialisation
+        self.csr()
+        return {
+            "xs": self._xs,
+            "ys": self._ys,
+            "alive": self._alive,
+            "offsets": self._offsets,
+            "targets": self._targets,
+            "by_target": self._by_target,
+            "weights": self._weights,
+            "tails": self._tails,
+        }
+
+    def snapshot(self):
+        # Independent compacted copy that later edits to this graph do not
+        # touch, so it can be read from a worker thread or pickled to a worker
+        # process while the GUI keeps editing
+        arrays = self.base_arrays()
+        copy = Graph()
+        copy.load_csr(arrays["xs"], arrays["ys"],
+                      _copy_array(arrays["offsets"], 'q'), _copy_array(arrays["targets"], 'i'),
+                      _copy_array(arrays["weights"], 'd'), bytearray(arrays["tails"]),
+                      _copy_array(arrays["by_target"], 'i'), alive=arrays["alive"])
+        copy.version = copy._log_start = self.version
+        return copy
+
+    def memory_usage(self):
+        # Approximate bytes held by the compact arrays (excludes the delta layer)
+        arrays = (self._alive, self._xs, self._ys, self._offsets,
+                  self._targets, self._weights, self._tails, self._by_target)
+        return sum(len(a) * (a.itemsize if hasattr(a, "itemsize") else 1) for a in arrays)
+
+    # Compaction
+    def compact(self):
+        offsets = array.array('q', [0])
+        targets = array.array('i')
+        weights = array.array('d')
+        tails = bytearray()
+        by_target = array.array('i')
+        alive = self._alive
+        for node in range(self.node_count):
+            start = len(targets)
+            if alive[node]:
+                for neighbor, weight, is_tail in self._entries(node):
+                    targets.append(neighbor)
+                    weights.append(weight)
+                    tails.append(is_tail)
+            by_target.extend(sorted(range(start, len(targets)), key=targets.__getitem__))
+            offsets.append(len(targets))
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        self._tails = tails
+        self._by_target = by_target
+        self._mapping = None
+        self._added = {}
+        self._removed = set()
+        self._reweighted = {}
+        self._delta_size = 0
+        self._dead_since_compact = False
+
+    def _maybe_compact(self):
+        if self._delta_size > max(MIN_DELTA_BEFORE_COMPACT, len(self._targets) // 4):
+            self.compact()
+
+    def _entries(self, node):
+        alive = self._alive
+        offsets = self._offsets
+        if node < len(offsets) - 1:
+            targets = self._targets
+            weights = self._weights
+            tails = self._tails
+            removed = self._removed
+            reweighted = self._reweighted
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[i]
+                if not alive[neighbor]:
+                    continue
+                weight = weights[i]
+                if removed or reweighted:
+                    key = (node, neighbor) if node < neighbor else (neighbor, node)
+                    if key in removed:
+                        continue
+                    weight = reweighted.get(key, weight)
+                yield neighbor, weight, tails[i] == 1
+        added = self._added.get(node)
+        if added:
+            for neighbor, (weight, is_tail) in added.items():
+                yield neighbor, weight, is_tail
+
+    def _base_weight(self, node1, node2):
+        offsets = self._offsets
+        if node1 >= len(offsets) - 1:
+            return None
+        targets = self._targets
+        by_target = self._by_target
+        lo, hi = offsets[node1], offsets[node1 + 1]
+        i = bisect_left(by_target, node2, lo, hi, key=targets.__getitem__)
+        if i == hi or targets[by_target[i]] != node2:
+            return None
+        if self._removed and edge_key(node1, node2) in self._removed:
+            return None
+        return self._weights[by_target[i]]
@@ -0,0 +1,406 @@
+import array
+import json
+import mmap
+import struct
+
+from graph_core import build_csr
+
+# Import and export of graphs in three formats:
+#
+#   edge list / CSV   one "tail head [weight]" per line, separated by
+#                     whitespace or commas; '#' starts a comment
+#   JSON              {"nodes": [{"id", "x", "y"}...],
+#                      "edges": [{"source", "target", "weight"}...]}
+#   binary (.gvb)     the Graph's CSR arrays behind a small header, laid out
+#                     so that load_binary can memory-map them directly
+#
+# The text readers stream: they collect edges into flat arrays (16 bytes per
+# edge) and build the CSR in one pass, so the file contents are never held in
+# memory as Python objects.  Node labels that are non-negative integers stay
+# the node ids, with the ids in between left as deleted nodes, so that a
+# save/load round trip keeps ids; other labels (or integers spread too thinly)
+# are numbered densely in order of first appearance.  Each loader returns the
+# id -> label list.
+
+READ_CHUNK = 1 << 20
+INTEGER_ID_SLACK = 4  # integer labels stay ids while max label < slack * nodes + 1024
+
+BINARY_MAGIC = b"GAVBIN01"
+# magic, byte order mark, node count, slot count (2 * edges); everything is in
+# native byte order and the mark catches files from the other endianness
+BINARY_HEADER = struct.Struct("=8sIqq")
+BYTE_ORDER_MARK = 0x01020304
+
+
+class GraphFormatError(ValueError):
+    pass
+
+
+class _EdgeCollector:
+    # Accumulates edges and node labels for one import
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+        self.xs = array.array('d')
+        self.ys = array.array('d')
+        self.tails = array.array('i')
+        self.heads = array.array('i')
+        self.weights = array.array('d')
+
+    def node(self, label, x=None, y=None):
+        node = self.ids.get(label)
+        if node is None:
+            node = self.ids[label] = len(self.labels)
+            self.labels.append(label)
+            self.xs.append(0.0)
+            self.ys.append(0.0)
+        if x is not None:
+            self.xs[node] = x
+            self.ys[node] = y
+        return node
+
+    def edge(self, tail_label, head_label, weight):
+        self.tails.append(self.node(tail_label))
+        self.heads.append(self.node(head_label))
+        self.weights.append(weight)
+
+    def load_into(self, graph):
+        labels = self.labels
+        if labels and all(type(label) is int and label >= 0 for label in labels):
+            node_count = max(labels) + 1
+            if node_count < INTEGER_ID_SLACK * len(labels) + 1024:
+                return self._load_by_label(graph, node_count)
+        offsets, targets, weights, tails, by_target = build_csr(
+            len(labels), self.tails, self.heads, self.weights)
+        graph.load_csr(self.xs, self.ys, offsets, targets, weights, tails, by_target)
+        return labels
+
+    def _load_by_label(self, graph, node_count):
+        # Integer labels become the ids; ids without a label are dead
+        labels = self.labels
+        alive = bytearray(node_count)
+        xs = array.array('d', bytes(8 * node_count))
+        ys = array.array('d', bytes(8 * node_count))
+        for node, label in enumerate(labels):
+            alive[label] = 1
+            xs[label] = self.xs[node]
+            ys[label] = self.ys[node]
+        tails = array.array('i', (labels[node] for node in self.tails))
+        heads = array.array('i', (labels[node] for node in self.heads))
+        offsets, targets, weights, tail_flags, by_target = build_csr(node_count, tails, heads, self.weights)
+        graph.load_csr(xs, ys, offsets, targets, weights, tail_flags, by_target, alive=alive)
+        return list(range(node_count))
+
+
+def _parse_label(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+# Edge list / CSV
+def load_edge_list(graph, path, default_weight=1):
+    # The first line is a header when its weight does not parse, or when
+    # neither of its labels is a number but the next line's labels are
+    collector = _EdgeCollector()
+    first = True
+    maybe_header = None  # first line with two non-numeric labels
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = line.replace(",", " ").split()
+            if len(fields) < 2:
+                raise GraphFormatError(f"{path}:{line_number}: expected 'tail head [weight]'")
+            if first:
+                first = False
+                if len(fields) > 2 and not _is_number(fields[2]):
+                    continue  # CSV header row
+                if not _is_number(fields[0]) and not _is_number(fields[1]):
+                    maybe_header = (line_number, fields)
+                    continue
+            elif maybe_header is not None:
+                if not (_is_number(fields[0]) and _is_number(fields[1])):
+                    _add_edge_line(collector, path, *maybe_header, default_weight)
+                maybe_header = None
+            _add_edge_line(collector, path, line_number, fields, default_weight)
+    if maybe_header is not None:
+        _add_edge_line(collector, path, *maybe_header, default_weight)
+    return collector.load_into(graph)
+
+
+def _add_edge_line(collector, path, line_number, fields, default_weight):
+    try:
+        weight = float(fields[2]) if len(fields) > 2 else default_weight
+    except ValueError:
+        raise GraphFormatError(f"{path}:{line_number}: invalid weight {fields[2]!r}")
+    collector.edge(_parse_label(fields[0]), _parse_label(fields[1]), weight)
+
+
+def save_edge_list(graph, path, delimiter=" "):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# tail head weight\n")
+        for node1, node2, weight in graph.edges():
+            f.write(f"{node1}{delimiter}{node2}{delimiter}{weight:g}\n")
+
+
+# JSON
+def load_json(graph, path):
+    collector = _EdgeCollector()
+    with open(path, "r", encoding="utf-8") as f:
+        for key, items in _iter_top_level_arrays(f):
+            if key == "nodes":
+                for index, item in enumerate(items):
+                    where = f"{path}: nodes[{index}]"
+                    collector.node(_json_label(where, item, "id"),
+                                   _json_number(where, item, "x", 0.0), _json_number(where, item, "y", 0.0))
+            elif key == "edges":
+                for index, item in enumerate(items):
+                    where = f"{path}: edges[{index}]"
+                    collector.edge(_json_label(where, item, "source"), _json_label(where, item, "target"),
+                                   _json_number(where, item, "weight", 1.0))
+            else:
+                for _ in items:
+                    pass
+    return collector.load_into(graph)
+
+
+def _json_label(where, item, field):
+    if not isinstance(item, dict):
+        raise GraphFormatError(f"{where}: expected an object, got {type(item).__name__}")
+    if field not in item:
+        raise GraphFormatError(f"{where}: missing {field!r}")
+    label = item[field]
+    if isinstance(label, bool) or not isinstance(label, (int, float, str)):
+        raise GraphFormatError(f"{where}: invalid {field!r} {label!r}")
+    return label
+
+
+def _json_number(where, item, field, default):
+    value = item.get(field, default)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise GraphFormatError(f"{where}: invalid {field!r} {value!r}")
+
+
+def save_json(graph, path):
+    # One node/edge object per line, written as the graph is walked
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"nodes": [\n')
+        first = True
+        for node in graph.nodes():
+            x, y = graph.positions[node]
+            f.write(("" if first else ",\n") + json.dumps({"id": node, "x": x, "y": y}))
+            first = False
+        f.write('\n],\n"edges": [\n')
+        first = True
+        for node1, node2, weight in graph.edges():
+            f.write(("" if first else ",\n") + json.dumps({"source": node1, "target": node2, "weight": weight}))
+            first = False
+        f.write("\n]}\n")
+
+
+class _JsonStream:
+    # Minimal pull reader over a text file for JSON with large top-level arrays
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise GraphFormatError(f"expected {char!r} in JSON input")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill():
+                    raise GraphFormatError("truncated or invalid JSON input")
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_top_level_arrays(f):
+    # Yields (key, iterator over array items) for each member of the top-level
+    # object; non-array values are yielded as a one-item iterator
+    stream = _JsonStream(f)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if stream.peek() == "[":
+            stream.expect("[")
+            items = _iter_array(stream)
+            yield key, items
+            for _ in items:  # drain whatever the caller did not consume
+                pass
+        else:
+            yield key, iter((stream.value(),))
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("}")
+        return
+
+
+def _iter_array(stream):
+    if stream.peek() == "]":
+        stream.expect("]")
+        return
+    while True:
+        yield stream.value()
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("]")
+        return
+
+
+# Binary
+#
+# Header, then 8-byte aligned sections in this order:
+#   xs (d * n), ys (d * n), alive (n bytes), offsets (q * (n + 1)),
+#   targets (i * slots), by_target (i * slots), weights (d * slots),
+#   tails (slots bytes)
+def _sections(node_count, slot_count):
+    layout = [
+        ("xs", 'd', node_count),
+        ("ys", 'd', node_count),
+        ("alive", 'B', node_count),
+        ("offsets", 'q', node_count + 1),
+        ("targets", 'i', slot_count),
+        ("by_target", 'i', slot_count),
+        ("weights", 'd', slot_count),
+        ("tails", 'B', slot_count),
+    ]
+    position = BINARY_HEADER.size
+    for name, typecode, count in layout:
+        position = (position + 7) & ~7
+        size = count * array.array(typecode).itemsize
+        yield name, typecode, position, size
+        position += size
+
+
+def binary_size(graph):
+    slot_count = len(graph.base_arrays()["targets"])
+    *_, (_, _, position, size) = _sections(graph.node_count, slot_count)
+    return position + size
+
+
+def save_binary(graph, path):
+    arrays = graph.base_arrays()
+    node_count = graph.node_count
+    slot_count = len(arrays["targets"])
+    with open(path, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BYTE_ORDER_MARK, node_count, slot_count))
+        for name, _, position, size in _sections(node_count, slot_count):
+            f.write(b"\0" * (position - f.tell()))
+            data = memoryview(arrays[name]).cast('B')
+            if len(data) != size:
+                raise GraphFormatError(f"unexpected size for {name}")
+            f.write(data)
+
+
+def pack_binary(graph, buffer):
+    # Writes the binary format into a writable buffer of binary_size() bytes,
+    # e.g. a shared memory block
+    arrays = graph.base_arrays()
+    node_count = graph.node_count
+    slot_count = len(arrays["targets"])
+    BINARY_HEADER.pack_into(buffer, 0, BINARY_MAGIC, BYTE_ORDER_MARK, node_count, slot_count)
+    view = memoryview(buffer).cast('B')
+    for name, _, position, size in _sections(node_count, slot_count):
+        view[position:position + size] = memoryview(arrays[name]).cast('B')
+
+
+def load_binary(graph, path):
+    # Maps the file copy-on-write: the adjacency arrays are views straight
+    # into the page cache, and later edits go to the delta layer as usual
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return unpack_binary(graph, mapping, path, mapping=mapping)
+
+
+def unpack_binary(graph, buffer, source, mapping=None):
+    # Loads graph from a buffer in the binary format without copying the
+    # adjacency arrays; mapping is kept alive by the graph
+    if len(buffer) < BINARY_HEADER.size:
+        raise GraphFormatError(f"{source}: file too short")
+    magic, byte_order, node_count, slot_count = BINARY_HEADER.unpack_from(buffer, 0)
+    if magic != BINARY_MAGIC:
+        raise GraphFormatError(f"{source}: not a graph binary file")
+    if byte_order != BYTE_ORDER_MARK:
+        raise GraphFormatError(f"{source}: written on a machine with different byte order")
+    view = memoryview(buffer)
+    sections = {}
+    for name, typecode, position, size in _sections(node_count, slot_count):
+        if position + size > len(buffer):
+            raise GraphFormatError(f"{source}: truncated file")
+        sections[name] = view[position:position + size].cast(typecode)
+    graph.load_csr(sections["xs"], sections["ys"], sections["offsets"], sections["targets"],
+                   sections["weights"], sections["tails"], sections["by_target"],
+                   alive=sections["alive"], mapping=mapping)
+    return list(range(node_count))
+
+
+# Format dispatch by file extension
+LOADERS = {".json": load_json, ".gvb": load_binary}
+SAVERS = {".json": save_json, ".gvb": save_binary}
+
+
+def load_graph(graph, path):
+    return LOADERS.get(_extension(path), load_edge_list)(graph, path)
+
+
+def save_graph(graph, path):
+    if _extension(path) == ".csv":
+        save_edge_list(graph, path, delimiter=",")
+    else:
+        SAVERS.get(_extension(path), save_edge_list)(graph, path)
+
+
+def _extension(path):
+    dot = path.rfind(".")
+    return path[dot:].lower() if dot != -1 else ""
+
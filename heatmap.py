@@ -0,0 +1,113 @@
+import tkinter as tk
+
+# Distance matrix heatmap in its own window.
+#
+# The matrix is drawn as one PhotoImage: at most MAX_CELLS rows and columns
+# are sampled evenly, coloured on a gradient from near (dark) to far (bright)
+# and zoomed up to the window size, so even a few thousand nodes cost a single
+# image put() rather than one canvas item per cell.  Hovering shows the pair
+# under the pointer.
+
+MAX_CELLS = 160
+IMAGE_SIZE = 480  # px
+# Gradient stops from distance 0 to the largest finite distance
+GRADIENT = ["#1E1E2E", "#45475A", "#89B4FA", "#A6E3A1", "#F9E2AF", "#F38BA8"]
+LEVELS = 64
+UNREACHABLE_COLOR = "#000000"
+
+
+def _blend(color1, color2, t):
+    rgb1 = [int(color1[i:i + 2], 16) for i in (1, 3, 5)]
+    rgb2 = [int(color2[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(a + (b - a) * t):02x}" for a, b in zip(rgb1, rgb2))
+
+
+def _palette(levels):
+    spans = len(GRADIENT) - 1
+    colors = []
+    for level in range(levels):
+        position = level / (levels - 1) * spans
+        span = min(int(position), spans - 1)
+        colors.append(_blend(GRADIENT[span], GRADIENT[span + 1], position - span))
+    return colors
+
+
+PALETTE = _palette(LEVELS)
+
+
+class HeatmapPanel:
+    def __init__(self, root, style, on_export):
+        # style: dict with bg_color, panel_color, text_color, button_color;
+        # on_export() is called by the window's Export button
+        self.root = root
+        self.style = style
+        self.on_export = on_export
+        self.window = None
+        self.nodes = []
+        self.rows = []
+        self._sample = []
+        self._cell = 1
+        self._image = None
+
+    def show(self, nodes, rows, title):
+        self.nodes = nodes
+        self.rows = rows
+        if self.window is None or not self.window.winfo_exists():
+            self._create_window()
+        self.window.title(title)
+        self._draw()
+
+    def close(self):
+        if self.window is not None and self.window.winfo_exists():
+            self.window.destroy()
+        self.window = None
+
+    def _create_window(self):
+        style = self.style
+        self.window = tk.Toplevel(self.root, bg=style["panel_color"])
+        self.canvas = tk.Canvas(self.window, width=IMAGE_SIZE, height=IMAGE_SIZE,
+                                bg=style["bg_color"], highlightthickness=0)
+        self.canvas.pack(padx=5, pady=5)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.info_var = tk.StringVar()
+        tk.Label(self.window, textvariable=self.info_var, bg=style["panel_color"],
+                 fg=style["text_color"], font=('Courier', 10)).pack(fill=tk.X, padx=5)
+        tk.Button(self.window, text="Export Matrix", command=self.on_export,
+                  bg=style["button_color"], fg=style["text_color"],
+                  font=('Helvetica', 10), relief=tk.RAISED, bd=2).pack(fill=tk.X, padx=5, pady=5)
+
+    def _draw(self):
+        count = len(self.nodes)
+        cells = min(count, MAX_CELLS)
+        self._sample = [i * count // cells for i in range(cells)]
+        inf = float('inf')
+        top = 0.0
+        for i in self._sample:
+            row = self.rows[i]
+            for j in self._sample:
+                if top < row[j] < inf:
+                    top = row[j]
+        scale = (LEVELS - 1) / top if top else 0.0
+
+        lines = []
+        for i in self._sample:
+            row = self.rows[i]
+            lines.append("{" + " ".join(PALETTE[int(row[j] * scale)] if row[j] < inf else UNREACHABLE_COLOR
+                                        for j in self._sample) + "}")
+        self._cell = max(1, IMAGE_SIZE // max(1, cells))
+        image = tk.PhotoImage(width=max(1, cells), height=max(1, cells))
+        if lines:
+            image.put(" ".join(lines))
+        self._image = image.zoom(self._cell) if self._cell > 1 else image
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self._image)
+        sampled = f", every {count / cells:.1f}th node shown" if cells < count else ""
+        self.info_var.set(f"{count} nodes, largest distance {top:g}{sampled}")
+
+    def _on_motion(self, event):
+        i, j = event.y // self._cell, event.x // self._cell
+        if 0 <= i < len(self._sample) and 0 <= j < len(self._sample):
+            row, column = self._sample[i], self._sample[j]
+            distance = self.rows[row][column]
+            text = f"{distance:g}" if distance < float('inf') else "unreachable"
+            self.info_var.set(f"{self.nodes[row]} -> {self.nodes[column]}: {text}")
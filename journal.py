@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+
+from graph_core import ADD_EDGE, ADD_NODE, CHANGE_LOG_LIMIT, REMOVE_EDGE, REMOVE_NODE, SET_WEIGHT
+
+# Undo/redo history of graph edits.
+#
+# Each user action is one entry, opened with edit(label) around the code that
+# changes the graph.  Ordinary edits are stored as the graph's own change log
+# records for the action (node and edge adds, removes and weight changes),
+# captured from the graph whatever their number, and undo applies their
+# inverses in reverse order: undoing the deletion of a hub revives the node
+# and re-adds its incident edges, nothing else.  Actions that replace the
+# whole graph (import, clear) are stored as a pair of Graph checkpoints
+# instead, which share the immutable CSR arrays, so undo and redo swap arrays
+# rather than rebuild.
+#
+# undo() and redo() return (label, changes) where changes is the list of
+# change records the step applied, or None when the graph was replaced
+# wholesale and everything derived from it must be rebuilt.
+
+MAX_ENTRIES = 500
+MAX_CHECKPOINT_ENTRIES = 8  # older checkpoint entries and all before them are dropped
+
+
+class Entry:
+    __slots__ = ("label", "changes", "before", "after")
+
+    def __init__(self, label, changes=None, before=None, after=None):
+        self.label = label
+        self.changes = changes  # change records without their version
+        self.before = before  # checkpoints, for wholesale entries
+        self.after = after
+
+
+class Journal:
+    def __init__(self, graph, limit=MAX_ENTRIES):
+        self.graph = graph
+        self.limit = limit
+        self.undo_stack = []
+        self.redo_stack = []
+        self._depth = 0
+        self._start_version = None
+        self._before = None
+        self._label = None
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    @contextmanager
+    def edit(self, label, bulk=False):
+        # Records the graph changes made inside the block as one entry; bulk
+        # takes a checkpoint first, which is kept instead of the records when
+        # the block replaces the graph or changes more than the log holds.
+        # Nested edits fold into the outermost one.
+        self._depth += 1
+        if self._depth == 1:
+            self._label = label
+            self._start_version = self.graph.version
+            self._before = self.graph.checkpoint() if bulk else None
+            self.graph.start_capture()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._commit()
+
+    def _commit(self):
+        graph = self.graph
+        before, self._before = self._before, None
+        changes = graph.stop_capture()
+        if graph.version == self._start_version:
+            return  # nothing changed
+        if changes is not None and (before is None or len(changes) <= CHANGE_LOG_LIMIT):
+            entry = Entry(self._label, changes=self._records(changes))
+        elif before is not None:
+            entry = Entry(self._label, before=before, after=graph.checkpoint())
+        else:
+            # The graph was replaced without a checkpoint: earlier states
+            # can no longer be reached
+            self.clear()
+            return
+        self.redo_stack.clear()
+        self.undo_stack.append(entry)
+        self._trim()
+
+    def _records(self, changes):
+        # Change log records without versions; node additions also keep the
+        # position, since redo after a checkpoint restore may have to create
+        # the id afresh
+        xs, ys = self.graph.coordinate_arrays()
+        return [(ADD_NODE, change[2], xs[change[2]], ys[change[2]]) if change[1] == ADD_NODE else change[1:]
+                for change in changes]
+
+    def _trim(self):
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[:len(self.undo_stack) - self.limit]
+        wholesale = [i for i, entry in enumerate(self.undo_stack) if entry.changes is None]
+        if len(wholesale) > MAX_CHECKPOINT_ENTRIES:
+            del self.undo_stack[:wholesale[-MAX_CHECKPOINT_ENTRIES]]
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.redo_stack.append(entry)
+        if entry.changes is None:
+            self.graph.restore(entry.before)
+            return entry.label, None
+        return entry.label, self._apply(reversed(entry.changes), inverse=True)
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.undo_stack.append(entry)
+        if entry.changes is None:
+            self.graph.restore(entry.after)
+            return entry.label, None
+        return entry.label, self._apply(entry.changes, inverse=False)
+
+    def _apply(self, changes, inverse):
+        graph = self.graph
+        graph.start_capture()
+        for change in changes:
+            kind = change[0]
+            if kind == ADD_NODE:
+                if inverse:
+                    graph.remove_node(change[1])
+                elif change[1] < graph.node_count:
+                    graph.restore_node(change[1])
+                else:
+                    graph.add_node(change[2], change[3])
+            elif kind == REMOVE_NODE:
+                if inverse:
+                    graph.restore_node(change[1])
+                else:
+                    graph.remove_node(change[1])
+            elif kind == ADD_EDGE:
+                if inverse:
+                    graph.remove_edge(change[1], change[2])
+                else:
+                    graph.add_edge(change[1], change[2], change[3])
+            elif kind == REMOVE_EDGE:
+                if inverse:
+                    graph.add_edge(change[1], change[2], change[3])
+                else:
+                    graph.remove_edge(change[1], change[2])
+            elif kind == SET_WEIGHT:
+                graph.set_weight(change[1], change[2], change[3] if inverse else change[4])
+        return [change[1:] for change in graph.stop_capture()]
@@ -0,0 +1,118 @@
+import array
+import struct
+import zlib
+
+import algorithms
+from graph_core import ADD_EDGE, SET_WEIGHT
+from graph_io import GraphFormatError
+
+# Landmark (ALT) index for repeated point-to-point queries.
+#
+# Preprocessing runs a full Dijkstra from a handful of landmarks spread over
+# the graph (algorithms.landmark_tables); algorithms.alt then uses
+# |d(L, target) - d(L, node)| as an A* lower bound, which on road-like graphs
+# settles a small corridor around the shortest path instead of a disc.
+#
+# Bounds stay admissible and consistent while distances can only grow, so the
+# index survives removed edges and nodes, weight increases and new isolated
+# nodes (they get a bound of 0).  A new edge or a weight decrease can shorten
+# distances and makes the index stale; it is then rebuilt.
+#
+# Indexes are saved next to the graph file (<graph file>.alt) together with a
+# checksum of the graph's CSR arrays, and only reused for the identical graph.
+
+LANDMARK_COUNT = 8
+
+INDEX_SUFFIX = ".alt"
+INDEX_MAGIC = b"GAVALT01"
+# magic, byte order mark, node count, landmark count, graph checksum; then the
+# landmark ids (q * count) and the tables (d * node count each), native order
+INDEX_HEADER = struct.Struct("=8sIqqI")
+BYTE_ORDER_MARK = 0x01020304
+
+
+def graph_checksum(graph):
+    arrays = graph.base_arrays()
+    checksum = zlib.crc32(struct.pack("=q", graph.node_count))
+    for name in ("alive", "offsets", "targets", "weights"):
+        checksum = zlib.crc32(memoryview(arrays[name]).cast('B'), checksum)
+    return checksum
+
+
+def index_path(graph_path):
+    return graph_path + INDEX_SUFFIX
+
+
+class LandmarkIndex:
+    def __init__(self, version, landmarks, tables):
+        self.version = version  # graph version the tables are valid for
+        self.landmarks = landmarks
+        self.tables = tables
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def bounds_to(self, target):
+        # bound(node) -> lower bound on the distance from node to target
+        return algorithms.landmark_bounds(self.tables, target)
+
+    def query(self, graph, start_node, end_node):
+        # Trace events of the ALT search; the index must be refreshed first
+        return algorithms.alt(graph, start_node, end_node, self.tables)
+
+    def refresh(self, graph):
+        # Brings the index to the current graph version; False when an edit
+        # may have shortened some distance and the index must be rebuilt
+        if self.version == graph.version:
+            return True
+        changes = graph.changes_since(self.version)
+        if changes is None:
+            return False
+        for change in changes:
+            kind = change[1]
+            if kind == ADD_EDGE:
+                return False
+            if kind == SET_WEIGHT and change[5] < change[4]:
+                return False
+        self.version = graph.version
+        return True
+
+    def save(self, graph, path):
+        # graph must be at the index's version
+        with open(path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, BYTE_ORDER_MARK, graph.node_count,
+                                      len(self.landmarks), graph_checksum(graph)))
+            f.write(array.array('q', self.landmarks))
+            for table in self.tables:
+                f.write(table)
+
+
+def build_index(graph, count=LANDMARK_COUNT):
+    # Synchronous build; the GUI runs algorithms.landmark_tables in a worker
+    return LandmarkIndex(graph.version, *algorithms.landmark_tables(graph, count))
+
+
+def load_index(graph, path):
+    # The saved index for graph, or None when it was built for another graph
+    with open(path, "rb") as f:
+        header = f.read(INDEX_HEADER.size)
+        if len(header) < INDEX_HEADER.size:
+            raise GraphFormatError(f"{path}: file too short")
+        magic, byte_order, node_count, count, checksum = INDEX_HEADER.unpack(header)
+        if magic != INDEX_MAGIC:
+            raise GraphFormatError(f"{path}: not a landmark index")
+        if byte_order != BYTE_ORDER_MARK:
+            raise GraphFormatError(f"{path}: written on a machine with different byte order")
+        if node_count != graph.node_count or checksum != graph_checksum(graph):
+            return None
+        try:
+            landmarks = array.array('q')
+            landmarks.fromfile(f, count)
+            tables = []
+            for _ in range(count):
+                table = array.array('d')
+                table.fromfile(f, node_count)
+                tables.append(table)
+        except EOFError:
+            raise GraphFormatError(f"{path}: truncated file") from None
+    return LandmarkIndex(graph.version, list(landmarks), tables)
@@ -0,0 +1,360 @@
+import math
+import random
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # the pure Python paths below are used instead
+    np = None
+
+# Automatic node placement for graphs that were imported rather than drawn.
+#
+# Every layout is a generator: it writes straight into the graph's node
+# positions and yields its progress as a fraction in [0, 1] between units of
+# work, so the GUI can run it from after() callbacks, show progress and cancel
+# it simply by dropping the generator.  Headless callers use run_layout().
+#
+#   force_layout     Fruchterman-Reingold style spring embedder.  Repulsion is
+#                    computed on a uniform grid: exact from the nodes in the
+#                    3x3 cells around a node's own, and from each cell of the
+#                    ring around those (out to 5x5) via its centre of mass, so
+#                    each iteration is O(V + E).  Vectorised with NumPy when
+#                    it is installed; both paths compute the same forces.
+#   layered_layout   BFS layers from a root per component, one row per layer
+#   circular_layout  nodes evenly spaced on a circle in id order
+#   relax_around     incremental force relaxation of a node's neighbourhood
+
+NODE_SPACING = 80.0  # ideal edge length in world units
+
+
+def run_layout(steps):
+    # Drives a layout generator to completion
+    for _ in steps:
+        pass
+
+
+# Circular
+def circular_layout(graph, center=(0.0, 0.0), chunk=10000):
+    nodes = list(graph.nodes())
+    count = len(nodes)
+    if not count:
+        return
+    radius = max(NODE_SPACING, count * NODE_SPACING / (2 * math.pi))
+    cx, cy = center
+    positions = graph.positions
+    for start in range(0, count, chunk):
+        for i in range(start, min(count, start + chunk)):
+            angle = 2 * math.pi * i / count
+            positions[nodes[i]] = (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+        yield min(1.0, (start + chunk) / count)
+
+
+# Layered (BFS)
+def layered_layout(graph, roots=None, chunk=10000):
+    # Layer = hop distance from the component's root (its lowest node id unless
+    # given in roots); components are placed side by side
+    offsets, targets, _ = graph.csr()
+    layer = {}
+    order = []
+    pending = list(roots) if roots is not None else []
+    pending.extend(graph.nodes())
+    for root in pending:
+        if root in layer or root not in graph:
+            continue
+        layer[root] = 0
+        component = [root]
+        queue = deque(component)
+        while queue:
+            node = queue.popleft()
+            for neighbor in targets[offsets[node]:offsets[node + 1]]:
+                if neighbor not in layer:
+                    layer[neighbor] = layer[node] + 1
+                    component.append(neighbor)
+                    queue.append(neighbor)
+        order.append(component)
+        yield 0.5 * len(layer) / max(1, len(graph))
+
+    positions = graph.positions
+    x_base = 0.0
+    placed = 0
+    for component in order:
+        rows = {}
+        for node in component:
+            rows.setdefault(layer[node], []).append(node)
+        width = max(len(row) for row in rows.values())
+        for depth, row in rows.items():
+            # Centre each row under the widest one
+            x = x_base + (width - len(row)) * NODE_SPACING / 2
+            for node in row:
+                positions[node] = (x, depth * NODE_SPACING * 1.5)
+                x += NODE_SPACING
+                placed += 1
+                if placed % chunk == 0:
+                    yield 0.5 + 0.5 * placed / len(graph)
+        x_base += (width + 1) * NODE_SPACING
+    yield 1.0
+
+
+# Force directed
+def force_layout(graph, iterations=60, seed=0):
+    nodes = list(graph.nodes())
+    if len(nodes) < 2:
+        yield 1.0
+        return
+    _spread_if_degenerate(graph, nodes, seed)
+    if np is not None:
+        yield from _force_layout_numpy(graph, nodes, iterations)
+    else:
+        yield from _force_layout_python(graph, nodes, iterations)
+
+
+def _spread_if_degenerate(graph, nodes, seed):
+    # Imported edge lists put every node at the origin; start from a random
+    # square sized for the ideal spacing instead
+    x1, y1, x2, y2 = graph.bounds()
+    if x1 != x2 or y1 != y2:
+        return
+    rng = random.Random(seed)
+    side = math.sqrt(len(nodes)) * NODE_SPACING
+    positions = graph.positions
+    for node in nodes:
+        positions[node] = (rng.uniform(0, side), rng.uniform(0, side))
+
+
+def _force_layout_numpy(graph, nodes, iterations):
+    # Works on copies of the coordinates and writes them back after every
+    # iteration, so the graph stays editable while the layout is paused
+    sources, heads = _edge_arrays(graph)
+    xs, ys = graph.coordinate_arrays()
+    ids = np.asarray(nodes, dtype=np.int64)
+    x = np.array(xs, dtype=np.float64)
+    y = np.array(ys, dtype=np.float64)
+    k = NODE_SPACING
+    temperature = math.sqrt(len(ids)) * k / 10
+    cooling = temperature / (iterations + 1)
+
+    for iteration in range(iterations):
+        px, py = x[ids], y[ids]
+        dx, dy = _grid_repulsion_numpy(px, py, k)
+
+        # Attraction along edges, accumulated in node id order
+        ex = x[heads] - x[sources]
+        ey = y[heads] - y[sources]
+        pull = np.sqrt(ex * ex + ey * ey) / k
+        ex *= pull
+        ey *= pull
+        size = len(x)
+        fx = np.bincount(sources, ex, size) - np.bincount(heads, ex, size)
+        fy = np.bincount(sources, ey, size) - np.bincount(heads, ey, size)
+        fx = fx[ids] + dx
+        fy = fy[ids] + dy
+        length = np.sqrt(fx * fx + fy * fy) + 1e-9
+        step = np.minimum(length, temperature) / length
+        x[ids] = px + fx * step
+        y[ids] = py + fy * step
+        temperature -= cooling
+
+        xs, ys = graph.coordinate_arrays()
+        np.frombuffer(xs, dtype=np.float64)[ids] = x[ids]
+        np.frombuffer(ys, dtype=np.float64)[ids] = y[ids]
+        graph.positions_changed()
+        yield (iteration + 1) / iterations
+
+
+def _edge_arrays(graph):
+    # (sources, heads) with every undirected edge once
+    offsets, targets, _ = graph.csr()
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int32)
+    sources = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    keep = sources < targets
+    return sources[keep], targets[keep].astype(np.int64)
+
+
+def _grid_repulsion_numpy(px, py, k):
+    # Repulsion k^2/d on the grid described at the top, as _repulsion_python
+    # computes it for one node
+    cell = 2 * k
+    gx = np.floor_divide(px, cell).astype(np.int64)
+    gy = np.floor_divide(py, cell).astype(np.int64)
+    gx += 2 - gx.min()
+    gy += 2 - gy.min()
+    width = int(gx.max()) + 3
+    # Only occupied cells get an entry, so memory follows the node count
+    # rather than the layout's extent; neighbours are found by searching
+    # the sorted cell keys
+    keys, inverse = np.unique(gy * width + gx, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(keys))
+    mass = counts.astype(np.float64)
+    sum_x = np.bincount(inverse, weights=px, minlength=len(keys))
+    sum_y = np.bincount(inverse, weights=py, minlength=len(keys))
+    order = np.argsort(inverse, kind="stable")  # nodes grouped by cell
+    starts = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+
+    def neighbour_cells(ox, oy):
+        # Index into keys of each node's cell shifted by (ox, oy), and
+        # whether that cell is occupied
+        wanted = keys + (oy * width + ox)
+        found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        occupied = keys[found] == wanted
+        return found[inverse], occupied[inverse]
+
+    nodes = np.arange(len(px))
+
+    fx = np.zeros(len(px))
+    fy = np.zeros(len(px))
+    kk = k * k
+    for oy in range(-2, 3):
+        for ox in range(-2, 3):
+            if max(abs(ox), abs(oy)) < 2:
+                continue
+            # Ring cell: its centre of mass; empty cells have m == 0
+            other, occupied = neighbour_cells(ox, oy)
+            m = np.where(occupied, mass[other], 0.0)
+            safe = np.maximum(m, 1)
+            vx = px - sum_x[other] / safe
+            vy = py - sum_y[other] / safe
+            push = m * kk / (vx * vx + vy * vy + 1e-2)
+            fx += vx * push
+            fy += vy * push
+    # Near cells: the node's own and half of the eight around it, each pair
+    # of nodes in the two cells pushing both ways
+    for ox, oy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        other, occupied = neighbour_cells(ox, oy)
+        sizes = np.where(occupied, counts[other], 0)
+        total = int(sizes.sum())
+        if not total:
+            continue
+        rows = np.repeat(nodes, sizes)
+        firsts = np.cumsum(sizes) - sizes
+        partners = order[np.repeat(starts[other] - firsts, sizes) + np.arange(total)]
+        keep = partners != rows
+        rows = rows[keep]
+        partners = partners[keep]
+        vx = px[rows] - px[partners]
+        vy = py[rows] - py[partners]
+        push = kk / (vx * vx + vy * vy + 1e-2)
+        vx *= push
+        vy *= push
+        fx += np.bincount(rows, vx, len(px))
+        fy += np.bincount(rows, vy, len(px))
+        if ox or oy:
+            fx -= np.bincount(partners, vx, len(px))
+            fy -= np.bincount(partners, vy, len(px))
+    return fx, fy
+
+
+def _force_layout_python(graph, nodes, iterations):
+    positions = graph.positions
+    k = NODE_SPACING
+    temperature = math.sqrt(len(nodes)) * k / 10
+    cooling = temperature / (iterations + 1)
+    for iteration in range(iterations):
+        _relax_step_python(graph, nodes, set(nodes), positions, k, temperature)
+        temperature -= cooling
+        yield (iteration + 1) / iterations
+
+
+def _relax_step_python(graph, movable, movable_set, positions, k, temperature, fixed=()):
+    # One iteration for the nodes in movable; nodes in fixed only repel
+    cell = 2 * k
+    grid = {}  # cell -> nodes in it
+    centres = {}  # cell -> [count, sum of x, sum of y]
+    for group in (movable, fixed):
+        for node in group:
+            x, y = positions[node]
+            key = (int(x // cell), int(y // cell))
+            grid.setdefault(key, []).append(node)
+            centre = centres.setdefault(key, [0, 0.0, 0.0])
+            centre[0] += 1
+            centre[1] += x
+            centre[2] += y
+
+    moves = []
+    for node in movable:
+        x, y = positions[node]
+        fx, fy = _repulsion_python(node, x, y, positions, grid, centres, k)
+        for neighbor, _ in graph.neighbors(node):
+            nx, ny = positions[neighbor]
+            vx, vy = nx - x, ny - y
+            dist = math.sqrt(vx * vx + vy * vy) + 1e-9
+            fx += vx * dist / k
+            fy += vy * dist / k
+        length = math.sqrt(fx * fx + fy * fy) + 1e-9
+        step = min(length, temperature) / length
+        moves.append((node, x + fx * step, y + fy * step))
+    for node, x, y in moves:
+        positions[node] = (x, y)
+
+
+def _repulsion_python(node, x, y, positions, grid, centres, k):
+    # Repulsion k^2/d on node from the grid described at the top
+    cx, cy = int(x // (2 * k)), int(y // (2 * k))
+    kk = k * k
+    fx = fy = 0.0
+    for ox in range(-2, 3):
+        for oy in range(-2, 3):
+            key = (cx + ox, cy + oy)
+            if max(abs(ox), abs(oy)) == 2:
+                centre = centres.get(key)
+                if centre is not None:
+                    count, sum_x, sum_y = centre
+                    vx, vy = x - sum_x / count, y - sum_y / count
+                    push = count * kk / (vx * vx + vy * vy + 1e-2)
+                    fx += vx * push
+                    fy += vy * push
+                continue
+            for other in grid.get(key, ()):
+                if other == node:
+                    continue
+                ox_, oy_ = positions[other]
+                vx, vy = x - ox_, y - oy_
+                push = kk / (vx * vx + vy * vy + 1e-2)
+                fx += vx * push
+                fy += vy * push
+    return fx, fy
+
+
+# Incremental
+def neighborhood(graph, node, hops):
+    found = {node}
+    frontier = [node]
+    for _ in range(hops):
+        next_frontier = []
+        for current in frontier:
+            for neighbor, _ in graph.neighbors(current):
+                if neighbor not in found:
+                    found.add(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return found
+
+
+def relax_around(graph, node, hops=2, iterations=30, near=None):
+    # Moves only the nodes within hops of node; near(x1, y1, x2, y2) may
+    # return other nodes around that region, which repel but stay put.
+    # Returns the set of moved nodes.
+    movable = neighborhood(graph, node, hops)
+    positions = graph.positions
+    fixed = ()
+    if near is not None:
+        xs = [positions[n][0] for n in movable]
+        ys = [positions[n][1] for n in movable]
+        margin = 2 * NODE_SPACING
+        fixed = [n for n in near(min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin)
+                 if n not in movable]
+    order = sorted(movable)
+    temperature = NODE_SPACING / 2
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        _relax_step_python(graph, order, movable, positions, NODE_SPACING, temperature, fixed)
+        temperature -= cooling
+    return movable
+
+
+LAYOUTS = {
+    "Force": force_layout,
+    "Layered": layered_layout,
+    "Circular": circular_layout,
+}
@@ -0,0 +1,322 @@
+import array
+import heapq
+from collections import deque
+
+import algorithms
+from graph_core import ADD_EDGE, ADD_NODE, REMOVE_EDGE, REMOVE_NODE, SET_WEIGHT
+from union_find import UnionFind
+
+# Algorithm results kept current while the graph is edited.
+#
+# Each result remembers the graph version it matches; update() replays the
+# changes logged since then and returns what it changed, so the canvas can
+# repaint just those nodes and edges.  When the change log no longer reaches
+# back the result is recomputed and update() returns None.
+#
+# LiveTree is a shortest path tree (hop levels for BFS), repaired in the
+# style of Ramalingam and Reps: shorter or new edges seed a decrease-only
+# Dijkstra pass, and a tree edge that gets longer or disappears detaches the
+# subtree below it, whose nodes are re-seeded from their neighbours outside
+# the subtree.  LiveComponents is a union-find with the members of each set;
+# added edges merge the smaller set into the larger, and deletions search
+# from both ends of each removed edge to find what, if anything, broke off.
+
+SLOT_SLACK = 4  # union-find slots per node id before the components are rebuilt
+
+
+class LiveTree:
+    def __init__(self, graph, source, weighted=True):
+        self.graph = graph
+        self.source = source
+        self.weighted = weighted
+        self.rebuild()
+
+    @property
+    def valid(self):
+        return self.source in self.graph
+
+    def rebuild(self):
+        self.version = self.graph.version
+        if self.weighted:
+            self.distances, self.previous_nodes = algorithms.shortest_path_tree(self.graph, self.source)
+        else:
+            self.distances = {self.source: 0}
+            self.previous_nodes = {self.source: None}
+            self._propagate([(0, self.source)], {})
+
+    def _length(self, weight):
+        return weight if self.weighted else 1
+
+    def update(self):
+        # Returns {node: previous parent} for the nodes whose distance or
+        # parent changed (parent None: it was unreached or the source), or
+        # None when the tree was recomputed
+        changes = self.graph.changes_since(self.version)
+        if changes is None:
+            self.rebuild()
+            return None
+        graph = self.graph
+        previous = self.previous_nodes
+        detached = []  # roots of subtrees whose distances may have grown
+        improved = []  # edges that may shorten paths
+        for change in changes:
+            kind = change[1]
+            if kind == ADD_EDGE:
+                improved.append((change[2], change[3]))
+            elif kind == SET_WEIGHT:
+                if not self.weighted:
+                    continue
+                _, _, node1, node2, old, new = change
+                if new < old:
+                    improved.append((node1, node2))
+                elif new > old:
+                    detached.append(self._tree_child(node1, node2))
+            elif kind == REMOVE_EDGE:
+                detached.append(self._tree_child(change[2], change[3]))
+            elif kind == REMOVE_NODE and change[2] == self.source:
+                self.rebuild()  # the source was deleted and revived
+                return None
+        detached = [node for node in detached if node is not None]
+
+        old = {}  # node -> (distance, parent) before this update
+        heap = []
+        if detached:
+            subtree = self._subtree(detached)
+            for node in subtree:
+                old[node] = (self.distances.pop(node), previous.pop(node))
+            # Re-seed each detached node from its best neighbour outside
+            for node in subtree:
+                if node not in graph:
+                    continue
+                best = None
+                for neighbor, weight in graph.neighbors(node):
+                    distance = self.distances.get(neighbor)
+                    if distance is not None and (best is None or distance + self._length(weight) < best[0]):
+                        best = (distance + self._length(weight), neighbor)
+                if best is not None:
+                    self.distances[node] = best[0]
+                    previous[node] = best[1]
+                    heapq.heappush(heap, (best[0], node))
+        for node1, node2 in improved:
+            if not graph.has_edge(node1, node2):
+                continue
+            length = self._length(graph.weight(node1, node2))
+            for near, far in ((node1, node2), (node2, node1)):
+                distance = self.distances.get(near)
+                if distance is not None and distance + length < self.distances.get(far, float('inf')):
+                    old.setdefault(far, (self.distances.get(far), previous.get(far)))
+                    self.distances[far] = distance + length
+                    previous[far] = near
+                    heapq.heappush(heap, (distance + length, far))
+        self._propagate(heap, old)
+        self.version = graph.version
+        return {node: parent for node, (distance, parent) in old.items()
+                if self.distances.get(node) != distance or previous.get(node) != parent}
+
+    def _tree_child(self, node1, node2):
+        # The lower end of the edge when it is a tree edge, else None
+        previous = self.previous_nodes
+        if previous.get(node2, -1) == node1:
+            return node2
+        if previous.get(node1, -1) == node2:
+            return node1
+        return None
+
+    def _subtree(self, roots):
+        # The roots and every node hanging below them in the tree.  A removed
+        # tree edge further down is logged too, so its lower end is a root.
+        graph = self.graph
+        previous = self.previous_nodes
+        subtree = set(roots)
+        stack = list(subtree)
+        while stack:
+            node = stack.pop()
+            if node not in graph:
+                continue
+            for neighbor, _ in graph.neighbors(node):
+                if neighbor not in subtree and previous.get(neighbor, -1) == node:
+                    subtree.add(neighbor)
+                    stack.append(neighbor)
+        return subtree
+
+    def _propagate(self, heap, old):
+        # Decrease-only Dijkstra from the queued nodes; old collects the
+        # state of every node it changes
+        graph = self.graph
+        distances = self.distances
+        previous = self.previous_nodes
+        inf = float('inf')
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            for neighbor, weight in graph.neighbors(node):
+                candidate = distance + self._length(weight)
+                if candidate < distances.get(neighbor, inf):
+                    old.setdefault(neighbor, (distances.get(neighbor), previous.get(neighbor)))
+                    distances[neighbor] = candidate
+                    previous[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+
+
+class LiveComponents:
+    def __init__(self, graph):
+        self.graph = graph
+        self.rebuild()
+
+    @property
+    def valid(self):
+        return True
+
+    def rebuild(self):
+        graph = self.graph
+        self.version = graph.version
+        # Union-find elements are slots rather than node ids: a node that
+        # breaks away or is revived moves to a fresh slot, so its old one can
+        # stay in place as a link for the rest of its former set
+        self.slots = array.array('i', range(graph.node_count))
+        self.sets = UnionFind(graph.node_count)
+        for tail, head, _ in graph.edges():
+            self.sets.union(tail, head)
+        self.members = {}  # root slot -> live nodes of its set
+        for node in graph.nodes():
+            self.members.setdefault(self.sets.find(node), set()).add(node)
+
+    def __len__(self):
+        # Number of components
+        return len(self.members)
+
+    def component(self, node):
+        # Representative of node's component, stable while it does not merge
+        # or split
+        return self.sets.find(self.slots[node])
+
+    def update(self):
+        # Returns the set of nodes whose representative changed, or None when
+        # the components were recomputed
+        changes = self.graph.changes_since(self.version)
+        if changes is None or len(self.sets) > SLOT_SLACK * max(self.graph.node_count, 1024):
+            self.rebuild()
+            return None
+        graph = self.graph
+        changed = set()
+        new_nodes = []
+        added = []
+        touched = set()  # endpoints of removed edges and removed nodes
+        for change in changes:
+            kind = change[1]
+            if kind == ADD_NODE:
+                new_nodes.append(change[2])
+            elif kind == ADD_EDGE:
+                added.append((change[2], change[3]))
+            elif kind == REMOVE_EDGE:
+                touched.add(change[2])
+                touched.add(change[3])
+            elif kind == REMOVE_NODE:
+                touched.add(change[2])
+
+        if len(self.slots) < graph.node_count:
+            first = len(self.sets)
+            self.sets.grow(first + graph.node_count - len(self.slots))
+            self.slots.extend(range(first, len(self.sets)))
+        new_nodes = set(new_nodes)
+
+        # Deleted nodes leave their set; so do nodes deleted and revived in
+        # this batch, which come back below as singletons
+        by_root = {}  # root -> touched live nodes
+        for node in touched:
+            root = self.component(node)
+            if node in graph and node not in new_nodes:
+                by_root.setdefault(root, []).append(node)
+                continue
+            members = self.members.get(root)
+            if members is not None:
+                members.discard(node)
+                if not members:
+                    del self.members[root]
+        for node in new_nodes:
+            if node in graph:
+                self._move([node])
+                changed.add(node)
+        for root, starts in by_root.items():
+            if len(starts) > 1:
+                self._split(root, starts, changed)
+        for node1, node2 in added:
+            if graph.has_edge(node1, node2):  # not removed again since
+                self._merge(node1, node2, changed)
+        self.version = graph.version
+        return changed
+
+    def _move(self, nodes):
+        # Gives nodes fresh slots joined into one new set
+        sets = self.sets
+        slots = self.slots
+        first = len(sets)
+        sets.grow(first + len(nodes))
+        for offset, node in enumerate(nodes):
+            slots[node] = first + offset
+            sets.union(first, first + offset)
+        self.members[first] = set(nodes)
+        return first
+
+    def _merge(self, node1, node2, changed):
+        root1, root2 = self.component(node1), self.component(node2)
+        root = self.sets.union(root1, root2)
+        if root == -1:
+            return
+        moved = self.members.pop(root2 if root == root1 else root1)
+        self.members[root] |= moved
+        changed.update(moved)
+
+    def _split(self, root, starts, changed):
+        # Searches from every touched node of one set in turns, one node at a
+        # time, merging searches that meet.  A search that runs dry has found
+        # a piece that broke off; once one search is left, the rest of the set
+        # is the piece that keeps the root.  The work is proportional to the
+        # pieces that broke off rather than to the whole set.
+        graph = self.graph
+        owner = {}  # node -> search id
+        merged_into = {}  # search id -> search it was merged into
+        searches = {}  # search id -> (nodes found, queue of nodes to expand)
+        for start in starts:
+            owner[start] = start
+            searches[start] = ([start], deque([start]))
+        pieces = []
+        while len(searches) > 1:
+            for search_id in list(searches):
+                if search_id not in searches:
+                    continue  # merged earlier in this round
+                found, queue = searches[search_id]
+                if not queue:
+                    pieces.append(found)
+                    del searches[search_id]
+                    if len(searches) == 1:
+                        break
+                    continue
+                node = queue.popleft()
+                for neighbor, _ in graph.neighbors(node):
+                    other = owner.get(neighbor)
+                    if other is None:
+                        if self.component(neighbor) == root:
+                            owner[neighbor] = search_id
+                            found.append(neighbor)
+                            queue.append(neighbor)
+                        continue
+                    while other in merged_into:
+                        other = merged_into[other]
+                    if other == search_id:
+                        continue
+                    # The two searches met: fold the smaller into the larger
+                    big, small = (search_id, other) if len(found) >= len(searches[other][0]) else (other, search_id)
+                    small_found, small_queue = searches.pop(small)
+                    searches[big][0].extend(small_found)
+                    searches[big][1].extend(small_queue)
+                    merged_into[small] = big
+                    search_id = big  # the rest of node's neighbours go to the merged search
+                    found, queue = searches[big]
+        members = self.members[root]
+        for piece in pieces:
+            members.difference_update(piece)
+            self.sets.size[root] -= len(piece)
+            self._move(piece)
+            changed.update(piece)
@@ -0,0 +1,293 @@
+import tkinter as tk
+
+from graph_core import edge_key
+from renderer import NODE_SHAPE_TAG, edge_tag, node_tag
+
+# Viewport-culled, level-of-detail drawing of the graph on the canvas.
+#
+# Node positions are world coordinates; the view maps them to the screen with
+# a uniform scale and an offset (pan/zoom).  Only elements inside the visible
+# world rectangle get canvas items, and the amount of detail depends on how
+# many nodes are visible:
+#
+#   FULL       labelled nodes, arrowed/dashed edges with weight labels
+#   SIMPLE     plain dots and lines, no text, arrows or dashes
+#   AGGREGATE  one glyph per occupied grid cell, sized by its node count
+#
+# Panning and zooming move the existing items with a single canvas.move or
+# canvas.scale call and schedule a debounced redraw that re-culls the view.
+
+FULL = "full"
+SIMPLE = "simple"
+AGGREGATE = "aggregate"
+
+FULL_DETAIL_LIMIT = 1500  # max visible nodes drawn with labels and arrows
+SIMPLE_DETAIL_LIMIT = 4000  # max visible nodes drawn individually
+LABEL_MIN_SCALE = 0.6  # below this zoom labels are unreadable anyway
+AGGREGATE_CELL_PX = 16  # min on-screen size of an aggregate glyph cell
+REDRAW_DELAY = 80  # ms of pan/zoom inactivity before re-culling
+
+NODE_RADIUS = 25
+MIN_SCALE = 0.002
+MAX_SCALE = 8.0
+
+
+class GraphView:
+    def __init__(self, canvas, graph, hit_index, renderer, style):
+        # style: dict with node_color, edge_color, outline_color, text_color,
+        # selection_color
+        self.canvas = canvas
+        self.graph = graph
+        self.hit_index = hit_index
+        self.renderer = renderer
+        self.style = style
+        self.selection = set()
+        self.scale = 1.0
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self.level = FULL
+        self._redraw_id = None
+        self._aggregates = {}  # pyramid level -> {(cx, cy): node count}
+
+    # Coordinate transforms
+    def to_screen(self, x, y):
+        return x * self.scale + self.offset_x, y * self.scale + self.offset_y
+
+    def to_world(self, x, y):
+        return (x - self.offset_x) / self.scale, (y - self.offset_y) / self.scale
+
+    def visible_world_rect(self, margin=NODE_RADIUS):
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        x1, y1 = self.to_world(0, 0)
+        x2, y2 = self.to_world(width, height)
+        return x1 - margin, y1 - margin, x2 + margin, y2 + margin
+
+    # Pan and zoom
+    def pan(self, dx, dy):
+        self.offset_x += dx
+        self.offset_y += dy
+        self.canvas.move("graph", dx, dy)
+        self.schedule_redraw()
+
+    def zoom(self, x, y, factor):
+        # Zoom around screen point (x, y)
+        new_scale = min(MAX_SCALE, max(MIN_SCALE, self.scale * factor))
+        factor = new_scale / self.scale
+        if factor == 1:
+            return
+        self.offset_x = x - (x - self.offset_x) * factor
+        self.offset_y = y - (y - self.offset_y) * factor
+        self.scale = new_scale
+        self.canvas.scale("graph", x, y, factor, factor)
+        self.schedule_redraw()
+
+    def reset_view(self):
+        self.scale = 1.0
+        self.offset_x = self.offset_y = 0.0
+        self.redraw()
+
+    def fit(self):
+        # Zoom and pan so that every node is visible
+        bounds = self.graph.bounds()
+        if bounds is None:
+            self.reset_view()
+            return
+        min_x, min_y, max_x, max_y = bounds
+        min_x -= NODE_RADIUS
+        min_y -= NODE_RADIUS
+        max_x += NODE_RADIUS
+        max_y += NODE_RADIUS
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        scale = min(width / max(max_x - min_x, 1), height / max(max_y - min_y, 1), 1.0)
+        self.scale = max(MIN_SCALE, scale)
+        self.offset_x = (width - (max_x - min_x) * self.scale) / 2 - min_x * self.scale
+        self.offset_y = (height - (max_y - min_y) * self.scale) / 2 - min_y * self.scale
+        self.redraw()
+
+    def schedule_redraw(self, delay=REDRAW_DELAY):
+        if self._redraw_id is not None:
+            self.canvas.after_cancel(self._redraw_id)
+        self._redraw_id = self.canvas.after(delay, self.redraw)
+
+    # Full redraw of the visible region
+    def redraw(self):
+        if self._redraw_id is not None:
+            self.canvas.after_cancel(self._redraw_id)
+            self._redraw_id = None
+        self.canvas.delete("graph")
+        rect = self.visible_world_rect()
+        self.level = self._choose_level(rect)
+        if self.level == AGGREGATE:
+            self._draw_aggregates(rect)
+            return
+
+        # Edges are drawn after nodes so their arrowheads stay visible.  Only
+        # edges with at least one visible endpoint are drawn.
+        visible = self.hit_index.nodes.query_box(*rect)
+        for node in visible:
+            self._create_node(node)
+        for node in visible:
+            for tail, head, weight in self.graph.incident_edges(node):
+                other = head if tail == node else tail
+                if other in visible and other < node:
+                    continue  # drawn from the other endpoint
+                self._create_edge(tail, head, weight)
+
+    def clear(self):
+        self.canvas.delete("graph")
+        self.selection.clear()
+        self._aggregates.clear()
+
+    # Incremental updates from the editing tools
+    def draw_node(self, node):
+        self._aggregates.clear()
+        if self.level == AGGREGATE:
+            self.schedule_redraw()
+        elif self._in_view(node):
+            self._create_node(node)
+
+    def draw_edge(self, tail, head):
+        if self.level != AGGREGATE and (self._in_view(tail) or self._in_view(head)):
+            self._create_edge(tail, head)
+
+    def erase(self, nodes=(), edges=()):
+        # Deletes the items of many nodes and (node1, node2) edges using a few
+        # multi-tag canvas.delete calls
+        tags = [node_tag(node) for node in nodes]
+        for node1, node2 in edges:
+            tags.append(edge_tag(node1, node2))
+            tags.append(weight_tag(node1, node2))
+        for i in range(0, len(tags), 1000):
+            self.canvas.delete(*tags[i:i + 1000])
+        if nodes:
+            self._aggregates.clear()
+            if self.level == AGGREGATE:
+                self.schedule_redraw()
+
+    def set_selected(self, node, selected):
+        if selected:
+            self.selection.add(node)
+        else:
+            self.selection.discard(node)
+        color = self.style["selection_color"] if selected else self.style["outline_color"]
+        self.canvas.itemconfig(f"{node_tag(node)}&&{NODE_SHAPE_TAG}", outline=color)
+
+    # Item creation
+    def _in_view(self, node):
+        x, y = self.graph.positions[node]
+        x1, y1, x2, y2 = self.visible_world_rect()
+        return x1 <= x <= x2 and y1 <= y <= y2
+
+    def _create_node(self, node):
+        x, y = self.to_screen(*self.graph.positions[node])
+        fill, state_tags = self.renderer.node_style(node)
+        tags = ("graph", node_tag(node), NODE_SHAPE_TAG) + state_tags
+        outline = self.style["selection_color"] if node in self.selection else self.style["outline_color"]
+        if self.level == FULL:
+            r = NODE_RADIUS * self.scale
+            self.canvas.create_oval(x - r, y - r, x + r, y + r,
+                                    fill=fill, outline=outline, width=3, tags=tags)
+            self.canvas.create_text(x, y, text=str(node),
+                                    fill=self.style["text_color"], font=('Helvetica', 12, 'bold'),
+                                    tags=("graph", node_tag(node), "label"))
+        else:
+            r = max(2.0, NODE_RADIUS * self.scale)
+            self.canvas.create_oval(x - r, y - r, x + r, y + r,
+                                    fill=fill, outline=outline if node in self.selection else "",
+                                    tags=tags)
+
+    def _create_edge(self, tail, head, weight=None):
+        x1, y1 = self.to_screen(*self.graph.positions[tail])
+        x2, y2 = self.to_screen(*self.graph.positions[head])
+        fill, width, state_tags = self.renderer.edge_style(tail, head)
+        tags = ("graph", edge_tag(tail, head)) + state_tags
+        if self.level != FULL:
+            self.canvas.create_line(x1, y1, x2, y2, fill=fill, width=width, tags=tags)
+            return
+
+        self.canvas.create_line(x1, y1, x2, y2,
+                                fill=fill, width=width,
+                                arrow=tk.LAST, arrowshape=(12, 15, 6),
+                                dash=(4, 2) if tail > head else None,  # Different style for reverse edges
+                                tags=tags)
+
+        # Weight label slightly above the line midpoint
+        mid_x = (x1 + x2) / 2
+        mid_y = (y1 + y2) / 2
+        offset = -15
+        self.canvas.create_text(mid_x, mid_y + offset,
+                                text=f"{self.graph.weight(tail, head) if weight is None else weight:g}",
+                                fill=self.style["text_color"],
+                                font=("Helvetica", 12, "bold"),
+                                tags=("graph", weight_tag(tail, head), "label"))
+
+    # Level of detail
+    def _choose_level(self, rect):
+        estimate = self._estimate_nodes(rect)
+        if estimate > SIMPLE_DETAIL_LIMIT:
+            return AGGREGATE
+        if estimate > FULL_DETAIL_LIMIT or self.scale < LABEL_MIN_SCALE:
+            return SIMPLE
+        return FULL
+
+    def _estimate_nodes(self, rect):
+        # Upper bound from a coarse pyramid level: at most a few hundred cells
+        level = self._pyramid_level(50)
+        return sum(count for _, count in self._cells_in(rect, level))
+
+    def _pyramid_level(self, min_px):
+        # Smallest pyramid level whose cells are at least min_px on screen
+        base = self.hit_index.nodes.cell_size
+        level = 0
+        while base * (1 << level) * self.scale < min_px and level < 30:
+            level += 1
+        return level
+
+    def _aggregate_level(self, level):
+        counts = self._aggregates.get(level)
+        if counts is None:
+            counts = {}
+            for (cx, cy), bucket in self.hit_index.nodes.cells.items():
+                cell = (cx >> level, cy >> level)
+                counts[cell] = counts.get(cell, 0) + len(bucket)
+            self._aggregates[level] = counts
+        return counts
+
+    def _cells_in(self, rect, level):
+        counts = self._aggregate_level(level)
+        size = self.hit_index.nodes.cell_size * (1 << level)
+        x1, y1, x2, y2 = rect
+        cx1, cx2 = int(x1 // size), int(x2 // size)
+        cy1, cy2 = int(y1 // size), int(y2 // size)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(counts):
+            return [(cell, count) for cell, count in counts.items()
+                    if cx1 <= cell[0] <= cx2 and cy1 <= cell[1] <= cy2]
+        found = []
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                count = counts.get((cx, cy))
+                if count:
+                    found.append(((cx, cy), count))
+        return found
+
+    def _draw_aggregates(self, rect):
+        level = self._pyramid_level(AGGREGATE_CELL_PX)
+        size = self.hit_index.nodes.cell_size * (1 << level)
+        cells = self._cells_in(rect, level)
+        if not cells:
+            return
+        densest = max(count for _, count in cells)
+        screen_size = size * self.scale
+        for (cx, cy), count in cells:
+            x, y = self.to_screen((cx + 0.5) * size, (cy + 0.5) * size)
+            r = screen_size / 2 * (0.35 + 0.65 * (count / densest) ** 0.5)
+            self.canvas.create_rectangle(x - r, y - r, x + r, y + r,
+                                         fill=self.style["node_color"], outline="",
+                                         tags=("graph", "aggregate"))
+
+
+def weight_tag(node1, node2):
+    key = edge_key(node1, node2)
+    return f"weight{key[0]}_{key[1]}"
@@ -0,0 +1,90 @@
+from collections import deque
+
+# Buffered message panel and status bar.
+#
+# log() only queues the message; the Text widget is updated at most once per
+# FLUSH_DELAY by a single after() callback that inserts everything queued in
+# one call, scrolls once and sets the status bar to the newest message.  The
+# panel keeps the last max_lines lines (older ones are deleted as new ones
+# arrive) and one tag per colour, configured the first time it is used.
+#
+# Messages carry a level and are dropped when it is above the verbosity, so
+# large runs can log their summaries only.
+
+SUMMARY = 0  # results and errors
+INFO = 1  # actions and section headers
+DETAIL = 2  # per step and per item messages
+
+VERBOSITY = {
+    "All": DETAIL,
+    "Normal": INFO,
+    "Summary": SUMMARY,
+}
+
+MAX_LINES = 2000
+FLUSH_DELAY = 16  # ms
+
+
+class MessageLog:
+    def __init__(self, root, text, status_var, default_color, max_lines=MAX_LINES):
+        self.root = root
+        self.text = text
+        self.status_var = status_var
+        self.default_color = default_color
+        self.max_lines = max_lines
+        self.verbosity = DETAIL
+        self._pending = deque(maxlen=max_lines)  # (text, colour) not yet shown
+        self._status = None  # status text waiting for the flush
+        self._lines = 0  # lines in the widget
+        self._tags = set()
+        self._flush_id = None
+
+    def log(self, message, color=None, level=INFO):
+        if level > self.verbosity:
+            return
+        self._pending.append((message + "\n", color or self.default_color))
+        self._status = message.strip()
+        if self._flush_id is None:
+            self._flush_id = self.root.after(FLUSH_DELAY, self.flush)
+
+    def status(self, message):
+        # Status bar text that is not logged; replaces a queued log status
+        self._status = None
+        self.status_var.set(message)
+
+    def flush(self):
+        if self._flush_id is not None:
+            self.root.after_cancel(self._flush_id)
+            self._flush_id = None
+        if self._status is not None:
+            self.status_var.set(self._status)
+            self._status = None
+        if not self._pending:
+            return
+        chunks = []
+        added = 0
+        for message, color in self._pending:
+            if color not in self._tags:
+                self.text.tag_config(color, foreground=color)
+                self._tags.add(color)
+            chunks += (message, color)
+            added += message.count("\n")
+        self._pending.clear()
+
+        text = self.text
+        text.config(state="normal")
+        text.insert("end", *chunks)
+        self._lines += added
+        excess = self._lines - self.max_lines
+        if excess > 0:
+            text.delete("1.0", f"{excess + 1}.0")
+            self._lines -= excess
+        text.see("end")
+        text.config(state="disabled")
+
+    def clear(self):
+        self._pending.clear()
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
+        self._lines = 0
@@ -0,0 +1,180 @@
+import heapq
+from collections import OrderedDict
+
+import algorithms
+from graph_core import ADD_EDGE, REMOVE_EDGE, REMOVE_NODE, SET_WEIGHT
+
+# Per-source shortest path tree cache.
+#
+# A tree holds the distances and previous_nodes of a full single-source search
+# together with the graph version it is valid for.  On lookup, the changes the
+# graph logged since that version are replayed against the tree:
+#
+#   * a new edge or a weight decrease is repaired in place by a Dijkstra pass
+#     that starts from the improved endpoint and only visits nodes whose
+#     distance drops
+#   * removing or increasing the weight of an edge that is not in the tree,
+#     and adding nodes, leave the tree as it is
+#   * anything else (a tree edge got longer or disappeared, the source was
+#     deleted, the change log no longer reaches back) drops the tree
+#
+# Trees are evicted least recently used first, bounded both by count and by
+# the total number of nodes they hold.
+
+MAX_TREES = 16
+MAX_CACHED_NODES = 2000000
+
+
+class ShortestPathTree:
+    def __init__(self, source, version, distances, previous_nodes):
+        self.source = source
+        self.version = version
+        self.distances = distances
+        self.previous_nodes = previous_nodes
+
+    def path_to(self, node):
+        # Returns (path, distance); path is [] when node is unreachable
+        distance = self.distances.get(node, float('inf'))
+        return algorithms.reconstruct_path(self.previous_nodes, node, distance), distance
+
+    def _is_tree_edge(self, node1, node2):
+        previous = self.previous_nodes
+        return previous.get(node2, -1) == node1 or previous.get(node1, -1) == node2
+
+    def _repair(self, graph, changes):
+        # Applies logged changes; returns False when the tree must be dropped
+        improved = []
+        for change in changes:
+            kind = change[1]
+            if kind == ADD_EDGE:
+                node1, node2 = change[2], change[3]
+                improved.append((node1, node2))
+            elif kind == SET_WEIGHT:
+                _, _, node1, node2, old, new = change
+                if new < old:
+                    improved.append((node1, node2))
+                elif new > old and self._is_tree_edge(node1, node2):
+                    return False
+            elif kind == REMOVE_EDGE:
+                if self._is_tree_edge(change[2], change[3]):
+                    return False
+            elif kind == REMOVE_NODE:
+                node = change[2]
+                if node == self.source:
+                    return False
+                # Its tree edges were logged (and rejected) as REMOVE_EDGE
+                self.distances.pop(node, None)
+                self.previous_nodes.pop(node, None)
+        if improved:
+            self._propagate(graph, improved)
+        return True
+
+    def _propagate(self, graph, improved):
+        # Decrease-only Dijkstra seeded with the endpoints of shorter edges.
+        # Later changes in the same batch may have removed or reweighted them
+        # again, so the current graph weight is used.
+        distances = self.distances
+        previous = self.previous_nodes
+        inf = float('inf')
+        heap = []
+        for node1, node2 in improved:
+            if not graph.has_edge(node1, node2):
+                continue
+            weight = graph.weight(node1, node2)
+            for near, far in ((node1, node2), (node2, node1)):
+                candidate = distances.get(near, inf) + weight
+                if candidate < distances.get(far, inf):
+                    distances[far] = candidate
+                    previous[far] = near
+                    heapq.heappush(heap, (candidate, far))
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            for neighbor, weight in graph.neighbors(node):
+                candidate = distance + weight
+                if candidate < distances.get(neighbor, inf):
+                    distances[neighbor] = candidate
+                    previous[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+
+
+class ShortestPathCache:
+    def __init__(self, graph, max_trees=MAX_TREES, max_nodes=MAX_CACHED_NODES):
+        self.graph = graph
+        self.max_trees = max_trees
+        self.max_nodes = max_nodes
+        self._trees = OrderedDict()  # source -> ShortestPathTree, oldest first
+        self._cached_nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.repairs = 0  # hits that needed an incremental update
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._trees)
+
+    def clear(self):
+        self._trees.clear()
+        self._cached_nodes = 0
+
+    def lookup(self, source):
+        # Tree for source valid at the current graph version, or None (a miss)
+        tree = self.current(source)
+        if tree is None:
+            self.misses += 1
+            return None
+        self._trees.move_to_end(source)
+        self.hits += 1
+        return tree
+
+    def current(self, source):
+        # Like lookup() but without touching the hit/miss counters or LRU order
+        tree = self._trees.get(source)
+        if tree is not None and tree.version != self.graph.version:
+            if self._bring_up_to_date(tree):
+                self.repairs += 1
+            else:
+                self._discard(source)
+                self.invalidations += 1
+                tree = None
+        return tree
+
+    def path(self, source, target):
+        # (path, distance) computing the tree on a miss
+        tree = self.lookup(source)
+        if tree is None:
+            tree = self.store(source, self.graph.version,
+                              *algorithms.shortest_path_tree(self.graph, source))
+        return tree.path_to(target)
+
+    def store(self, source, version, distances, previous_nodes):
+        # Adds a tree computed at version, e.g. by a worker on a snapshot;
+        # it is brought up to date on its next lookup
+        self._discard(source)
+        tree = ShortestPathTree(source, version, distances, previous_nodes)
+        self._trees[source] = tree
+        self._cached_nodes += len(distances)
+        while self._trees and (len(self._trees) > self.max_trees or self._cached_nodes > self.max_nodes):
+            self._discard(next(iter(self._trees)))
+        return tree
+
+    def stats(self):
+        return {"trees": len(self._trees), "hits": self.hits, "misses": self.misses,
+                "repairs": self.repairs, "invalidations": self.invalidations}
+
+    def _bring_up_to_date(self, tree):
+        changes = self.graph.changes_since(tree.version)
+        if changes is None:
+            return False
+        before = len(tree.distances)
+        if not tree._repair(self.graph, changes):
+            return False
+        self._cached_nodes += len(tree.distances) - before
+        tree.version = self.graph.version
+        return True
+
+    def _discard(self, source):
+        tree = self._trees.pop(source, None)
+        if tree is not None:
+            self._cached_nodes -= len(tree.distances)
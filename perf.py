@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Opt-in instrumentation: counters, timing histograms and a trace of timed
+# spans that can be saved in the Chrome trace format (chrome://tracing,
+# Perfetto).
+#
+# Hot paths are registered once with probe(obj, "method", name).  Nothing is
+# wrapped until enable(), which replaces each registered method by a timing
+# wrapper stored on the instance; disable() deletes the wrappers again, so
+# with instrumentation off the probed code runs exactly as before.  count()
+# and record() check the module flag first and cost one attribute test when
+# off.  All of this is meant for the Tk thread.
+
+MAX_TRACE_EVENTS = 200000
+HISTOGRAM_BUCKETS = 40  # powers of two from 1 us
+
+enabled = False
+counters = {}  # name -> running total
+histograms = {}  # name -> Histogram of durations
+_trace = deque(maxlen=MAX_TRACE_EVENTS)  # (name, start us, duration us)
+_probes = []  # (object, attribute, name)
+_installed = {}  # (id(object), attribute) -> (object, original or None)
+_origin = time.perf_counter()
+
+
+class Histogram:
+    # Durations in seconds, bucketed by powers of two of microseconds
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding that fraction of the samples
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, samples in enumerate(self.buckets):
+            seen += samples
+            if samples and seen >= wanted:
+                return (1 << bucket) / 1e6
+        return 0.0
+
+
+def count(name, amount=1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def record(name, started, ended=None):
+    # Adds one timed span; started and ended are perf_counter() values
+    if not enabled:
+        return
+    if ended is None:
+        ended = time.perf_counter()
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.add(ended - started)
+    _trace.append((name, (started - _origin) * 1e6, (ended - started) * 1e6))
+
+
+def probe(obj, attribute, name=None):
+    # Times obj.attribute(...) calls under name while enabled
+    entry = (obj, attribute, name or attribute)
+    _probes.append(entry)
+    if enabled:
+        _install(*entry)
+
+
+def unprobe(obj):
+    # Forgets every probe on obj, e.g. before it is discarded
+    for entry in [entry for entry in _probes if entry[0] is obj]:
+        _uninstall(entry[0], entry[1])
+        _probes.remove(entry)
+
+
+def enable():
+    global enabled
+    if not enabled:
+        enabled = True
+        for entry in _probes:
+            _install(*entry)
+
+
+def disable():
+    global enabled
+    enabled = False
+    for obj, attribute, _ in _probes:
+        _uninstall(obj, attribute)
+
+
+def reset():
+    counters.clear()
+    histograms.clear()
+    _trace.clear()
+
+
+def _install(obj, attribute, name):
+    key = (id(obj), attribute)
+    if key in _installed:
+        return
+    method = getattr(obj, attribute)
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record(name, started)
+
+    _installed[key] = (obj, vars(obj).get(attribute))
+    setattr(obj, attribute, timed)
+
+
+def _uninstall(obj, attribute):
+    entry = _installed.pop((id(obj), attribute), None)
+    if entry is None:
+        return
+    original = entry[1]
+    if original is None:
+        delattr(obj, attribute)
+    else:
+        setattr(obj, attribute, original)
+
+
+def snapshot():
+    # Plain-data summary of the counters and histograms
+    return {
+        "counters": dict(counters),
+        "timers": {name: {"count": h.count, "total_ms": h.total * 1e3, "mean_ms": h.mean * 1e3,
+                          "p95_ms": h.percentile(0.95) * 1e3, "max_ms": h.max * 1e3}
+                   for name, h in histograms.items()},
+    }
+
+
+def save_chrome_trace(path):
+    # Timed spans as complete ("X") events on one thread, plus the counter
+    # totals as a final counter ("C") event
+    pid = os.getpid()
+    tid = threading.get_ident()
+    events = [{"name": name, "cat": name.split(".")[0], "ph": "X", "ts": round(start, 3),
+               "dur": round(duration, 3), "pid": pid, "tid": tid}
+              for name, start, duration in _trace]
+    if counters:
+        events.append({"name": "counters", "ph": "C", "pid": pid, "tid": tid,
+                       "ts": round((time.perf_counter() - _origin) * 1e6, 3), "args": dict(counters)})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": snapshot()}, f)
+    return len(events)
@@ -0,0 +1,113 @@
+import time
+from collections import deque
+
+import perf
+
+# On-canvas readout of the perf instrumentation.
+#
+# A heartbeat after() callback every FRAME_MS measures how late the event
+# loop runs it: a frame time well above FRAME_MS means something on the Tk
+# thread blocked.  Every REFRESH_MS the text is rebuilt from the frame times,
+# the canvas item count, and the change in perf counters and histograms since
+# the previous refresh: events applied per second, algorithm steps received
+# per second, and the milliseconds per second spent in each timed hot path.
+
+FRAME_MS = 16
+REFRESH_MS = 500
+FRAME_WINDOW = 60  # frames averaged
+TOP_TIMERS = 6
+OVERLAY_TAG = "perfoverlay"
+
+
+class PerfOverlay:
+    def __init__(self, root, canvas, text_color, background):
+        self.root = root
+        self.canvas = canvas
+        self.text_color = text_color
+        self.background = background
+        self.visible = False
+        self.frames = deque(maxlen=FRAME_WINDOW)  # seconds between heartbeats
+        self._last_beat = None
+        self._beat_id = None
+        self._refresh_id = None
+        self._text_id = None
+        self._box_id = None
+        self._last_refresh = None
+        self._last_counts = {}  # counter / timer name -> value at the last refresh
+
+    def show(self):
+        if self.visible:
+            return
+        self.visible = True
+        self.frames.clear()
+        self._last_beat = time.perf_counter()
+        self._last_refresh = self._last_beat
+        self._last_counts = self._totals()
+        self._create_items()
+        self._beat_id = self.root.after(FRAME_MS, self._beat)
+        self._refresh_id = self.root.after(REFRESH_MS, self._refresh)
+
+    def hide(self):
+        if not self.visible:
+            return
+        self.visible = False
+        for after_id in (self._beat_id, self._refresh_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._beat_id = self._refresh_id = None
+        self.canvas.delete(OVERLAY_TAG)
+        self._text_id = self._box_id = None
+
+    def _create_items(self):
+        self._box_id = self.canvas.create_rectangle(6, 6, 6, 6, fill=self.background, outline="",
+                                                    tags=(OVERLAY_TAG,))
+        self._text_id = self.canvas.create_text(12, 10, anchor="nw", fill=self.text_color,
+                                                font=('Courier', 10), text="", tags=(OVERLAY_TAG,))
+
+    def _beat(self):
+        now = time.perf_counter()
+        self.frames.append(now - self._last_beat)
+        self._last_beat = now
+        self._beat_id = self.root.after(FRAME_MS, self._beat)
+
+    def _totals(self):
+        totals = dict(perf.counters)
+        for name, histogram in perf.histograms.items():
+            totals["#" + name] = histogram.count
+            totals["@" + name] = histogram.total
+        return totals
+
+    def _refresh(self):
+        now = time.perf_counter()
+        elapsed = max(now - self._last_refresh, 1e-6)
+        totals = self._totals()
+        previous = self._last_counts
+        self._last_counts = totals
+        self._last_refresh = now
+
+        def rate(name):
+            return (totals.get(name, 0) - previous.get(name, 0)) / elapsed
+
+        lines = []
+        if self.frames:
+            lines.append(f"frame   {sum(self.frames) / len(self.frames) * 1e3:6.1f} ms avg "
+                         f"{max(self.frames) * 1e3:6.1f} max")
+        lines.append(f"items   {len(self.canvas.find_all()) - 2:6d}")
+        lines.append(f"events  {rate('#playback.event'):6.0f} /s")
+        for name in sorted(totals):
+            if name.startswith("steps."):
+                steps = rate(name)
+                if steps:
+                    lines.append(f"{name[6:]:<8}{steps:6.0f} steps/s")
+        busy = sorted(((rate("@" + name), name) for name in perf.histograms), reverse=True)
+        for ms_per_s, name in busy[:TOP_TIMERS]:
+            if ms_per_s > 0:
+                lines.append(f"{name:<18}{ms_per_s * 1e3:6.1f} ms/s {rate('#' + name):6.0f} calls/s")
+
+        if not self.canvas.find_withtag(self._text_id):
+            self._create_items()  # the canvas was cleared
+        self.canvas.itemconfig(self._text_id, text="\n".join(lines))
+        x1, y1, x2, y2 = self.canvas.bbox(self._text_id) or (12, 10, 12, 10)
+        self.canvas.coords(self._box_id, x1 - 6, y1 - 4, x2 + 6, y2 + 4)
+        self.canvas.tag_raise(OVERLAY_TAG)
+        self._refresh_id = self.root.after(REFRESH_MS, self._refresh)
@@ -0,0 +1,153 @@
+import algorithms
+
+# Non-blocking replay of algorithm traces on the Tk event loop.
+#
+# Events are recorded as the algorithm produces them (either up front, or
+# streamed in through extend() from a background run) and each one is applied
+# from an after() callback so the window keeps handling input between steps.
+# Playback that catches up with a still-streaming trace waits for more events.
+# Seeking backwards resets the canvas and silently re-applies the prefix of
+# the trace.
+
+# Pause after each event kind at 1x speed, in ms
+DEFAULT_DELAYS = {
+    algorithms.VISIT: 500,
+    algorithms.TRAVERSE: 300,
+    algorithms.SETTLE: 300,
+    algorithms.RELAX: 200,
+    algorithms.PATH: 0,
+}
+
+# Speed label -> multiplier; None renders the final state immediately
+SPEEDS = {
+    "0.25x": 0.25,
+    "0.5x": 0.5,
+    "1x": 1.0,
+    "2x": 2.0,
+    "4x": 4.0,
+    "16x": 16.0,
+    "Instant": None,
+}
+
+
+class Playback:
+    def __init__(self, root, apply_event, reset, on_finish=None, on_progress=None):
+        # apply_event(event, quiet) renders one event; quiet is True while
+        # seeking so the callback can skip logging
+        self.root = root
+        self.apply_event = apply_event
+        self.reset = reset
+        self.on_finish = on_finish
+        self.on_progress = on_progress
+        self.delays = dict(DEFAULT_DELAYS)
+        self.speed = 1.0
+        self.events = []
+        self.complete = True  # False while more events may be streamed in
+        self.index = 0
+        self.playing = False
+        self._after_id = None
+
+    def load(self, events, complete=True):
+        # Replaces the current trace and rewinds to its start; with
+        # complete=False more events are expected through extend()
+        self.pause()
+        self.events = list(events)
+        self.complete = complete
+        self.index = 0
+        self._report_progress()
+
+    def extend(self, events, complete=False):
+        # Appends streamed events; complete marks the end of the trace
+        self.events.extend(events)
+        self.complete = complete
+        self._report_progress()
+        if self.playing and self._after_id is None:
+            self._schedule(0)  # was waiting at the end of the received events
+
+    @property
+    def finished(self):
+        return self.complete and self.index >= len(self.events)
+
+    def play(self):
+        if self.playing or self.finished:
+            return
+        self.playing = True
+        self._schedule(0)
+
+    def pause(self):
+        self.playing = False
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def step(self):
+        self.pause()
+        if self.index < len(self.events):
+            self._apply_next(quiet=False)
+
+    def seek(self, index):
+        index = max(0, min(int(index), len(self.events)))
+        was_playing = self.playing
+        self.pause()
+        if index < self.index:
+            self.reset()
+            self.index = 0
+        self._advance(index)
+        if self.finished:
+            self._finish()
+        elif was_playing:
+            self.play()
+
+    def set_speed(self, speed):
+        self.speed = speed
+        if self.playing and speed is None:
+            self.seek(len(self.events))
+
+    def _advance(self, index):
+        # Applies events quietly up to index
+        while self.index < index:
+            self.apply_event(self.events[self.index], True)
+            self.index += 1
+        self._report_progress()
+
+    def _schedule(self, delay):
+        self._after_id = self.root.after(delay, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        if not self.playing:
+            return
+        if self.speed is None:
+            self._advance(len(self.events))
+        if self.index >= len(self.events):
+            if self.finished:
+                self._finish()
+            return  # still playing: extend() resumes with the next events
+        event = self._apply_next(quiet=False)
+        if self.playing and event is not None:
+            self._schedule(int(self.delays.get(event[0], 0) / self.speed))
+
+    def _apply_next(self, quiet):
+        event = self.events[self.index]
+        self.apply_event(event, quiet)
+        self.index += 1
+        self._report_progress()
+        if self.finished:
+            self._finish()
+            return None
+        return event
+
+    def _finish(self):
+        self.playing = False
+        if self.on_finish is not None:
+            self.on_finish()
+
+    def _report_progress(self):
+        if self.on_progress is not None:
+            self.on_progress(self.index, len(self.events))
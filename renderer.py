@@ -0,0 +1,217 @@
+from graph_core import edge_key
+from tween import Animator
+
+# Batched canvas styling for node and edge highlight state.
+#
+# Callers record the colour each node/edge should have; nothing touches the
+# canvas until flush(), which runs once per frame from an after_idle callback.
+# flush() diffs the requested state against what is currently drawn and only
+# reconfigures items whose state changed.  Every non-default state also owns a
+# shared canvas tag, so changes are issued as one Tcl call per state using tag
+# expressions ("node1||node7||...") and a full reset is one call per state in
+# use rather than one per item.
+
+# Max tags joined into one tag expression
+EXPRESSION_CHUNK = 256
+
+# Extra tag carried by node ovals (not their labels), which take the fill
+NODE_SHAPE_TAG = "nodeshape"
+
+
+def node_tag(node):
+    return f"node{node}"
+
+
+def edge_tag(node1, node2):
+    key = edge_key(node1, node2)
+    return f"edge{key[0]}_{key[1]}"
+
+
+class CanvasRenderer:
+    def __init__(self, canvas, node_color, edge_color, edge_width=3):
+        self.canvas = canvas
+        self.node_color = node_color
+        self.edge_color = edge_color
+        self.edge_width = edge_width
+        self._flush_id = None
+        # Fades share one frame timer and are drawn by one flush per frame;
+        # flush is looked up per frame so that a perf probe installed on it
+        # later also times animation frames
+        self.animator = Animator(canvas, on_frame=lambda: self.flush())
+        self.clear()
+
+    def clear(self):
+        # Forget all drawn state, e.g. after canvas.delete("all")
+        if self._flush_id is not None:
+            self.canvas.after_cancel(self._flush_id)
+            self._flush_id = None
+        self.animator.cancel_all()
+        self.drawn_nodes = {}  # node -> fill, non-default only
+        self.drawn_edges = {}  # edge key -> (fill, width), non-default only
+        self.pending_nodes = {}
+        self.pending_edges = {}
+        self.pending_reset = False
+        self.calls = 0  # Tcl calls issued by flush(), for instrumentation
+
+    # State requests
+    def set_node(self, node, color):
+        self.animator.cancel(node)
+        self.pending_nodes[node] = color
+        self._schedule()
+
+    def fade_node(self, node, color, start=None, delay=0.0):
+        # Animates the fill from start (default: the current fill) to color
+        if start is None:
+            start = self.node_fill(node)
+        self.animator.color(node, start, color, lambda fill: self._fade_step(node, fill), delay=delay)
+
+    def node_fill(self, node):
+        # The fill node has or is about to get
+        color = self.animator.current(node)
+        if color is None:
+            color = self.pending_nodes.get(node)
+        if color is None:
+            color = self.drawn_nodes.get(node, self.node_color)
+        return color
+
+    def _fade_step(self, node, color):
+        # The animator flushes after the frame
+        self.pending_nodes[node] = color
+
+    def set_edge(self, node1, node2, color, width=4):
+        self.pending_edges[edge_key(node1, node2)] = (color, width)
+        self._schedule()
+
+    def reset(self):
+        self.animator.cancel_all()
+        self.pending_reset = True
+        self.pending_nodes.clear()
+        self.pending_edges.clear()
+        self._schedule()
+
+    def forget_node(self, node):
+        # The node's items were deleted from the canvas
+        self.animator.cancel(node)
+        self.drawn_nodes.pop(node, None)
+        self.pending_nodes.pop(node, None)
+
+    def forget_edge(self, node1, node2):
+        key = edge_key(node1, node2)
+        self.drawn_edges.pop(key, None)
+        self.pending_edges.pop(key, None)
+
+    # Style for newly created items, so culled items come back in their state
+    def node_style(self, node):
+        # Returns (fill, extra tags)
+        color = self.drawn_nodes.get(node)
+        if color is None:
+            return self.node_color, ()
+        return color, (self._node_state_tag(color),)
+
+    def edge_style(self, node1, node2):
+        # Returns (fill, width, extra tags)
+        state = self.drawn_edges.get(edge_key(node1, node2))
+        if state is None:
+            return self.edge_color, self.edge_width, ()
+        return state[0], state[1], (self._edge_state_tag(*state),)
+
+    # Drawing
+    def flush(self):
+        if self._flush_id is not None:
+            self.canvas.after_cancel(self._flush_id)
+            self._flush_id = None
+        if self.pending_reset:
+            self._reset_drawn()
+        self._flush_nodes()
+        self._flush_edges()
+
+    def _schedule(self):
+        if self._flush_id is None:
+            self._flush_id = self.canvas.after_idle(self._run_scheduled_flush)
+
+    def _run_scheduled_flush(self):
+        self._flush_id = None
+        self.flush()
+
+    def _reset_drawn(self):
+        self.pending_reset = False
+        for color in set(self.drawn_nodes.values()):
+            tag = self._node_state_tag(color)
+            self._call(self.canvas.itemconfig, tag, fill=self.node_color)
+            self._call(self.canvas.dtag, tag, tag)
+        for color, width in set(self.drawn_edges.values()):
+            tag = self._edge_state_tag(color, width)
+            self._call(self.canvas.itemconfig, tag, fill=self.edge_color, width=self.edge_width)
+            self._call(self.canvas.dtag, tag, tag)
+        self.drawn_nodes.clear()
+        self.drawn_edges.clear()
+
+    def _flush_nodes(self):
+        changes = {}  # (old, new) -> [node tags]
+        drawn = self.drawn_nodes
+        for node, color in self.pending_nodes.items():
+            if color == self.node_color:
+                color = None
+            old = drawn.get(node)
+            if old != color:
+                changes.setdefault((old, color), []).append(node_tag(node))
+                if color is None:
+                    del drawn[node]
+                else:
+                    drawn[node] = color
+        self.pending_nodes.clear()
+
+        for (old, color), tags in changes.items():
+            for expression in self._expressions(tags):
+                expression = f"({expression})&&{NODE_SHAPE_TAG}"
+                if old is not None:
+                    self._call(self.canvas.dtag, expression, self._node_state_tag(old))
+                if color is None:
+                    self._call(self.canvas.itemconfig, expression, fill=self.node_color)
+                else:
+                    self._call(self.canvas.addtag_withtag, self._node_state_tag(color), expression)
+                    self._call(self.canvas.itemconfig, expression, fill=color)
+
+    def _flush_edges(self):
+        changes = {}
+        drawn = self.drawn_edges
+        default = (self.edge_color, self.edge_width)
+        for key, state in self.pending_edges.items():
+            if state == default:
+                state = None
+            old = drawn.get(key)
+            if old != state:
+                changes.setdefault((old, state), []).append(edge_tag(*key))
+                if state is None:
+                    del drawn[key]
+                else:
+                    drawn[key] = state
+        self.pending_edges.clear()
+
+        for (old, state), tags in changes.items():
+            for expression in self._expressions(tags):
+                if old is not None:
+                    self._call(self.canvas.dtag, expression, self._edge_state_tag(*old))
+                if state is None:
+                    self._call(self.canvas.itemconfig, expression, fill=self.edge_color,
+                               width=self.edge_width)
+                else:
+                    self._call(self.canvas.addtag_withtag, self._edge_state_tag(*state), expression)
+                    self._call(self.canvas.itemconfig, expression, fill=state[0], width=state[1])
+
+    def _call(self, method, *args, **kwargs):
+        self.calls += 1
+        method(*args, **kwargs)
+
+    @staticmethod
+    def _expressions(tags):
+        for i in range(0, len(tags), EXPRESSION_CHUNK):
+            yield "||".join(tags[i:i + EXPRESSION_CHUNK])
+
+    @staticmethod
+    def _node_state_tag(color):
+        return "nstate" + color.lstrip("#")
+
+    @staticmethod
+    def _edge_state_tag(color, width):
+        return f"estate{color.lstrip('#')}_{width}"
@@ -0,0 +1,159 @@
+import threading
+import weakref
+
+# Reusable per-graph state for shortest path searches.
+#
+# Labels live in dense arrays indexed by node id instead of dicts built over
+# the whole graph.  Every entry carries a generation stamp and only counts as
+# set when its stamp matches the current search, so starting a search is O(1)
+# and its cost is proportional to the nodes it touches, not to V.  The arrays
+# are cached per graph and reused by the next search.
+#
+# IndexedHeap is a binary min-heap over node ids with decrease-key: each node
+# is in the heap at most once, so there are no stale entries to skip.  Being
+# pure Python it loses to heapq on Dijkstra's relax-heavy loop (see
+# benchmarks/dijkstra.py); it suits searches that need the queue to hold one
+# entry per node or to read a node's current key.
+
+INF = float('inf')
+
+# Node states within one generation
+UNSEEN = 0
+QUEUED = 1
+SETTLED = 2
+
+
+class IndexedHeap:
+    def __init__(self, capacity):
+        self._nodes = []  # heap order
+        self._keys = []  # key of _nodes[i]
+        self._pos = [0] * capacity  # node -> heap index
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def clear(self):
+        del self._nodes[:]
+        del self._keys[:]
+
+    def grow(self, capacity):
+        if capacity > len(self._pos):
+            self._pos.extend([0] * (capacity - len(self._pos)))
+
+    def peek_key(self):
+        return self._keys[0]
+
+    def push(self, node, key):
+        # node must not be in the heap
+        self._nodes.append(node)
+        self._keys.append(key)
+        self._sift_up(len(self._nodes) - 1, node, key)
+
+    def decrease(self, node, key):
+        # node must be in the heap with a larger key
+        self._sift_up(self._pos[node], node, key)
+
+    def pop(self):
+        # Returns (key, node) with the smallest key
+        nodes, keys = self._nodes, self._keys
+        top_node, top_key = nodes[0], keys[0]
+        last_node, last_key = nodes.pop(), keys.pop()
+        if nodes:
+            self._sift_down(0, last_node, last_key)
+        return top_key, top_node
+
+    def _sift_up(self, i, node, key):
+        nodes, keys, pos = self._nodes, self._keys, self._pos
+        while i:
+            parent = (i - 1) >> 1
+            parent_key = keys[parent]
+            if parent_key <= key:
+                break
+            parent_node = nodes[parent]
+            nodes[i] = parent_node
+            keys[i] = parent_key
+            pos[parent_node] = i
+            i = parent
+        nodes[i] = node
+        keys[i] = key
+        pos[node] = i
+
+    def _sift_down(self, i, node, key):
+        nodes, keys, pos = self._nodes, self._keys, self._pos
+        size = len(nodes)
+        child = 2 * i + 1
+        while child < size:
+            child_key = keys[child]
+            right = child + 1
+            if right < size and keys[right] < child_key:
+                child = right
+                child_key = keys[right]
+            if key <= child_key:
+                break
+            child_node = nodes[child]
+            nodes[i] = child_node
+            keys[i] = child_key
+            pos[child_node] = i
+            i = child
+            child = 2 * i + 1
+        nodes[i] = node
+        keys[i] = key
+        pos[node] = i
+
+
+class SearchState:
+    # distances / previous / state labels for one search at a time
+    def __init__(self, capacity):
+        self.capacity = 0
+        self.generation = 0
+        self.distances = []
+        self.previous = []
+        self.states = []
+        self.stamps = []
+        self.heap = IndexedHeap(0)
+        self.in_use = False
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        self.distances.extend([0.0] * extra)
+        self.previous.extend([0] * extra)
+        self.states.extend([UNSEEN] * extra)
+        self.stamps.extend([0] * extra)
+        self.heap.grow(capacity)
+        self.capacity = capacity
+
+    def begin(self):
+        # Invalidates every label in O(1)
+        self.generation += 1
+        self.heap.clear()
+
+    def touched(self):
+        # Nodes labelled in the current search
+        generation, stamps = self.generation, self.stamps
+        return (node for node in range(self.capacity) if stamps[node] == generation)
+
+
+_states = weakref.WeakKeyDictionary()  # graph -> SearchState
+_lock = threading.Lock()
+
+
+def acquire(graph):
+    # A state sized for graph, reused when no other search is using it
+    with _lock:
+        state = _states.get(graph)
+        if state is None or state.in_use:
+            state = SearchState(graph.node_count)
+            if graph not in _states:
+                _states[graph] = state
+        state.grow(graph.node_count)
+        state.in_use = True
+    state.begin()
+    return state
+
+
+def release(state):
+    with _lock:
+        state.in_use = False
@@ -0,0 +1,252 @@
+import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # the reordering falls back to plain Python
+    np = None
+
+import shared_graph
+from graph_core import Graph
+from worker import DONE, FAILED
+
+# Partitioned graphs and searches that run on all worker processes at once.
+#
+# ShardedGraph takes the part of every node (algorithms.partition_graph) and
+# renumbers the nodes so that each part is a consecutive id range, its shard.
+# The renumbered graph is shared once (shared_graph.share); a shard's
+# adjacency is then a contiguous slice of the shared CSR arrays, read only by
+# the worker running that shard.
+#
+# ShardedJob runs BFS, multi-source shortest paths or connected components in
+# bulk-synchronous rounds on the AlgorithmRunner.  The per-node state lives in
+# SharedArrays that every shard writes for its own nodes.  In a round each
+# shard with work runs algorithms.shard_search / shard_components on its nodes
+# until it settles, and returns the offers it makes to nodes of other shards;
+# the job routes them to their shards for the next round, and stops after a
+# round without offers.  Rounds are bounded by how often shortest paths (or
+# component spans) cross between shards, which a good partition keeps low.
+
+BFS = "bfs"
+NEAREST = "nearest"  # multi-source shortest paths: distance to and id of the nearest source
+COMPONENTS = "components"
+
+
+class ShardedGraph:
+    def __init__(self, graph, labels, parts):
+        # labels[node] is the part of node, as partition_graph() returned it for
+        # graph at its current version
+        self.version = graph.version
+        self.node_count = graph.node_count
+        self.labels = labels
+        self.parts = parts
+        order = sorted(graph.nodes(), key=labels.__getitem__)
+        self.order = array.array('i', order)  # shard position -> node
+        self.rank = array.array('i', [-1]) * graph.node_count  # node -> shard position
+        sizes = [0] * parts
+        for position, node in enumerate(order):
+            self.rank[node] = position
+            sizes[labels[node]] += 1
+        self.sizes = sizes
+        self.bounds = [0]  # shard i holds positions bounds[i]..bounds[i + 1] - 1
+        for size in sizes:
+            self.bounds.append(self.bounds[-1] + size)
+        reordered = Graph()
+        reordered.load_csr(*_reordered_arrays(graph, self.order, self.rank))
+        reordered.version = reordered._log_start = graph.version
+        self.graph = shared_graph.share(reordered)
+
+    @property
+    def ranges(self):
+        return list(zip(self.bounds, self.bounds[1:]))
+
+    def shard_of(self, position):
+        return bisect_right(self.bounds, position) - 1
+
+    def release(self):
+        self.graph.release()
+
+
+def _reordered_arrays(graph, order, rank):
+    # load_csr() arguments for graph with node order[i] renumbered to i
+    offsets, targets, weights = graph.csr()
+    tails = graph.csr_tails()
+    xs, ys = graph.coordinate_arrays()
+    if np is not None:
+        return _reordered_arrays_numpy(offsets, targets, weights, tails, xs, ys, order, rank)
+    new_offsets = array.array('q', [0])
+    new_targets = array.array('i')
+    new_weights = array.array('d')
+    new_tails = bytearray()
+    by_target = array.array('i')
+    for node in order:
+        start, end = offsets[node], offsets[node + 1]
+        base = len(new_targets)
+        new_targets.extend(rank[target] for target in targets[start:end])
+        new_weights.extend(weights[start:end])
+        new_tails.extend(tails[start:end])
+        by_target.extend(sorted(range(base, len(new_targets)), key=new_targets.__getitem__))
+        new_offsets.append(len(new_targets))
+    new_xs = array.array('d', (xs[node] for node in order))
+    new_ys = array.array('d', (ys[node] for node in order))
+    return new_xs, new_ys, new_offsets, new_targets, new_weights, new_tails, by_target
+
+
+def _reordered_arrays_numpy(offsets, targets, weights, tails, xs, ys, order, rank):
+    order = np.frombuffer(order, dtype=np.int32)
+    rank = np.frombuffer(rank, dtype=np.int32)
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    starts = offsets[order]
+    degrees = offsets[order + 1] - starts
+    new_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(degrees, out=new_offsets[1:])
+    # Old slot of every new slot, row by row
+    slots = np.repeat(starts - new_offsets[:-1], degrees) + np.arange(new_offsets[-1])
+    new_targets = rank[np.frombuffer(targets, dtype=np.int32)[slots]]
+    rows = np.repeat(np.arange(len(order)), degrees)
+    by_target = np.lexsort((new_targets, rows)).astype(np.int32)
+    return (_to_array(np.frombuffer(xs, dtype=np.float64)[order], 'd'),
+            _to_array(np.frombuffer(ys, dtype=np.float64)[order], 'd'),
+            _to_array(new_offsets, 'q'), _to_array(new_targets, 'i'),
+            _to_array(np.frombuffer(weights, dtype=np.float64)[slots], 'd'),
+            bytearray(np.frombuffer(tails, dtype=np.uint8)[slots].tobytes()),
+            _to_array(by_target, 'i'))
+
+
+def _to_array(values, typecode):
+    result = array.array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+
+class ShardedJob:
+    def __init__(self, runner, shards, kind, sources=(), on_done=None, on_progress=None):
+        # kind is BFS, NEAREST or COMPONENTS; sources are node ids.  on_done(job)
+        # and on_progress(job) are called on the Tk thread; after on_done,
+        # job.error is None or the failure text, and job.result holds what
+        # the single-process algorithm returns: (hops, parents) arrays like
+        # bfs_levels(), {node: (distance, source)} like multi_source_dijkstra(),
+        # or (labels, sizes) like connected_components()
+        self.runner = runner
+        self.shards = shards
+        self.kind = kind
+        self.version = shards.version
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.rounds = 0
+        self.offers = 0  # boundary offers exchanged
+        self.result = None
+        self.error = None
+        self.finished = False
+        self._runs = {}  # run id -> shard index
+        self._pending = [[] for _ in range(shards.parts)]  # offers for the next round
+        positions = len(shards.order)
+        if kind == COMPONENTS:
+            self._labels = shared_graph.share_array(array.array('i', range(positions)))
+            self._arrays = [self._labels]
+        else:
+            self._distances = shared_graph.share_array(array.array('d', [float('inf')]) * positions)
+            self._via = shared_graph.share_array(array.array('i', [-1]) * positions)
+            self._arrays = [self._distances, self._via]
+            for source in sources:
+                position = shards.rank[source]
+                via = position if kind == NEAREST else -1
+                self._pending[shards.shard_of(position)].append((position, 0, via))
+        runner.start()
+        self._start_round()
+
+    def cancel(self):
+        for run_id in list(self._runs):
+            self.runner.cancel(run_id)
+
+    def _start_round(self):
+        first = self.rounds == 0
+        self.rounds += 1
+        graph = self.shards.graph
+        for index, (lo, hi) in enumerate(self.shards.ranges):
+            updates = self._pending[index]
+            if self.kind == COMPONENTS:
+                if not first and not updates:
+                    continue
+                run_id = self.runner.submit("shard_components", graph,
+                                            (lo, hi, self._labels, None if first else updates),
+                                            None, self._on_round)
+            else:
+                if not updates:
+                    continue
+                nearest = self.kind == NEAREST
+                run_id = self.runner.submit("shard_search", graph,
+                                            (lo, hi, self._distances, self._via, updates, nearest, nearest),
+                                            None, self._on_round)
+            self._runs[run_id] = index
+        self._pending = [[] for _ in range(self.shards.parts)]
+        if not self._runs:
+            self._finish()
+
+    def _on_round(self, run_id, status, payload):
+        if not self._check(run_id, status, payload):
+            return
+        offers, _ = payload
+        self.offers += len(offers)
+        for offer in offers:
+            self._pending[self.shards.shard_of(offer[0])].append(offer)
+        if self._runs:
+            return
+        if self.on_progress is not None:
+            self.on_progress(self)
+        if any(self._pending):
+            self._start_round()
+        else:
+            self._collect()
+            self._finish()
+
+    def _check(self, run_id, status, payload):
+        # True for a successful shard; the first failure ends the job
+        if self._runs.pop(run_id, None) is None or self.finished:
+            return False
+        if status == DONE:
+            return True
+        self.error = payload if status == FAILED else "cancelled"
+        self._finish()
+        self.cancel()
+        return False
+
+    def _collect(self):
+        # Translates the shared state back to node ids
+        order = self.shards.order
+        node_count = self.shards.node_count
+        if self.kind == COMPONENTS:
+            labels = self._labels.values
+            counts = {}
+            for position in range(len(order)):
+                counts[labels[position]] = counts.get(labels[position], 0) + 1
+            ranked = sorted(counts, key=counts.__getitem__, reverse=True)
+            index = {label: i for i, label in enumerate(ranked)}
+            result = array.array('i', [-1]) * node_count
+            for position, node in enumerate(order):
+                result[node] = index[labels[position]]
+            self.result = result, [counts[label] for label in ranked]
+            return
+        distances = self._distances.values
+        via = self._via.values
+        inf = float('inf')
+        if self.kind == NEAREST:
+            self.result = {node: (distances[position], order[via[position]])
+                           for position, node in enumerate(order) if distances[position] < inf}
+            return
+        hops = array.array('i', [-1]) * node_count
+        parents = array.array('i', [-1]) * node_count
+        for position, node in enumerate(order):
+            if distances[position] < inf:
+                hops[node] = int(distances[position])
+                if via[position] >= 0:
+                    parents[node] = order[via[position]]
+        self.result = hops, parents
+
+    def _finish(self):
+        self.finished = True
+        for shared in self._arrays:
+            shared.release()
+        self._arrays = []
+        if self.on_done is not None:
+            self.on_done(self)
@@ -0,0 +1,145 @@
+import array
+import atexit
+from multiprocessing import shared_memory
+
+import graph_io
+from graph_core import Graph
+
+# Read-only graphs in shared memory, for handing one graph to many worker
+# processes.
+#
+# share() copies a graph's CSR arrays once into a shared memory block laid out
+# like the .gvb binary format.  The SharedGraph it returns is an ordinary Graph
+# viewing that block.  Pickling it sends only the block name, so a worker
+# process maps the same pages instead of unpickling its own copy of the
+# arrays.  Edits to a SharedGraph go to its private delta layer as usual.
+#
+# The creating process calls release() once every run using the graph has
+# finished; workers keep their most recent attachments open for later runs.
+#
+# SharedArray is the writable counterpart for state that several workers
+# update at once, such as the per-node distances of a sharded search.  It
+# pickles by name the same way.
+
+MAX_ATTACHED = 2  # blocks a worker process keeps mapped
+MAX_ATTACHED_ARRAYS = 4
+
+_attached = {}  # block name -> SharedGraph, oldest first, in worker processes
+_attached_arrays = {}  # block name -> SharedArray, oldest first
+
+
+class SharedGraph(Graph):
+    def __init__(self, memory, version, owner=False):
+        super().__init__()
+        self._memory = memory
+        self._owner = owner  # the creator unlinks the block on release
+        graph_io.unpack_binary(self, memory.buf, memory.name)
+        self.version = self._log_start = version
+
+    @property
+    def name(self):
+        return self._memory.name if self._memory is not None else None
+
+    def __reduce__(self):
+        if self._memory is None:
+            raise ValueError("shared graph was released")
+        return _attach, (self._memory.name, self.version)
+
+    def release(self):
+        # Drops the views into the block first: it cannot be closed while
+        # they exist
+        if self._memory is None:
+            return
+        self.clear()
+        memory, self._memory = self._memory, None
+        memory.close()
+        if self._owner:
+            memory.unlink()
+
+
+def share(graph):
+    memory = shared_memory.SharedMemory(create=True, size=graph_io.binary_size(graph))
+    try:
+        graph_io.pack_binary(graph, memory.buf)
+    except Exception:
+        memory.close()
+        memory.unlink()
+        raise
+    return SharedGraph(memory, graph.version, owner=True)
+
+
+def _attach(name, version):
+    # Unpickling side: maps the block, reusing an earlier attachment
+    graph = _attached.get(name)
+    if graph is None:
+        try:
+            memory = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            # Released by its creator, so the run was cancelled.  Raising here
+            # would kill the pool process that is unpickling the call; the
+            # empty graph makes the run fail in run_trace instead.
+            return Graph()
+        if not _attached:
+            atexit.register(_release_attached)
+        while len(_attached) >= MAX_ATTACHED:
+            _attached.pop(next(iter(_attached))).release()
+        graph = _attached[name] = SharedGraph(memory, version)
+    return graph
+
+
+def _release_attached():
+    # Closing at interpreter exit would fail while the views still exist
+    while _attached:
+        _attached.popitem()[1].release()
+    while _attached_arrays:
+        _attached_arrays.popitem()[1].release()
+
+
+class SharedArray:
+    # Fixed-length array of one type code in a shared memory block; values is
+    # a memoryview indexed like an array.array
+    def __init__(self, memory, typecode, length, owner=False):
+        self._memory = memory
+        self._owner = owner
+        self.typecode = typecode
+        self.values = memory.buf[:length * array.array(typecode).itemsize].cast(typecode)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):
+        if self._memory is None:
+            raise ValueError("shared array was released")
+        return _attach_array, (self._memory.name, self.typecode, len(self.values))
+
+    def release(self):
+        if self._memory is None:
+            return
+        self.values.release()
+        memory, self._memory = self._memory, None
+        memory.close()
+        if self._owner:
+            memory.unlink()
+
+
+def share_array(values):
+    # Copies an array.array into a new block
+    size = len(values) * values.itemsize
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    memory.buf[:size] = memoryview(values).cast('B')
+    return SharedArray(memory, values.typecode, len(values), owner=True)
+
+
+def _attach_array(name, typecode, length):
+    shared = _attached_arrays.get(name)
+    if shared is None:
+        try:
+            memory = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None  # released by its job, which was cancelled; the run fails
+        if not _attached_arrays:
+            atexit.register(_release_attached)
+        while len(_attached_arrays) >= MAX_ATTACHED_ARRAYS:
+            _attached_arrays.pop(next(iter(_attached_arrays))).release()
+        shared = _attached_arrays[name] = SharedArray(memory, typecode, length)
+    return shared
@@ -0,0 +1,215 @@
+from graph_core import edge_key
+
+# Uniform grid spatial index used for canvas hit-testing.
+#
+# Items are registered in every grid cell they overlap, so a click only has to
+# look at the handful of items in the cells around it instead of every node or
+# edge on the canvas.  Segments are rasterised along their length rather than
+# by bounding box, so long diagonal edges do not flood the grid.
+
+
+class GridIndex:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> set of items
+        self.item_cells = {}  # item -> list of cells it was inserted into
+
+    def __len__(self):
+        return len(self.item_cells)
+
+    def __contains__(self, item):
+        return item in self.item_cells
+
+    def clear(self):
+        self.cells.clear()
+        self.item_cells.clear()
+
+    def insert_point(self, item, x, y, pad=0):
+        self.insert_box(item, x - pad, y - pad, x + pad, y + pad)
+
+    def insert_box(self, item, x1, y1, x2, y2):
+        size = self.cell_size
+        cells = [(cx, cy)
+                 for cx in range(int(x1 // size), int(x2 // size) + 1)
+                 for cy in range(int(y1 // size), int(y2 // size) + 1)]
+        self._insert(item, cells)
+
+    def insert_segment(self, item, x1, y1, x2, y2, pad=0):
+        # Walk the segment in half-cell steps and cover the padded box around
+        # each sample point
+        size = self.cell_size
+        length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        steps = max(1, int(length / (size / 2)) + 1)
+        cells = set()
+        for i in range(steps + 1):
+            px = x1 + (x2 - x1) * i / steps
+            py = y1 + (y2 - y1) * i / steps
+            for cx in range(int((px - pad) // size), int((px + pad) // size) + 1):
+                for cy in range(int((py - pad) // size), int((py + pad) // size) + 1):
+                    cells.add((cx, cy))
+        self._insert(item, list(cells))
+
+    def remove(self, item):
+        for cell in self.item_cells.pop(item, ()):
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def query(self, x, y, radius=0):
+        # Returns the set of items registered in cells overlapping the square
+        # of half-width radius around (x, y); callers do the exact test
+        return self.query_box(x - radius, y - radius, x + radius, y + radius)
+
+    def query_box(self, x1, y1, x2, y2):
+        size = self.cell_size
+        cx1, cx2 = int(min(x1, x2) // size), int(max(x1, x2) // size)
+        cy1, cy2 = int(min(y1, y2) // size), int(max(y1, y2) // size)
+        found = set()
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            # Box wider than the occupied grid (zoomed far out on a sparse
+            # layout): walk the occupied cells instead of the empty ones
+            for (cx, cy), bucket in self.cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found.update(bucket)
+            return found
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def _insert(self, item, cells):
+        if item in self.item_cells:
+            self.remove(item)
+        self.item_cells[item] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(item)
+
+
+# Distance from point (px,py) to segment (x1,y1)-(x2,y2), or None when the
+# point does not project onto the segment
+def segment_distance(px, py, x1, y1, x2, y2):
+    line_mag_sq = (x2 - x1) ** 2 + (y2 - y1) ** 2
+    if line_mag_sq < 0.000001:
+        return None
+
+    u = ((px - x1) * (x2 - x1) + (py - y1) * (y2 - y1)) / line_mag_sq
+    if u < 0 or u > 1:
+        return None
+
+    ix = x1 + u * (x2 - x1)
+    iy = y1 + u * (y2 - y1)
+    return ((px - ix) ** 2 + (py - iy) ** 2) ** 0.5
+
+
+def point_near_line(px, py, x1, y1, x2, y2, threshold=15):
+    dist = segment_distance(px, py, x1, y1, x2, y2)
+    return dist is not None and dist <= threshold
+
+
+class HitIndex:
+    # Node and edge hit-testing over a node -> (x, y) mapping such as
+    # Graph.positions.  Nodes hit within a node_radius box (the same test the
+    # GUI has always used), edges within edge_threshold of the line.
+    def __init__(self, positions, node_radius=30, edge_threshold=15, cell_size=64):
+        self.positions = positions
+        self.node_radius = node_radius
+        self.edge_threshold = edge_threshold
+        self.nodes = GridIndex(cell_size)
+        self.edges = GridIndex(cell_size)
+        self.edge_ends = {}  # canonical key -> (tail, head)
+        self._unindexed_edges = None  # graph whose edges are indexed on first use
+
+    def clear(self):
+        self.nodes.clear()
+        self.edges.clear()
+        self.edge_ends.clear()
+        self._unindexed_edges = None
+
+    def rebuild(self, graph):
+        # Bulk (re)index after an import or layout.  Nodes are bucketed
+        # directly; edges are only indexed on the first edge query, so loading
+        # a large graph does not pay for segment rasterisation up front.
+        self.clear()
+        size = self.nodes.cell_size
+        cells = self.nodes.cells
+        item_cells = self.nodes.item_cells
+        positions = self.positions
+        for node in graph.nodes():
+            x, y = positions[node]
+            cell = (int(x // size), int(y // size))
+            bucket = cells.get(cell)
+            if bucket is None:
+                bucket = cells[cell] = set()
+            bucket.add(node)
+            item_cells[node] = [cell]
+        self._unindexed_edges = graph
+
+    def _index_edges(self):
+        graph = self._unindexed_edges
+        self._unindexed_edges = None
+        for node1, node2, _ in graph.edges():
+            self.add_edge(node1, node2)
+
+    def add_node(self, node):
+        x, y = self.positions[node]
+        self.nodes.insert_point(node, x, y)
+
+    def remove_node(self, node):
+        self.nodes.remove(node)
+
+    def add_edge(self, node1, node2):
+        if self._unindexed_edges is not None:
+            return  # picked up from the graph when edges are indexed
+        key = edge_key(node1, node2)
+        x1, y1 = self.positions[node1]
+        x2, y2 = self.positions[node2]
+        self.edge_ends[key] = (node1, node2)
+        self.edges.insert_segment(key, x1, y1, x2, y2, pad=self.edge_threshold)
+
+    def remove_edge(self, node1, node2):
+        if self._unindexed_edges is not None:
+            return
+        key = edge_key(node1, node2)
+        self.edge_ends.pop(key, None)
+        self.edges.remove(key)
+
+    def node_at(self, x, y):
+        # Lowest node id whose hit box contains (x, y), or None
+        r = self.node_radius
+        hit = None
+        for node in self.nodes.query(x, y, r):
+            nx, ny = self.positions[node]
+            if abs(x - nx) < r and abs(y - ny) < r and (hit is None or node < hit):
+                hit = node
+        return hit
+
+    def nodes_in_box(self, x1, y1, x2, y2):
+        # Nodes whose centre lies inside the rectangle, in id order
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        found = []
+        for node in self.nodes.query_box(x1, y1, x2, y2):
+            nx, ny = self.positions[node]
+            if left <= nx <= right and top <= ny <= bottom:
+                found.append(node)
+        found.sort()
+        return found
+
+    def edge_at(self, x, y):
+        # (tail, head) of the closest edge within edge_threshold, or None
+        if self._unindexed_edges is not None:
+            self._index_edges()
+        best = None
+        best_dist = self.edge_threshold
+        for key in self.edges.query(x, y):
+            node1, node2 = self.edge_ends[key]
+            x1, y1 = self.positions[node1]
+            x2, y2 = self.positions[node2]
+            dist = segment_distance(x, y, x1, y1, x2, y2)
+            if dist is not None and dist <= best_dist:
+                best = (node1, node2)
+                best_dist = dist
+        return best
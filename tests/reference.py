@@ -0,0 +1,126 @@
+import heapq
+import math
+import random
+from collections import deque
+
+from graph_core import Graph
+
+# Plain reference implementations over Graph.neighbors() and random graphs
+# to check the engine and the algorithms against.
+
+
+def random_graph(seed, nodes=60, edges=120, max_weight=9):
+    rng = random.Random(seed)
+    graph = Graph()
+    for _ in range(nodes):
+        graph.add_node(rng.uniform(0, 1000), rng.uniform(0, 1000))
+    for _ in range(edges):
+        node1, node2 = rng.randrange(nodes), rng.randrange(nodes)
+        if node1 != node2 and not graph.has_edge(node1, node2):
+            graph.add_edge(node1, node2, rng.randint(1, max_weight))
+    return graph, rng
+
+
+def random_edit(graph, rng, max_weight=9):
+    # One random structural edit; returns its kind
+    nodes = list(graph.nodes())
+    choice = rng.random()
+    if choice < 0.35 and len(nodes) > 1:
+        node1, node2 = rng.sample(nodes, 2)
+        if not graph.has_edge(node1, node2):
+            graph.add_edge(node1, node2, rng.randint(1, max_weight))
+            return "add_edge"
+    elif choice < 0.55:
+        edges = list(graph.edges())
+        if edges:
+            tail, head, _ = rng.choice(edges)
+            graph.remove_edge(tail, head)
+            return "remove_edge"
+    elif choice < 0.75:
+        edges = list(graph.edges())
+        if edges:
+            tail, head, _ = rng.choice(edges)
+            graph.set_weight(tail, head, rng.randint(1, max_weight))
+            return "set_weight"
+    elif choice < 0.85:
+        graph.add_node(rng.uniform(0, 1000), rng.uniform(0, 1000))
+        return "add_node"
+    elif nodes:
+        graph.remove_node(rng.choice(nodes))
+        return "remove_node"
+    return None
+
+
+def state(graph):
+    # Comparable picture of a graph: live nodes and edges with weights
+    return sorted(graph.nodes()), sorted(graph.edges())
+
+
+def distances(graph, source):
+    result = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if distance > result[node]:
+            continue
+        for neighbor, weight in graph.neighbors(node):
+            if distance + weight < result.get(neighbor, math.inf):
+                result[neighbor] = distance + weight
+                heapq.heappush(heap, (distance + weight, neighbor))
+    return result
+
+
+def hops(graph, source):
+    result = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbor, _ in graph.neighbors(node):
+            if neighbor not in result:
+                result[neighbor] = result[node] + 1
+                queue.append(neighbor)
+    return result
+
+
+def components(graph):
+    # Sorted list of sorted node lists
+    seen = set()
+    groups = []
+    for node in graph.nodes():
+        if node in seen:
+            continue
+        group = list(hops(graph, node))
+        seen.update(group)
+        groups.append(sorted(group))
+    return sorted(groups)
+
+
+def drain(events):
+    # Runs an algorithm generator to the end and returns its return value
+    while True:
+        try:
+            next(events)
+        except StopIteration as stop:
+            return stop.value
+
+
+def final_path(events):
+    # (path, distance) from the PATH event of a search
+    for event in events:
+        if event[0] == "path":
+            return event[3], event[4]
+
+
+def path_length(graph, path):
+    return sum(graph.weight(node1, node2) for node1, node2 in zip(path, path[1:]))
+
+
+def csr_is_clean(graph):
+    # The CSR rows hold exactly the live adjacency
+    offsets, targets, weights = graph.csr()
+    for node in range(graph.node_count):
+        row = sorted(zip(targets[offsets[node]:offsets[node + 1]], weights[offsets[node]:offsets[node + 1]]))
+        expected = sorted(graph.neighbors(node)) if node in graph else []
+        if row != expected:
+            return False
+    return True
@@ -0,0 +1,132 @@
+import math
+
+import pytest
+
+import algorithms
+import landmarks
+import reference
+from graph_core import Graph
+
+
+@pytest.fixture(params=range(4))
+def edited_graph(request):
+    # A random graph with some deleted nodes and pending delta edits
+    graph, rng = reference.random_graph(request.param)
+    graph.compact()
+    for _ in range(30):
+        reference.random_edit(graph, rng)
+    return graph, rng
+
+
+def live_nodes(graph, rng, count):
+    return [rng.choice(list(graph.nodes())) for _ in range(count)]
+
+
+def test_bfs_and_dfs_visit_the_component_once(edited_graph):
+    graph, rng = edited_graph
+    for start in live_nodes(graph, rng, 5):
+        expected = sorted(reference.hops(graph, start))
+        bfs = algorithms.bfs_order(graph, start)
+        dfs = algorithms.dfs_order(graph, start)
+        assert sorted(bfs) == expected and len(bfs) == len(expected)
+        assert sorted(dfs) == expected and len(dfs) == len(expected)
+        levels = reference.hops(graph, start)
+        assert [levels[node] for node in bfs] == sorted(levels[node] for node in bfs)
+
+
+def test_dfs_is_iterative():
+    graph = Graph()
+    for _ in range(20000):
+        graph.add_node()
+    graph.add_edges([(node, node + 1, 1) for node in range(19999)])
+    assert algorithms.dfs_order(graph, 0) == list(range(20000))
+
+
+def test_bfs_levels_match_reference_hops(edited_graph):
+    graph, rng = edited_graph
+    for start in live_nodes(graph, rng, 3):
+        expected = reference.hops(graph, start)
+        results = [algorithms._bfs_levels_python(graph, start),
+                   reference.drain(algorithms.level_bfs(graph, start))]
+        if algorithms.HAVE_NUMPY:
+            results.append(algorithms.bfs_levels(graph, start))
+        for hops, parents in results:
+            assert {node: hops[node] for node in range(graph.node_count) if hops[node] >= 0} == expected
+            for node, hop in expected.items():
+                if hop:
+                    parent = int(parents[node])
+                    assert graph.has_edge(parent, node) and hops[parent] == hop - 1
+
+
+@pytest.mark.parametrize("search", ["dijkstra", "astar", "bidirectional_dijkstra", "alt"])
+def test_point_to_point_searches_match_reference(edited_graph, search):
+    graph, rng = edited_graph
+    index = landmarks.build_index(graph, 4)
+    for start, end in zip(live_nodes(graph, rng, 8), live_nodes(graph, rng, 8)):
+        expected = reference.distances(graph, start).get(end, math.inf)
+        if search == "alt":
+            events = index.query(graph, start, end)
+        else:
+            events = getattr(algorithms, search)(graph, start, end)
+        path, distance = reference.final_path(events)
+        assert distance == expected
+        if expected < math.inf:
+            assert path[0] == start and path[-1] == end
+            assert reference.path_length(graph, path) == expected
+        else:
+            assert path == []
+
+
+def test_trees_and_multi_source_match_reference(edited_graph):
+    graph, rng = edited_graph
+    start = live_nodes(graph, rng, 1)[0]
+    distances, previous = algorithms.shortest_path_tree(graph, start)
+    assert distances == reference.distances(graph, start)
+    for node, parent in previous.items():
+        if parent is not None:
+            assert distances[node] == distances[parent] + graph.weight(parent, node)
+
+    sources = live_nodes(graph, rng, 3)
+    nearest = reference.drain(algorithms.multi_source_dijkstra(graph, sources))
+    per_source = [reference.distances(graph, source) for source in sources]
+    for node, (distance, source) in nearest.items():
+        assert distance == min(table.get(node, math.inf) for table in per_source)
+        assert per_source[sources.index(source)][node] == distance
+    reached = set().union(*per_source)
+    assert set(nearest) == reached
+
+
+def test_components_match_reference(edited_graph):
+    graph, _ = edited_graph
+    labels, sizes = reference.drain(algorithms.connected_components(graph))
+    groups = {}
+    for node in graph.nodes():
+        groups.setdefault(labels[node], []).append(node)
+    assert sorted(groups.values()) == reference.components(graph)
+    assert sizes == sorted(sizes, reverse=True) and sum(sizes) == len(graph)
+
+
+def test_spanning_forests_agree(edited_graph):
+    graph, _ = edited_graph
+    total, tree = reference.drain(algorithms.kruskal_mst(graph))
+    assert len(tree) == len(graph) - len(reference.components(graph))
+    assert total == sum(weight for _, _, weight in tree)
+    prim_total = 0
+    for group in reference.components(graph):
+        group_total, group_tree = reference.drain(algorithms.prim_mst(graph, group[0]))
+        assert len(group_tree) == len(group) - 1
+        prim_total += group_total
+    assert prim_total == total
+
+
+def test_max_flow_equals_min_cut():
+    graph = Graph()
+    for _ in range(6):
+        graph.add_node()
+    for tail, head, capacity in ((0, 1, 10), (0, 2, 10), (1, 2, 2), (1, 3, 4), (1, 4, 8),
+                                 (2, 4, 9), (4, 3, 6), (3, 5, 10), (4, 5, 10)):
+        graph.add_edge(tail, head, capacity)
+    flow, source_side, cut = reference.drain(algorithms.max_flow(graph, 0, 5))
+    assert flow == 19
+    assert 0 in source_side and 5 not in source_side
+    assert sum(weight for _, _, weight in cut) == flow
@@ -0,0 +1,40 @@
+import math
+
+import algorithms
+import reference
+
+
+def test_astar_matches_dijkstra():
+    graph, rng = reference.random_graph(1, nodes=120, edges=300, max_weight=50)
+    for _ in range(40):
+        start, end = rng.randrange(120), rng.randrange(120)
+        expected = reference.distances(graph, start).get(end, math.inf)
+        path, distance = reference.final_path(algorithms.astar(graph, start, end))
+        assert distance == expected
+        if path:
+            assert path[0] == start and path[-1] == end
+            assert reference.path_length(graph, path) == distance
+
+
+def test_heuristic_scale_follows_edits_and_moves():
+    graph, rng = reference.random_graph(2, nodes=120, edges=300)
+    algorithms.heuristic_scale(graph)
+    for _ in range(30):
+        node1, node2 = rng.sample(range(120), 2)
+        if graph.has_edge(node1, node2):
+            graph.set_weight(node1, node2, rng.uniform(0.01, 50))
+        else:
+            graph.add_edge(node1, node2, rng.uniform(0.01, 50))
+        assert algorithms.heuristic_scale(graph) <= algorithms._scan_scale(graph)
+    graph.positions[0] = (5000.0, 5000.0)
+    assert algorithms.heuristic_scale(graph) == algorithms._scan_scale(graph) * (1 - 1e-9)
+    end = rng.randrange(1, 120)
+    expected = reference.distances(graph, 0).get(end, math.inf)
+    assert math.isclose(reference.final_path(algorithms.astar(graph, 0, end))[1], expected)
+
+
+def test_scan_scale_without_numpy(monkeypatch):
+    graph, _ = reference.random_graph(3)
+    expected = algorithms._scan_scale(graph)
+    monkeypatch.setattr(algorithms, "np", None)
+    assert math.isclose(algorithms._scan_scale(graph), expected)
@@ -0,0 +1,129 @@
+import pytest
+
+import reference
+from graph_core import ADD_NODE, REMOVE_EDGE, REMOVE_NODE, Graph, build_csr
+
+
+def model_of(graph):
+    # node -> {neighbor: weight} built from the edge list
+    model = {node: {} for node in graph.nodes()}
+    for tail, head, weight in graph.edges():
+        model[tail][head] = weight
+        model[head][tail] = weight
+    return model
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_random_edits_match_a_dict_model(seed):
+    graph, rng = reference.random_graph(seed, nodes=40, edges=60)
+    model = model_of(graph)
+    for step in range(300):
+        nodes = list(model)
+        choice = rng.random()
+        if choice < 0.35 and len(nodes) > 1:
+            node1, node2 = rng.sample(nodes, 2)
+            if node2 not in model[node1]:
+                weight = rng.randint(1, 9)
+                graph.add_edge(node1, node2, weight)
+                model[node1][node2] = model[node2][node1] = weight
+        elif choice < 0.55 and nodes:
+            node1 = rng.choice(nodes)
+            if model[node1]:
+                node2 = rng.choice(list(model[node1]))
+                graph.remove_edge(node1, node2)
+                del model[node1][node2], model[node2][node1]
+        elif choice < 0.7 and nodes:
+            node1 = rng.choice(nodes)
+            if model[node1]:
+                node2 = rng.choice(list(model[node1]))
+                weight = rng.randint(1, 9)
+                graph.set_weight(node2, node1, weight)
+                model[node1][node2] = model[node2][node1] = weight
+        elif choice < 0.8:
+            model[graph.add_node()] = {}
+        elif choice < 0.9 and nodes:
+            doomed = rng.sample(nodes, min(len(nodes), rng.randint(1, 3)))
+            graph.remove_nodes(doomed)
+            for node in doomed:
+                for neighbor in model.pop(node):
+                    if neighbor in model:
+                        del model[neighbor][node]
+        elif choice < 0.95:
+            graph.compact()
+        else:
+            assert reference.csr_is_clean(graph)
+
+        if step % 25 == 0:
+            assert sorted(graph.nodes()) == sorted(model)
+            assert len(graph) == len(model)
+            assert graph.edge_count == sum(len(adjacent) for adjacent in model.values()) // 2
+            for node, adjacent in model.items():
+                assert dict(graph.neighbors(node)) == adjacent
+                for neighbor, weight in adjacent.items():
+                    assert graph.has_edge(node, neighbor) and graph.weight(neighbor, node) == weight
+    assert reference.csr_is_clean(graph)
+    assert model_of(graph.snapshot()) == model
+
+
+def test_remove_node_logs_edges_before_the_node():
+    graph = Graph()
+    hub, leaf1, leaf2 = graph.add_node(), graph.add_node(), graph.add_node()
+    graph.add_edge(hub, leaf1, 2)
+    graph.add_edge(leaf2, hub, 3)
+    version = graph.version
+    removed = graph.remove_node(hub)
+    assert sorted(removed) == [(hub, leaf1, 2), (leaf2, hub, 3)]
+    kinds = [change[1] for change in graph.changes_since(version)]
+    assert kinds == [REMOVE_EDGE, REMOVE_EDGE, REMOVE_NODE]
+    assert graph.edge_count == 0 and not graph.has_edge(leaf1, hub)
+
+
+def test_edges_keep_their_direction():
+    graph = Graph()
+    for _ in range(3):
+        graph.add_node()
+    graph.add_edge(2, 0, 1)
+    graph.add_edge(0, 1, 1)
+    graph.compact()
+    assert sorted(graph.edges()) == [(0, 1, 1), (2, 0, 1)]
+    assert list(graph.incident_edges(0)) == [(2, 0, 1), (0, 1, 1)]
+
+
+def test_duplicate_edges_are_rejected():
+    graph = Graph()
+    graph.add_node()
+    graph.add_node()
+    graph.add_edge(0, 1, 1)
+    version = graph.version
+    with pytest.raises(ValueError):
+        graph.add_edge(1, 0, 2)
+    assert graph.version == version
+    assert graph.changes_since(version) == []
+
+
+def test_build_csr_drops_loops_and_repeats():
+    offsets, targets, weights, tails, by_target = build_csr(3, [0, 1, 1, 2], [1, 0, 1, 0], [5, 6, 7, 8])
+    graph = Graph()
+    graph.load_csr([0] * 3, [0] * 3, offsets, targets, weights, tails, by_target)
+    assert sorted(graph.edges()) == [(0, 1, 5), (2, 0, 8)]
+
+
+def test_change_log_overflow_is_reported():
+    graph = Graph()
+    version = graph.version
+    for _ in range(5000):
+        graph.add_node()
+    assert graph.changes_since(version) is None
+    assert [change[1] for change in graph.changes_since(graph.version - 1)] == [ADD_NODE]
+
+
+def test_checkpoint_restore_round_trip():
+    graph, rng = reference.random_graph(3)
+    checkpoint = graph.checkpoint()
+    before = reference.state(graph)
+    for _ in range(50):
+        reference.random_edit(graph, rng)
+    graph.restore(checkpoint)
+    assert reference.state(graph) == before
+    assert reference.csr_is_clean(graph)
+    assert graph.changes_since(graph.version) == []
@@ -0,0 +1,82 @@
+import pytest
+
+import graph_io
+from graph_core import Graph
+
+
+def edge_set(graph):
+    return sorted(graph.edges())
+
+
+def gappy_graph():
+    graph = Graph()
+    for i in range(6):
+        graph.add_node(i * 10.0, i * 5.0)
+    graph.add_edge(0, 2, 3)
+    graph.add_edge(2, 5, 1.5)
+    graph.add_edge(4, 5, 2)
+    graph.remove_node(1)
+    graph.remove_node(3)
+    return graph
+
+
+def test_json_round_trip_keeps_ids(tmp_path):
+    graph = gappy_graph()
+    path = str(tmp_path / "graph.json")
+    graph_io.save_json(graph, path)
+    loaded = Graph()
+    graph_io.load_json(loaded, path)
+    assert list(loaded.nodes()) == [0, 2, 4, 5]
+    assert edge_set(loaded) == edge_set(graph)
+    assert loaded.positions[4] == graph.positions[4]
+
+
+def test_edge_list_round_trip_keeps_ids(tmp_path):
+    graph = gappy_graph()
+    path = str(tmp_path / "graph.csv")
+    graph_io.save_graph(graph, path)
+    loaded = Graph()
+    graph_io.load_graph(loaded, path)
+    assert edge_set(loaded) == edge_set(graph)
+    assert 1 not in loaded and 3 not in loaded
+
+
+def test_string_labels_are_numbered_in_order(tmp_path):
+    path = tmp_path / "names.txt"
+    path.write_text("alice bob 2\nbob carol\n")
+    graph = Graph()
+    labels = graph_io.load_edge_list(graph, str(path))
+    assert labels == ["alice", "bob", "carol"]
+    assert edge_set(graph) == [(0, 1, 2.0), (1, 2, 1)]
+
+
+def test_two_column_csv_header_is_skipped(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("source,target\n0,1\n1,2\n")
+    graph = Graph()
+    graph_io.load_edge_list(graph, str(path))
+    assert list(graph.nodes()) == [0, 1, 2]
+    assert edge_set(graph) == [(0, 1, 1), (1, 2, 1)]
+
+
+def test_three_column_csv_header_is_skipped(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text("# exported\nsource,target,weight\n3,1,2.5\n")
+    graph = Graph()
+    graph_io.load_edge_list(graph, str(path))
+    assert edge_set(graph) == [(3, 1, 2.5)]
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"nodes": [{"id": 0}, {"x": 1, "y": 2}], "edges": []}', r"nodes\[1\]: missing 'id'"),
+    ('{"nodes": [], "edges": [{"source": 0, "target": 1}, {"source": 1}]}', r"edges\[1\]: missing 'target'"),
+    ('{"nodes": [], "edges": [[0, 1, 2]]}', r"edges\[0\]: expected an object, got list"),
+    ('{"nodes": [3], "edges": []}', r"nodes\[0\]: expected an object, got int"),
+    ('{"nodes": [{"id": [1]}], "edges": []}', r"nodes\[0\]: invalid 'id'"),
+    ('{"nodes": [{"id": 0, "x": null}], "edges": []}', r"nodes\[0\]: invalid 'x'"),
+])
+def test_malformed_json_items_are_format_errors(tmp_path, text, message):
+    path = tmp_path / "bad.json"
+    path.write_text(text)
+    with pytest.raises(graph_io.GraphFormatError, match=message):
+        graph_io.load_json(Graph(), str(path))
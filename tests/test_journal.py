@@ -0,0 +1,109 @@
+import pytest
+
+import algorithms
+import reference
+from graph_core import CHANGE_LOG_LIMIT, Graph
+from journal import Journal
+
+
+def test_csr_drops_node_deleted_after_undone_delete():
+    graph = Graph()
+    journal = Journal(graph)
+    a, b, c = graph.add_node(), graph.add_node(), graph.add_node()
+    graph.add_edge(b, c, 1)
+    graph.compact()
+    with journal.edit("delete A"):
+        graph.remove_node(a)
+    graph.csr()
+    journal.undo()
+    with journal.edit("delete B"):
+        graph.remove_node(b)
+
+    assert list(graph.nodes()) == [a, c]
+    assert reference.csr_is_clean(graph)
+    assert algorithms.bfs_order(graph, c) == [c]
+    assert algorithms.shortest_path(graph, c, b) == ([], float('inf'))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_edit_undo_edit_sequences(seed):
+    # Random edits, undos and redos, checked against the states they should
+    # return to, with the CSR read in between as the algorithms would
+    graph, rng = reference.random_graph(seed, nodes=25, edges=40)
+    journal = Journal(graph)
+    history = [reference.state(graph)]
+    position = 0
+    for _ in range(200):
+        choice = rng.random()
+        if choice < 0.5:
+            with journal.edit("edit"):
+                changed = reference.random_edit(graph, rng)
+            if changed is None:
+                continue
+            del history[position + 1:]
+            history.append(reference.state(graph))
+            position += 1
+        elif choice < 0.6:
+            nodes = list(graph.nodes())
+            doomed = rng.sample(nodes, min(len(nodes), 3))
+            with journal.edit("delete selection", bulk=rng.random() < 0.5):
+                graph.remove_nodes(doomed)
+            if not doomed:
+                continue
+            del history[position + 1:]
+            history.append(reference.state(graph))
+            position += 1
+        elif choice < 0.85:
+            if journal.undo() is None:
+                assert position == 0
+                continue
+            position -= 1
+        else:
+            if journal.redo() is None:
+                assert position == len(history) - 1
+                continue
+            position += 1
+        assert reference.state(graph) == history[position]
+        if rng.random() < 0.3:
+            assert reference.csr_is_clean(graph)
+
+
+def test_checkpoint_entries_survive_the_change_log():
+    graph, rng = reference.random_graph(1, nodes=30, edges=50)
+    journal = Journal(graph)
+    before = reference.state(graph)
+    with journal.edit("import", bulk=True):
+        graph.clear()
+        for _ in range(5000):
+            graph.add_node()
+    after = reference.state(graph)
+    journal.undo()
+    assert reference.state(graph) == before
+    assert reference.csr_is_clean(graph)
+    journal.redo()
+    assert reference.state(graph) == after
+
+
+def test_undo_deleting_a_hub_beyond_the_change_log():
+    graph = Graph()
+    journal = Journal(graph)
+    hub = graph.add_node()
+    leaves = [graph.add_node() for _ in range(CHANGE_LOG_LIMIT + 100)]
+    graph.add_edges([(hub, leaf, leaf % 7 + 1) for leaf in leaves])
+    with journal.edit("add edge"):
+        graph.add_edge(leaves[0], leaves[1], 3)
+    before = reference.state(graph)
+    with journal.edit("delete node"):
+        graph.remove_node(hub)
+    after = reference.state(graph)
+
+    assert journal.can_undo and len(journal.undo_stack) == 2
+    label, changes = journal.undo()
+    assert label == "delete node" and len(changes) == len(leaves) + 1
+    assert reference.state(graph) == before
+    assert reference.csr_is_clean(graph)
+    journal.redo()
+    assert reference.state(graph) == after
+    journal.undo()
+    assert journal.undo()[0] == "add edge"
+    assert not graph.has_edge(leaves[0], leaves[1])
@@ -0,0 +1,76 @@
+import math
+import random
+import tracemalloc
+
+import pytest
+
+import layout
+from graph_core import Graph
+
+
+def random_graph(seed, nodes=150, edges=220, spread=900.0):
+    rng = random.Random(seed)
+    graph = Graph()
+    for _ in range(nodes):
+        graph.add_node(rng.uniform(0, spread), rng.uniform(0, spread))
+    for _ in range(edges):
+        node1, node2 = rng.randrange(nodes), rng.randrange(nodes)
+        if node1 != node2 and not graph.has_edge(node1, node2):
+            graph.add_edge(node1, node2, 1)
+    return graph
+
+
+@pytest.mark.skipif(layout.np is None, reason="needs NumPy")
+def test_numpy_and_python_force_layouts_agree(monkeypatch):
+    vectorised = random_graph(1)
+    plain = random_graph(1)
+    layout.run_layout(layout.force_layout(vectorised, iterations=5))
+    monkeypatch.setattr(layout, "np", None)
+    layout.run_layout(layout.force_layout(plain, iterations=5))
+    for node in plain.nodes():
+        x1, y1 = vectorised.positions[node]
+        x2, y2 = plain.positions[node]
+        assert math.isclose(x1, x2, rel_tol=1e-6, abs_tol=1e-6)
+        assert math.isclose(y1, y2, rel_tol=1e-6, abs_tol=1e-6)
+
+
+@pytest.mark.skipif(layout.np is None, reason="needs NumPy")
+def test_numpy_grid_follows_node_count_not_extent():
+    # 200 nodes over 4e6 units would need ~1e9 dense grid cells
+    graph = random_graph(2, nodes=200, edges=100, spread=4e6)
+    tracemalloc.start()
+    try:
+        layout.run_layout(layout.force_layout(graph, iterations=2))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 * 1024 * 1024
+
+
+@pytest.mark.skipif(layout.np is None, reason="needs NumPy")
+def test_scattered_numpy_and_python_layouts_agree(monkeypatch):
+    vectorised = random_graph(3, spread=2e5)
+    plain = random_graph(3, spread=2e5)
+    layout.run_layout(layout.force_layout(vectorised, iterations=3))
+    monkeypatch.setattr(layout, "np", None)
+    layout.run_layout(layout.force_layout(plain, iterations=3))
+    for node in plain.nodes():
+        assert vectorised.positions[node] == pytest.approx(plain.positions[node], rel=1e-6, abs=1e-6)
+
+
+def test_small_drawn_graph_is_not_scattered():
+    graph = Graph()
+    for x, y in ((0, 0), (30, 0), (0, 30), (30, 30)):
+        graph.add_node(x, y)
+    graph.add_edge(0, 1)
+    graph.add_edge(2, 3)
+    layout._spread_if_degenerate(graph, list(graph.nodes()), 0)
+    assert graph.positions[3] == (30, 30)
+
+
+def test_stacked_nodes_are_scattered():
+    graph = Graph()
+    for _ in range(4):
+        graph.add_node()
+    layout._spread_if_degenerate(graph, list(graph.nodes()), 0)
+    assert len({graph.positions[node] for node in graph.nodes()}) == 4
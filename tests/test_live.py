@@ -0,0 +1,48 @@
+import pytest
+
+import algorithms
+import reference
+from journal import Journal
+from live import LiveComponents, LiveTree
+
+
+def check_tree(graph, tree, weighted):
+    expected = reference.distances(graph, tree.source) if weighted else reference.hops(graph, tree.source)
+    assert tree.distances == expected
+    for node, parent in tree.previous_nodes.items():
+        if parent is not None:
+            length = graph.weight(parent, node) if weighted else 1
+            assert tree.distances[node] == tree.distances[parent] + length
+
+
+def check_components(graph, live):
+    groups = sorted(sorted(members) for members in live.members.values())
+    assert groups == reference.components(graph)
+    for root, members in live.members.items():
+        assert all(live.component(node) == root for node in members)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_live_results_follow_edits_and_undo(seed):
+    graph, rng = reference.random_graph(seed, nodes=30, edges=40)
+    journal = Journal(graph)
+    source = 0
+    weighted = LiveTree(graph, source, weighted=True)
+    levels = LiveTree(graph, source, weighted=False)
+    components = LiveComponents(graph)
+    for _ in range(60):
+        for _ in range(rng.randint(1, 4)):
+            if rng.random() < 0.25:
+                journal.undo()
+                continue
+            with journal.edit("edit"):
+                reference.random_edit(graph, rng)
+            if source not in graph:
+                journal.undo()  # keep the source alive
+        for tree in (weighted, levels):
+            tree.update()
+        components.update()
+        check_tree(graph, weighted, True)
+        check_tree(graph, levels, False)
+        check_components(graph, components)
+    assert weighted.distances == algorithms.shortest_path_tree(graph, source)[0]
@@ -0,0 +1,27 @@
+import math
+
+import pytest
+
+import reference
+from path_cache import ShortestPathCache
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_cached_paths_stay_shortest_under_edits(seed):
+    graph, rng = reference.random_graph(seed, nodes=40, edges=80)
+    cache = ShortestPathCache(graph, max_trees=4)
+    sources = [0, 1, 2, 3, 4, 5]
+    for _ in range(120):
+        if rng.random() < 0.5:
+            reference.random_edit(graph, rng)
+        source = rng.choice(sources)
+        target = rng.randrange(graph.node_count)
+        if source not in graph or target not in graph:
+            continue
+        path, distance = cache.path(source, target)
+        expected = reference.distances(graph, source).get(target, math.inf)
+        assert distance == expected
+        if expected < math.inf:
+            assert path[0] == source and path[-1] == target
+            assert reference.path_length(graph, path) == expected
+    assert cache.stats()["hits"] > 0
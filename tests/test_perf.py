@@ -0,0 +1,32 @@
+import perf
+from renderer import CanvasRenderer
+
+
+class FakeCanvas:
+    # Just enough of a Tk canvas for the renderer's timers
+    def __init__(self):
+        self.calls = []
+
+    def after(self, delay, callback, *args):
+        self.calls.append((callback, args))
+        return len(self.calls)
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, after_id):
+        pass
+
+
+def test_probe_times_flushes_from_animation_frames():
+    perf.reset()
+    renderer = CanvasRenderer(FakeCanvas(), "#ffffff", "#000000")
+    perf.probe(renderer, "flush", "test.flush")
+    perf.enable()
+    try:
+        renderer.animator.on_frame()
+        assert perf.histograms["test.flush"].count == 1
+    finally:
+        perf.disable()
+        perf.unprobe(renderer)
+        perf.reset()
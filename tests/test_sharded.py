@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+import algorithms
+import reference
+import sharded
+from worker import AlgorithmRunner
+
+
+class Root:
+    # Runs the runner's after() callbacks when pumped, in place of Tk
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback, *args):
+        self.callbacks.append((callback, args))
+        return len(self.callbacks)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def pump(self, done, timeout=60):
+        deadline = time.monotonic() + timeout
+        while not done() and time.monotonic() < deadline:
+            time.sleep(0.002)
+            callbacks, self.callbacks = self.callbacks, []
+            for callback, args in callbacks:
+                callback(*args)
+        assert done()
+
+
+@pytest.fixture(params=[False, True], ids=["threads", "processes"])
+def pool(request):
+    root = Root()
+    runner = AlgorithmRunner(root, processes=request.param, max_workers=2)
+    yield runner, root
+    runner.shutdown()
+
+
+def sharded_graph(seed, parts=4):
+    graph, rng = reference.random_graph(seed, nodes=200, edges=320)
+    for _ in range(20):
+        reference.random_edit(graph, rng)
+    labels, cut = algorithms.partition_graph(graph, parts)
+    return graph, rng, sharded.ShardedGraph(graph, labels, parts), cut
+
+
+def run(pool, shards, kind, sources=()):
+    runner, root = pool
+    job = sharded.ShardedJob(runner, shards, kind, sources)
+    root.pump(lambda: job.finished)
+    assert job.error is None
+    return job.result
+
+
+def test_partition_is_balanced_and_counts_the_cut():
+    graph, _, shards, cut = sharded_graph(1)
+    assert sum(shards.sizes) == len(graph)
+    assert max(shards.sizes) <= len(graph) / 4 * (1 + algorithms.PARTITION_IMBALANCE) + 1
+    labels = shards.labels
+    assert cut == sum(1 for tail, head, _ in graph.edges() if labels[tail] != labels[head])
+    shards.release()
+
+
+def test_sharded_runs_match_single_process(pool):
+    graph, rng, shards, _ = sharded_graph(2)
+    try:
+        sources = rng.sample(list(graph.nodes()), 3)
+        hops, parents = run(pool, shards, sharded.BFS, sources[:1])
+        expected = reference.hops(graph, sources[0])
+        assert {node: hops[node] for node in graph.nodes() if hops[node] >= 0} == expected
+        for node, hop in expected.items():
+            if hop:
+                assert graph.has_edge(parents[node], node) and hops[parents[node]] == hop - 1
+
+        nearest = run(pool, shards, sharded.NEAREST, sources)
+        per_source = [reference.distances(graph, source) for source in sources]
+        assert set(nearest) == set().union(*per_source)
+        for node, (distance, source) in nearest.items():
+            assert distance == min(table.get(node, float('inf')) for table in per_source)
+            assert per_source[sources.index(source)][node] == distance
+
+        labels, sizes = run(pool, shards, sharded.COMPONENTS)
+        groups = {}
+        for node in graph.nodes():
+            groups.setdefault(labels[node], []).append(node)
+        assert sorted(groups.values()) == reference.components(graph)
+        assert sizes == sorted(sizes, reverse=True)
+    finally:
+        shards.release()
@@ -0,0 +1,38 @@
+import random
+import time
+
+from spatial import GridIndex
+
+
+def scattered_index(count, width, height, seed=1):
+    rng = random.Random(seed)
+    index = GridIndex(64)
+    points = {}
+    for item in range(count):
+        points[item] = (rng.uniform(0, width), rng.uniform(0, height))
+        index.insert_point(item, *points[item])
+    return index, points
+
+
+def test_query_box_matches_a_scan():
+    index, points = scattered_index(300, 2000, 1500)
+    rng = random.Random(2)
+    for _ in range(50):
+        x1, x2 = sorted(rng.uniform(-100, 2100) for _ in range(2))
+        y1, y2 = sorted(rng.uniform(-100, 1600) for _ in range(2))
+        expected = {item for item, (x, y) in points.items() if x1 <= x <= x2 and y1 <= y <= y2}
+        found = index.query_box(x2, y2, x1, y1)
+        assert expected <= found
+        for item in found - expected:
+            x, y = points[item]
+            assert x1 - 64 < x < x2 + 64 and y1 - 64 < y < y2 + 64
+
+
+def test_huge_box_over_a_sparse_index_walks_occupied_cells():
+    # 1e6 x 6e5 world units hold ~1.5e8 cells; only the occupied ones count
+    index, points = scattered_index(200, 1e6, 6e5)
+    started = time.perf_counter()
+    assert index.query_box(-1e5, -1e5, 1.1e6, 7e5) == set(points)
+    half = index.query_box(0, 0, 5e5, 6e5)
+    assert time.perf_counter() - started < 0.5
+    assert half == {item for item, (x, _) in points.items() if x < 5e5 // 64 * 64 + 64}
@@ -0,0 +1,68 @@
+import importlib.util
+import os
+import time
+
+import pytest
+
+from worker import DONE, FAILED
+
+pytest.importorskip("tkinter")
+
+# 208pro.py is not an importable module name; load it from its path
+spec = importlib.util.spec_from_file_location(
+    "graph_visualizer", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "208pro.py"))
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+
+class PlaybackRecorder:
+    def __init__(self):
+        self.events = []
+        self.calls = []
+
+    def extend(self, events, complete=False):
+        self.calls.append(("extend", complete))
+
+    def pause(self):
+        self.calls.append(("pause",))
+
+
+class TraceRun:
+    # Just the state on_trace_done reads from the visualizer
+    def __init__(self):
+        self.trace_run = 1
+        self.trace_label = "Dijkstra"
+        self.trace_started = time.perf_counter()
+        self.results = []
+        self.trace_on_result = self.results.append
+        self.playback = PlaybackRecorder()
+        self.graph = ()
+        self.error_color = self.trace_color = "#000000"
+        self.logged = []
+        self.statuses = []
+
+    def log_message(self, message, color=None, level=None):
+        self.logged.append(message)
+
+    def update_status(self, text):
+        self.statuses.append(text)
+
+
+@pytest.fixture
+def trace_run():
+    return TraceRun()
+
+
+def test_failed_run_is_not_shown_as_finished(trace_run):
+    app_module.GraphVisualizer.on_trace_done(trace_run, 1, FAILED, "boom")
+    assert trace_run.trace_run is None
+    assert trace_run.logged == ["Dijkstra failed: boom"]
+    assert trace_run.playback.calls == [("pause",)]
+    assert trace_run.statuses == ["Dijkstra failed"]
+    assert trace_run.results == []
+
+
+def test_finished_run_completes_the_trace(trace_run):
+    app_module.GraphVisualizer.on_trace_done(trace_run, 1, DONE, {"result": 1})
+    assert trace_run.playback.calls == [("extend", True)]
+    assert trace_run.results == [{"result": 1}]
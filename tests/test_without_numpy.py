@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# NumPy is optional (requirements-optional.txt).  These checks run in a fresh
+# interpreter where importing it fails, so every module takes its pure Python
+# path from the start.
+SCRIPT = textwrap.dedent("""
+    import sys
+    sys.modules["numpy"] = None  # import numpy now raises ImportError
+    sys.path.insert(0, "tests")
+
+    import algorithms
+    import all_pairs
+    import layout
+    import reference
+    import sharded
+
+    assert algorithms.np is None and layout.np is None and sharded.np is None
+    assert not algorithms.HAVE_NUMPY
+
+    graph, rng = reference.random_graph(5, nodes=80, edges=160)
+    start = next(iter(graph.nodes()))
+    hops, parents = reference.drain(algorithms.level_bfs(graph, start))
+    expected = reference.hops(graph, start)
+    assert {node: hops[node] for node in graph.nodes() if hops[node] >= 0} == expected
+    assert sum(algorithms.level_sizes(hops)) == len(expected)
+    assert 0 < algorithms.heuristic_scale(graph) <= algorithms._scan_scale(graph)
+    assert not all_pairs.use_floyd_warshall(graph)
+
+    labels, cut = algorithms.partition_graph(graph, 4)
+    shards = sharded.ShardedGraph(graph, labels, 4)
+    assert sum(shards.sizes) == len(graph)
+    shards.release()
+
+    layout.run_layout(layout.force_layout(graph, iterations=3))
+    assert all(abs(x) < 1e9 and abs(y) < 1e9 for x, y in (graph.positions[node] for node in graph.nodes()))
+    print("ok")
+""")
+
+
+def test_modules_fall_back_to_python_without_numpy():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ok"
@@ -0,0 +1,118 @@
+import time
+
+# Colour transitions driven by one shared frame timer.
+#
+# Each tween belongs to a key (one per animated item) and calls its apply
+# callback with the interpolated colour every frame.  All running tweens are
+# advanced by the same after() callback, which then calls on_frame once, so a
+# renderer can push the whole frame to the canvas in one batch.  Starting a
+# tween on a key that is already animating replaces the running one.
+# Progress is quantised to LEVELS steps, so tweens started together share
+# their colours and the per-colour work is done once per frame.
+
+FRAME_MS = 16
+DURATION = 0.3  # s
+LEVELS = 32
+
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def blend(start, end, t):
+    # start and end are (r, g, b) tuples
+    return "#" + "".join(f"{round(a + (b - a) * t):02x}" for a, b in zip(start, end))
+
+
+def ease(t):
+    # Smoothstep: slow start and finish
+    return t * t * (3 - 2 * t)
+
+
+class Tween:
+    __slots__ = ("start", "end", "begin", "duration", "apply", "color")
+
+    def __init__(self, start, end, begin, duration, apply):
+        self.start = start
+        self.end = end
+        self.begin = begin
+        self.duration = duration
+        self.apply = apply
+        self.color = None  # last colour applied
+
+    @property
+    def reached(self):
+        return self.color or self.start
+
+
+class Animator:
+    def __init__(self, widget, on_frame=None):
+        self.widget = widget
+        self.on_frame = on_frame
+        self.tweens = {}  # key -> Tween
+        self._after_id = None
+
+    def __len__(self):
+        return len(self.tweens)
+
+    def color(self, key, start, end, apply, duration=DURATION, delay=0.0):
+        # Fades from start to end after holding start for delay seconds,
+        # replacing any tween on key; pass current(key) as start to continue
+        # from where a running tween has got to
+        self.tweens[key] = Tween(start, end, time.perf_counter() + delay, duration, apply)
+        if self._after_id is None:
+            self._after_id = self.widget.after(FRAME_MS, self._frame)
+
+    def current(self, key):
+        # The colour key has reached, or None when it is not animating
+        tween = self.tweens.get(key)
+        return tween.reached if tween is not None else None
+
+    def cancel(self, key):
+        # Stops the tween where it is
+        self.tweens.pop(key, None)
+
+    def cancel_all(self):
+        self.tweens.clear()
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def finish_all(self):
+        # Jumps every tween to its end colour
+        for tween in self.tweens.values():
+            tween.apply(tween.end)
+        self.cancel_all()
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def _frame(self):
+        self._after_id = None
+        now = time.perf_counter()
+        colors = {}  # (start, end, level) -> colour, shared by this frame
+        finished = []
+        for key, tween in self.tweens.items():
+            if now < tween.begin:
+                level = 0
+            elif tween.duration <= 0 or now >= tween.begin + tween.duration:
+                level = LEVELS
+            else:
+                level = int(ease((now - tween.begin) / tween.duration) * LEVELS)
+            cache_key = (tween.start, tween.end, level)
+            color = colors.get(cache_key)
+            if color is None:
+                color = colors[cache_key] = (tween.end if level == LEVELS else
+                                             blend(hex_to_rgb(tween.start), hex_to_rgb(tween.end),
+                                                   level / LEVELS))
+            if color != tween.color or level == LEVELS:
+                tween.color = color
+                tween.apply(color)
+            if level == LEVELS:
+                finished.append(key)
+        for key in finished:
+            del self.tweens[key]
+        if self.on_frame is not None:
+            self.on_frame()
+        if self.tweens:
+            self._after_id = self.widget.after(FRAME_MS, self._frame)
@@ -0,0 +1,47 @@
+import array
+
+# Disjoint sets over dense node ids with union by size and path halving, so a
+# sequence of m operations costs O(m alpha(n)).  Used for connected components
+# and Kruskal's MST.
+
+
+class UnionFind:
+    def __init__(self, size=0):
+        self.parent = array.array('i', range(size))
+        self.size = array.array('i', [1]) * size
+        self.sets = size
+
+    def __len__(self):
+        return len(self.parent)
+
+    def grow(self, size):
+        # Adds singleton sets for ids up to size - 1
+        for node in range(len(self.parent), size):
+            self.parent.append(node)
+            self.size.append(1)
+            self.sets += 1
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, node1, node2):
+        # Returns the new root, or -1 when both were in the same set already
+        root1, root2 = self.find(node1), self.find(node2)
+        if root1 == root2:
+            return -1
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size[root2]
+        self.sets -= 1
+        return root1
+
+    def connected(self, node1, node2):
+        return self.find(node1) == self.find(node2)
+
+    def set_size(self, node):
+        return self.size[self.find(node)]
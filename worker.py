@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import queue
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import algorithms
+
+# Off-thread execution of the trace generators in algorithms.py.
+#
+# Each run gets an immutable Graph.snapshot(), so the GUI can keep editing
+# while it runs, and is executed in a process pool (one core per run) or, where
+# processes are unavailable, a thread pool.  Workers stream their events back
+# in chunks through a queue that the Tk thread drains from a periodic after()
+# poller, which dispatches them to the callbacks given to submit().
+#
+# Cancellation is cooperative: every run owns a slot in a shared flag array
+# that the worker checks between chunks.
+
+CHUNK_EVENTS = 2000  # events per queue message
+POLL_INTERVAL = 30  # ms between queue drains while runs are active
+POLL_BUDGET = 200  # max messages handled per drain, keeps the GUI responsive
+MAX_RUNS = 64  # concurrently active runs (size of the cancel flag array)
+
+# Message kinds sent by workers: (run id, kind, payload)
+EVENTS = "events"  # payload: (event list, progress fraction)
+DONE = "done"  # payload: the algorithm's return value
+CANCELLED = "cancelled"
+FAILED = "failed"  # payload: error text
+
+# Events that count towards a run's progress (nodes reached or settled)
+PROGRESS_EVENTS = (algorithms.VISIT, algorithms.SETTLE)
+
+
+def run_trace(results, cancel_flags, run_id, slot, name, graph, args):
+    # Runs algorithms.<name>(graph, *args) and streams its events.  Plain
+    # functions (no trace) and generator return values are sent with DONE.
+    try:
+        if cancel_flags[slot]:
+            results.put((run_id, CANCELLED, None))
+            return
+        output = getattr(algorithms, name)(graph, *args)
+        if not isinstance(output, types.GeneratorType):
+            results.put((run_id, DONE, output))
+            return
+        total = max(1, len(graph))
+        reached = 0
+        chunk = []
+        while True:
+            try:
+                event = next(output)
+            except StopIteration as stop:
+                result = stop.value
+                break
+            chunk.append(event)
+            if event[0] in PROGRESS_EVENTS:
+                reached += 1
+            if len(chunk) >= CHUNK_EVENTS:
+                if cancel_flags[slot]:
+                    results.put((run_id, CANCELLED, None))
+                    return
+                results.put((run_id, EVENTS, (chunk, min(1.0, reached / total))))
+                chunk = []
+        results.put((run_id, EVENTS, (chunk, 1.0)))
+        results.put((run_id, DONE, result))
+    except Exception as exc:
+        results.put((run_id, FAILED, f"{type(exc).__name__}: {exc}"))
+
+
+# Queue and flags inherited by pool processes at start-up
+_process_results = None
+_process_cancel_flags = None
+
+
+def _init_process(results, cancel_flags):
+    global _process_results, _process_cancel_flags
+    _process_results = results
+    _process_cancel_flags = cancel_flags
+
+
+def _run_in_process(run_id, slot, name, graph, args):
+    run_trace(_process_results, _process_cancel_flags, run_id, slot, name, graph, args)
+
+
+class AlgorithmRunner:
+    def __init__(self, root, processes=None, max_workers=None):
+        # processes=None uses a process pool when there is more than one core
+        self.root = root
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.use_processes = (os.cpu_count() or 1) > 1 if processes is None else processes
+        self._executor = None
+        self._results = None
+        self._cancel_flags = None
+        self._runs = {}  # run id -> (slot, on_events, on_done)
+        self._cancelled = {}  # run id -> slot, until the worker acknowledges
+        self._free_slots = list(range(MAX_RUNS - 1, -1, -1))
+        self._next_id = 0
+        self._poll_id = None
+
+    @property
+    def active(self):
+        return len(self._runs)
+
+    def submit(self, name, graph, args, on_events, on_done=None):
+        # Runs algorithms.<name>(graph, *args) in the background; graph should
+        # be a snapshot.  on_events(run_id, events, progress) and
+        # on_done(run_id, status, payload) are called on the Tk thread, with
+        # the result for DONE and the error text for FAILED.
+        if not self._free_slots:
+            raise RuntimeError(f"more than {MAX_RUNS} algorithm runs in progress")
+        self.start()
+        run_id = self._next_id
+        self._next_id += 1
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+        self._runs[run_id] = (slot, on_events, on_done)
+        if self.use_processes:
+            future = self._executor.submit(_run_in_process, run_id, slot, name, graph, args)
+        else:
+            future = self._executor.submit(run_trace, self._results, self._cancel_flags,
+                                           run_id, slot, name, graph, args)
+        future.add_done_callback(lambda future: self._report_crash(run_id, future))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_INTERVAL, self._poll)
+        return run_id
+
+    def cancel(self, run_id):
+        # The run stops at its next chunk boundary; no more events are
+        # delivered for it and on_done receives CANCELLED right away
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        slot, _, on_done = run
+        self._cancel_flags[slot] = 1
+        self._cancelled[run_id] = slot
+        if on_done is not None:
+            on_done(run_id, CANCELLED, None)
+
+    def cancel_all(self):
+        for run_id in list(self._runs):
+            self.cancel(run_id)
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def start(self):
+        # Creates the pool; submit() does this on demand.  use_processes is
+        # final afterwards.
+        if self._executor is not None:
+            return
+        if self.use_processes:
+            try:
+                # Spawned rather than forked: the parent holds Tk and X state
+                context = multiprocessing.get_context("spawn")
+                results = context.Queue()
+                cancel_flags = context.Array('b', MAX_RUNS, lock=False)
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context,
+                                                     initializer=_init_process,
+                                                     initargs=(results, cancel_flags))
+                self._results = results
+                self._cancel_flags = cancel_flags
+                return
+            except (OSError, ImportError, NotImplementedError):
+                self.use_processes = False  # e.g. no working sem_open on this platform
+        self._results = queue.Queue()
+        self._cancel_flags = bytearray(MAX_RUNS)
+        self._executor = ThreadPoolExecutor(self.max_workers)
+
+    def _report_crash(self, run_id, future):
+        # run_trace reports its own errors; this catches a worker that could
+        # not run it at all (broken pool, unpicklable arguments)
+        if not future.cancelled() and future.exception() is not None:
+            exc = future.exception()
+            self._results.put((run_id, FAILED, f"{type(exc).__name__}: {exc}"))
+
+    def _poll(self):
+        self._poll_id = None
+        for _ in range(POLL_BUDGET):
+            try:
+                run_id, kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            run = self._runs.get(run_id)
+            if run is None:
+                # Late message from a cancelled run; its slot is reusable once
+                # the worker has stopped
+                if kind != EVENTS and run_id in self._cancelled:
+                    self._free_slots.append(self._cancelled.pop(run_id))
+                continue
+            slot, on_events, on_done = run
+            if kind == EVENTS:
+                if on_events is not None:
+                    events, progress = payload
+                    on_events(run_id, events, progress)
+            else:
+                del self._runs[run_id]
+                self._free_slots.append(slot)
+                if on_done is not None:
+                    on_done(run_id, kind, payload)
+        if self._runs or self._cancelled:
+            self._poll_id = self.root.after(POLL_INTERVAL, self._poll)